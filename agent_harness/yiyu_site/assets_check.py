@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Bulk asset + link integrity pass over one keep-alive connection pool.
+
+Collects every asset the site ships:
+
+- refs in the built `index.html` (`dist/index.html` when present, else the
+  deployed one), followed transitively through JS/CSS chunks
+  (`assets/*.js|css` imports, `url(...)`);
+- everything under `public/images/**` and `public/docs/**`.
+
+All of them are fetched concurrently through one pooled `requests.Session`.
+ETag / Last-Modified are cached between cycles in `.cache/asset_cache.json`,
+so unchanged assets cost a 304. Reports status, cache headers, compression of
+text assets and size regressions against the previous cycle.
+
+Usage:
+  python assets_check.py [--workers 16]
+  python run_all.py assets_check    # as a check
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import quote, urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from harness import BASE, DIST_DIR, HERE, TARGET, save_json
+
+CHECK = "assets_integrity"
+
+REPO = HERE.parents[1]
+PUBLIC_DIR = REPO / "public"
+CACHE_FILE = HERE / ".cache" / "asset_cache.json"
+
+WORKERS = int(os.environ.get("YIYU_ASSET_WORKERS", "16"))
+TIMEOUT = 30
+TEXT_TYPES = ("javascript", "css", "html", "json", "svg", "text/plain")
+COMPRESS_MIN_BYTES = 1024
+SIZE_REGRESSION_RATIO = 0.10
+SIZE_REGRESSION_MIN_BYTES = 10 * 1024
+
+REF_RE = re.compile(r"""(?:src|href)\s*=\s*["']([^"'#]+)["']""")
+CHUNK_RE = re.compile(r"""["'`]((?:\.{1,2}/|/|assets/)[\w./-]+\.(?:js|css|svg|png|jpe?g|webp|woff2?|wasm|mjs))["'`]""")
+CSS_URL_RE = re.compile(r"""url\(\s*["']?([^"')]+)["']?\s*\)""")
+
+_local = threading.local()
+
+
+def http_session(pool_size: int = WORKERS) -> requests.Session:
+    """Per-thread keep-alive session sized for the worker pool."""
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=2)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        _local.session = s
+    return s
+
+
+def _load_cache() -> Dict[str, Any]:
+    try:
+        return json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _same_site(url: str) -> bool:
+    u, b = urlsplit(url), urlsplit(BASE)
+    return (u.scheme, u.netloc) == (b.scheme, b.netloc) and u.path.startswith(b.path)
+
+
+def _public_urls() -> List[str]:
+    urls = []
+    for sub in ("images", "docs"):
+        for p in sorted((PUBLIC_DIR / sub).rglob("*")):
+            if p.is_file():
+                urls.append(urljoin(BASE, quote(p.relative_to(PUBLIC_DIR).as_posix())))
+    return urls
+
+
+def _index_html() -> str:
+    # The local build only describes the site being checked when that site is the local preview;
+    # against Pages (or an explicit YIYU_BASE) its hashed chunk names may not match what is deployed.
+    local = DIST_DIR / "index.html"
+    if TARGET == "local" and not os.environ.get("YIYU_BASE") and local.is_file():
+        return local.read_text(encoding="utf-8")
+    return http_session().get(BASE, timeout=TIMEOUT).text
+
+
+def fetch(url: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    started = time.perf_counter()
+    try:
+        r = http_session().get(url, headers=headers, timeout=TIMEOUT, stream=True)
+    except requests.RequestException as e:
+        return {"url": url, "status": None, "error": str(e)}
+
+    ctype = r.headers.get("Content-Type", "")
+    is_text = any(t in ctype for t in TEXT_TYPES)
+    body: Optional[bytes] = None
+    size = None
+    if r.status_code == 200:
+        if is_text:
+            body = r.content
+            size = len(body)
+        else:
+            size = sum(len(chunk) for chunk in r.iter_content(64 * 1024))
+    r.close()
+
+    if r.status_code == 304 and cached:
+        size = cached.get("size")
+    return {
+        "url": url,
+        "status": r.status_code,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "size": size,
+        "content_type": ctype,
+        "content_encoding": r.headers.get("Content-Encoding") or (cached or {}).get("content_encoding"),
+        "cache_control": r.headers.get("Cache-Control") or (cached or {}).get("cache_control"),
+        "etag": r.headers.get("ETag") or (cached or {}).get("etag"),
+        "last_modified": r.headers.get("Last-Modified") or (cached or {}).get("last_modified"),
+        "_body": body.decode("utf-8", "replace") if body is not None else None,
+    }
+
+
+def _refs_in(url: str, text: str) -> Set[str]:
+    found = set(REF_RE.findall(text)) | set(CSS_URL_RE.findall(text))
+    if url.endswith((".js", ".mjs", ".css")):
+        found |= set(CHUNK_RE.findall(text))
+    out = set()
+    for ref in found:
+        if ref.startswith(("data:", "mailto:", "tel:", "javascript:")):
+            continue
+        # Vite emits chunk imports relative to the chunk (./X.js) or the base (assets/X.js).
+        absolute = urljoin(BASE if ref.startswith("assets/") else url, ref)
+        if _same_site(absolute) and urlsplit(absolute).path.rstrip("/") != urlsplit(BASE).path.rstrip("/"):
+            out.add(absolute.split("#")[0])
+    return out
+
+
+def entry_assets() -> List[str]:
+    """What a first visit downloads: index.html's JS/CSS plus the chunks they import."""
+    entry = _refs_in(BASE, _index_html())
+    out = set(entry)
+    for url in entry:
+        if url.endswith((".js", ".mjs", ".css")):
+            r = http_session().get(url, timeout=TIMEOUT)
+            if r.status_code == 200:
+                out |= {u for u in _refs_in(url, r.text) if u.endswith((".js", ".mjs", ".css"))}
+    return sorted(out)
+
+
+def check_assets(workers: int = WORKERS) -> Dict[str, Any]:
+    cache = _load_cache()
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = {u for u in _refs_in(BASE, _index_html())} | set(_public_urls())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Waves: each wave may reveal more chunks (dynamic imports, CSS urls).
+        while pending:
+            wave = sorted(pending - results.keys())
+            pending = set()
+            for res in pool.map(lambda u: fetch(u, cache.get(u)), wave):
+                body = res.pop("_body")
+                url = res["url"]
+                if body:
+                    res["refs"] = sorted(_refs_in(url, body))
+                elif res["status"] == 304:
+                    # Unchanged chunk: its references are unchanged too.
+                    res["refs"] = (cache.get(url) or {}).get("refs") or []
+                results[url] = res
+                pending |= set(res.get("refs") or [])
+            pending -= results.keys()
+
+    broken, uncompressed, regressions = [], [], []
+    for url, r in results.items():
+        if r["status"] is None or r["status"] >= 400:
+            broken.append({"url": url, "status": r["status"], "error": r.get("error")})
+            continue
+        is_text = any(t in (r["content_type"] or "") for t in TEXT_TYPES)
+        if is_text and (r["size"] or 0) >= COMPRESS_MIN_BYTES and not r["content_encoding"]:
+            uncompressed.append(url)
+        prev = (cache.get(url) or {}).get("size")
+        if prev and r["size"] and r["size"] - prev > max(SIZE_REGRESSION_MIN_BYTES, prev * SIZE_REGRESSION_RATIO):
+            regressions.append({"url": url, "before": prev, "after": r["size"]})
+
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    save_json(
+        CACHE_FILE,
+        {
+            url: {k: r.get(k) for k in ("etag", "last_modified", "size", "content_encoding", "cache_control", "refs")}
+            for url, r in results.items()
+            if r["status"] in (200, 304)
+        },
+    )
+
+    statuses: Dict[str, int] = {}
+    for r in results.values():
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    return {
+        "base": BASE,
+        "asset_count": len(results),
+        "wall_s": round(time.perf_counter() - started, 3),
+        "statuses": statuses,
+        "not_modified": statuses.get("304", 0),
+        "total_bytes": sum(r["size"] or 0 for r in results.values()),
+        "broken": broken,
+        "uncompressed_text_assets": uncompressed,
+        "size_regressions": regressions,
+        "assets": sorted(results.values(), key=lambda r: r["url"]),
+    }
+
+
+async def run(context, evidence_root: Path) -> int:
+    import asyncio
+
+    report = await asyncio.to_thread(check_assets)
+    save_json(evidence_root / "assets_report.json", report)
+    summary = {
+        "base": BASE,
+        "check": CHECK,
+        "evidence_dir": str(evidence_root),
+        "assertions": {
+            "no_broken_assets": not report["broken"],
+            "no_size_regressions": not report["size_regressions"],
+        },
+        "assets": {k: v for k, v in report.items() if k not in ("assets", "base")},
+        "ts": time.time(),
+    }
+    save_json(evidence_root / "console_summary.json", summary)
+    # Compression and size findings are warnings; only broken assets fail.
+    return 2 if report["broken"] else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Bulk asset integrity check.")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    args = ap.parse_args()
+    from harness import ensure_target
+
+    ensure_target()
+    report = check_assets(args.workers)
+    print(json.dumps({k: v for k, v in report.items() if k != "assets"}, ensure_ascii=False, indent=2))
+    return 2 if report["broken"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Self-benchmark of the harness: how long its own primitives take.
+
+Each primitive is timed over `--warmup` discarded trials followed by
+`--trials` measured ones (the checks use `--check-trials`, they are slower):
+
+- `browser.launch`: cold `chromium.launch()` (no daemon);
+- `context.new`: `harness.new_context()` on a running browser;
+- `goto.local` / `goto.live`: `goto_ready()` on the `dist/` preview and on
+  GitHub Pages (a fresh page each trial, the context stays warm);
+- `screenshot.png`: full-page PNG of the loaded home page;
+- `evidence.save_json`: `save_json()` of a check-sized summary;
+- `init.sh`: `YIYU_INIT_SMOKE=0 ./init.sh` on an already set-up env;
+- `check.<name>`: every `run_p0_ix_*` check (Python, scenario spec or Node) through
+  `run_all.run_check`, i.e. with context setup and evidence writing.
+
+Reported per primitive: median, p95 (nearest rank), min, max and failed
+trials. Failed trials are left out of the timings; a primitive with no
+successful trial has no median.
+
+Runs are stored per commit and host in `results.db` (see results_store.py)
+and the medians are compared with the latest run from another commit on the
+same host (or `--baseline <commit>`). A median more than
+`YIYU_BENCH_THRESHOLD_PCT` (default 20) and `YIYU_BENCH_MIN_MS` (default 5)
+above the baseline is a regression: exit code 2, like a failed assertion.
+So is a primitive that had a baseline median and now has none (every trial
+failed).
+
+Usage:
+  python bench.py
+  python bench.py --trials 10 --only 'goto.*' --only screenshot.png
+  python bench.py --skip 'check.*' --skip init.sh --baseline 0f8f1c5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from harness import (
+    DIST_DIR,
+    EVIDENCE_DIR,
+    HERE,
+    LOCAL_PORT,
+    PAGES_BASE,
+    SITE_PATH,
+    close_context,
+    new_context,
+    port_open,
+    save_json,
+    ts_dir,
+)
+from tracing import percentile
+from waits import WaitLog, goto_ready
+
+THRESHOLD_PCT = float(os.environ.get("YIYU_BENCH_THRESHOLD_PCT", "20"))
+MIN_MS = float(os.environ.get("YIYU_BENCH_MIN_MS", "5"))
+LOCAL_URL = f"http://127.0.0.1:{LOCAL_PORT}{SITE_PATH}"
+
+# Primitives that do not need the shared browser/context.
+BROWSERLESS = {"browser.launch", "evidence.save_json", "init.sh"}
+
+Trial = Callable[[], Awaitable[float]]
+
+
+def stats(samples: List[float], failures: int, error: Optional[str]) -> Dict[str, Any]:
+    xs = sorted(samples)
+    out: Dict[str, Any] = {"trials": len(xs), "failures": failures}
+    if xs:
+        out.update(
+            median_ms=round(percentile(xs, 50), 2),
+            p95_ms=round(percentile(xs, 95), 2),
+            min_ms=round(xs[0], 2),
+            max_ms=round(xs[-1], 2),
+        )
+    if error:
+        out["error"] = error
+    return out
+
+
+def evidence_payload() -> Dict[str, Any]:
+    """Roughly the size and shape of a scenario check's console_summary.json."""
+    return {
+        "check": "bench",
+        "assertions": {f"assertion_{i}": i % 7 != 0 for i in range(40)},
+        "console": {
+            "error_count": 3,
+            "errors_sample": ["TypeError: Cannot read properties of undefined (reading 'id') 顾源源"] * 10,
+        },
+        "steps": [
+            {"step": i, "action": "click", "target": f"button:has-text('下一步 {i}')", "ms": 12.5 + i, "ok": True}
+            for i in range(200)
+        ],
+        "waits": {"entries": [{"name": f"app_ready:{i}", "ms": 40.0 + i} for i in range(100)]},
+    }
+
+
+class Bench:
+    def __init__(self, p, tmp: Path) -> None:
+        self.p = p
+        self.tmp = tmp
+        self.browser = None
+        self.context = None
+        self.shot_page = None
+
+    async def setup(self, need_browser: bool) -> None:
+        if need_browser:
+            self.browser = await self.p.chromium.launch(headless=True)
+            self.context = await new_context(self.browser)
+
+    async def close(self) -> None:
+        if self.context is not None:
+            await close_context(self.context)
+        if self.browser is not None:
+            await self.browser.close()
+
+    async def browser_launch(self) -> float:
+        t0 = time.perf_counter()
+        browser = await self.p.chromium.launch(headless=True)
+        ms = (time.perf_counter() - t0) * 1000
+        await browser.close()
+        return ms
+
+    async def context_new(self) -> float:
+        t0 = time.perf_counter()
+        context = await new_context(self.browser)
+        ms = (time.perf_counter() - t0) * 1000
+        await close_context(context)
+        return ms
+
+    def goto(self, url: str) -> Trial:
+        async def trial() -> float:
+            page = await self.context.new_page()
+            try:
+                t0 = time.perf_counter()
+                await goto_ready(page, url, WaitLog())
+                return (time.perf_counter() - t0) * 1000
+            finally:
+                await page.close()
+
+        return trial
+
+    async def screenshot(self) -> float:
+        if self.shot_page is None:
+            self.shot_page = await self.context.new_page()
+            await goto_ready(self.shot_page, LOCAL_URL if port_open(LOCAL_PORT) else PAGES_BASE, WaitLog())
+        t0 = time.perf_counter()
+        await self.shot_page.screenshot(full_page=True)
+        return (time.perf_counter() - t0) * 1000
+
+    async def save_json(self) -> float:
+        payload = evidence_payload()
+        t0 = time.perf_counter()
+        save_json(self.tmp / "console_summary.json", payload)
+        return (time.perf_counter() - t0) * 1000
+
+    async def init_sh(self) -> float:
+        env = {**os.environ, "YIYU_INIT_SMOKE": "0"}
+        t0 = time.perf_counter()
+        proc = await asyncio.to_thread(
+            subprocess.run, ["bash", str(HERE / "init.sh")], cwd=HERE, env=env, capture_output=True, text=True
+        )
+        ms = (time.perf_counter() - t0) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"init.sh exit {proc.returncode}: {(proc.stderr or proc.stdout)[-300:]}")
+        return ms
+
+    def check(self, name: str, timeout: float) -> Trial:
+        from run_all import run_check
+
+        async def trial() -> float:
+            run_root = self.tmp / "runs" / ts_dir()
+            run_root.mkdir(parents=True)
+            try:
+                res = await run_check(self.browser, name, run_root, asyncio.Semaphore(1), timeout)
+            finally:
+                shutil.rmtree(run_root, ignore_errors=True)
+            if res["exit_code"] != 0:
+                raise RuntimeError(f"exit {res['exit_code']}: {(res['error'] or '')[-300:]}")
+            return res["duration_s"] * 1000
+
+        return trial
+
+
+def plan(bench: Bench, targets: List[str], timeout: float) -> Dict[str, Trial]:
+    """Every primitive, in run order; checks last."""
+    from run_all import discover_checks
+
+    trials: Dict[str, Trial] = {
+        "browser.launch": bench.browser_launch,
+        "context.new": bench.context_new,
+    }
+    if "local" in targets:
+        trials["goto.local"] = bench.goto(LOCAL_URL)
+    if "live" in targets:
+        trials["goto.live"] = bench.goto(PAGES_BASE)
+    trials["screenshot.png"] = bench.screenshot
+    trials["evidence.save_json"] = bench.save_json
+    trials["init.sh"] = bench.init_sh
+    for name in discover_checks():
+        if name.startswith("run_p0_ix_"):
+            trials[f"check.{name}"] = bench.check(name, timeout)
+    return trials
+
+
+def selected(name: str, only: List[str], skip: List[str]) -> bool:
+    if only and not any(fnmatch.fnmatch(name, pat) for pat in only):
+        return False
+    return not any(fnmatch.fnmatch(name, pat) for pat in skip)
+
+
+async def measure(trial: Trial, warmup: int, trials: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    failures = 0
+    error = None
+    for i in range(warmup + trials):
+        try:
+            ms = await trial()
+        except Exception as e:
+            if i >= warmup:
+                failures += 1
+            error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            continue
+        if i >= warmup:
+            samples.append(ms)
+    return stats(samples, failures, error)
+
+
+def regressions(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, float], threshold_pct: float, min_ms: float
+) -> List[Dict[str, Any]]:
+    out = []
+    for name, r in results.items():
+        before = baseline.get(name)
+        now = r.get("median_ms")
+        if before is None:
+            continue
+        if now is None:
+            # Broken outright is the worst slowdown there is.
+            out.append({"name": name, "baseline_ms": before, "median_ms": None, "pct": None, "error": r.get("error")})
+        elif now > before * (1 + threshold_pct / 100) and now - before > min_ms:
+            out.append({"name": name, "baseline_ms": before, "median_ms": now, "pct": round(100 * (now / before - 1), 1)})
+    return out
+
+
+async def run_bench(args: argparse.Namespace, tmp: Path) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    async with async_playwright() as p:
+        bench = Bench(p, tmp)
+        trials = {n: t for n, t in plan(bench, args.targets, args.timeout).items() if selected(n, args.only, args.skip)}
+        try:
+            try:
+                await bench.setup(need_browser=any(n not in BROWSERLESS for n in trials))
+            except Exception as e:
+                # No browser: report the browser primitives as failed, still time the rest.
+                error = f"{type(e).__name__}: {str(e).splitlines()[0]}"
+                for name in [n for n in trials if n not in BROWSERLESS]:
+                    results[name] = stats([], 0, error)
+                    del trials[name]
+            for name in trials:
+                is_check = name.startswith("check.")
+                r = await measure(trials[name], args.warmup, args.check_trials if is_check else args.trials)
+                results[name] = r
+                print(
+                    f"[bench] {name}: median={r.get('median_ms')} p95={r.get('p95_ms')} failures={r['failures']}",
+                    file=sys.stderr,
+                    flush=True,
+                )
+        finally:
+            await bench.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--warmup", type=int, default=1, help="discarded trials per primitive")
+    ap.add_argument("--trials", type=int, default=5)
+    ap.add_argument("--check-trials", type=int, default=3, help="measured trials per run_p0_ix_* check")
+    ap.add_argument("--targets", type=lambda s: [t for t in s.split(",") if t], default=["local", "live"])
+    ap.add_argument("--only", action="append", default=[], help="glob of primitives to run (repeatable)")
+    ap.add_argument("--skip", action="append", default=[], help="glob of primitives to skip (repeatable)")
+    ap.add_argument("--timeout", type=float, default=300, help="per-check timeout in seconds")
+    ap.add_argument("--baseline", help="compare with this commit's latest run instead of the previous commit's")
+    ap.add_argument("--threshold-pct", type=float, default=THRESHOLD_PCT)
+    ap.add_argument("--no-store", action="store_true", help="do not record this run in results.db")
+    args = ap.parse_args(argv)
+
+    from results_store import bench_baseline, connect, git_commit, record_bench
+
+    server = None
+    if "local" in args.targets and not port_open(LOCAL_PORT):
+        if DIST_DIR.is_dir():
+            from serve_dist import start_background
+
+            server = start_background(LOCAL_PORT, DIST_DIR)
+        else:
+            print(f"[bench] no {DIST_DIR}, skipping goto.local", file=sys.stderr)
+            args.targets = [t for t in args.targets if t != "local"]
+
+    tmp = Path(tempfile.mkdtemp(prefix="yiyu-bench-"))
+    try:
+        results = asyncio.run(run_bench(args, tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if server is not None:
+            server.shutdown()
+
+    commit = git_commit()
+    host = platform.node()
+    with closing(connect()) as conn:
+        base_commit, baseline = bench_baseline(conn, host, args.baseline, exclude_commit=commit)
+    regressed = regressions(results, baseline, args.threshold_pct, MIN_MS)
+    report: Dict[str, Any] = {
+        "ts": time.time(),
+        "git_commit": commit,
+        "host": host,
+        "warmup": args.warmup,
+        "trials": args.trials,
+        "check_trials": args.check_trials,
+        "results": results,
+        "baseline_commit": base_commit,
+        "threshold_pct": args.threshold_pct,
+        "regressions": regressed,
+    }
+    if not args.no_store:
+        report["bench_run_id"] = record_bench(report)
+    run_root = EVIDENCE_DIR / ts_dir()
+    run_root.mkdir(parents=True, exist_ok=True)
+    save_json(run_root / "bench_report.json", report)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 2 if regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Warm browser daemon shared across `run_one_cycle.sh` invocations.
+
+Keeps a Playwright browser server (`playwright launch-server`) alive in the
+background so cycles `connect()` to it instead of cold-starting Chromium.
+State lives in `.cache/browser_daemon.json`; `harness.launch_browser()` picks it
+up automatically (or `YIYU_BROWSER_WS=<ws-endpoint>` to point elsewhere,
+`YIYU_BROWSER_WS=off` to always launch).
+
+Also computes the environment fingerprint `init.sh` uses to skip pip/browser
+setup when nothing changed (Python version, package versions, browser build).
+
+Usage:
+  python browser_daemon.py start|stop|status
+  python browser_daemon.py fingerprint
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HERE = Path(__file__).resolve().parent
+CACHE_DIR = HERE / ".cache"
+STATE_FILE = CACHE_DIR / "browser_daemon.json"
+LOG_FILE = CACHE_DIR / "browser_daemon.log"
+WS_PATH = "yiyu-browser"
+FINGERPRINT_PACKAGES = ["playwright", "requests", "numpy", "pillow"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _port_open(port: int) -> bool:
+    with socket.socket() as s:
+        s.settimeout(0.2)
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def read_state() -> Optional[Dict[str, Any]]:
+    """The running daemon's state, or None if it is gone/stale."""
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if not _pid_alive(state.get("pid", -1)) or not _port_open(state.get("port", 0)):
+        return None
+    return state
+
+
+def ws_endpoint() -> Optional[str]:
+    env = os.environ.get("YIYU_BROWSER_WS")
+    if env:
+        return None if env == "off" else env
+    state = read_state()
+    return state["ws_endpoint"] if state else None
+
+
+def _browser_build() -> Dict[str, Any]:
+    """Expected Chromium revision of the installed playwright + what's on disk."""
+    spec = importlib.util.find_spec("playwright")
+    if spec is None or spec.origin is None:
+        return {}
+    browsers_json = Path(spec.origin).parent / "driver" / "package" / "browsers.json"
+    try:
+        browsers = json.loads(browsers_json.read_text(encoding="utf-8"))["browsers"]
+        revision = next(b["revision"] for b in browsers if b["name"] == "chromium")
+    except Exception:
+        revision = None
+    cache = Path(
+        os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+        or (Path.home() / ("Library/Caches" if sys.platform == "darwin" else ".cache") / "ms-playwright")
+    )
+    installed = sorted(p.name for p in cache.glob("chromium*")) if cache.is_dir() else []
+    return {"chromium_revision": revision, "installed": installed}
+
+
+def fingerprint() -> str:
+    versions = {}
+    for name in FINGERPRINT_PACKAGES:
+        try:
+            versions[name] = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            versions[name] = None
+    payload = {"python": sys.version, "packages": versions, "browser": _browser_build()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def start(timeout_s: float = 30.0) -> Dict[str, Any]:
+    state = read_state()
+    if state and state.get("fingerprint") == fingerprint():
+        return state
+    if state:
+        stop()
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    port = _free_port()
+    config = CACHE_DIR / "browser_server_config.json"
+    config.write_text(json.dumps({"headless": True, "port": port, "wsPath": WS_PATH}), encoding="utf-8")
+
+    with LOG_FILE.open("ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "playwright", "launch-server", "--browser", "chromium", "--config", str(config)],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout_s
+    while not _port_open(port):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError(f"browser server failed to start, see {LOG_FILE}")
+        time.sleep(0.05)
+
+    state = {
+        "pid": proc.pid,
+        "port": port,
+        "ws_endpoint": f"ws://127.0.0.1:{port}/{WS_PATH}",
+        "fingerprint": fingerprint(),
+        "started_at": time.time(),
+    }
+    STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    return state
+
+
+def stop() -> bool:
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return False
+    STATE_FILE.unlink(missing_ok=True)
+    pid = state.get("pid", -1)
+    if not _pid_alive(pid):
+        return False
+    os.killpg(pid, signal.SIGTERM)
+    return True
+
+
+def main(argv: list[str]) -> int:
+    cmd = argv[0] if argv else "status"
+    if cmd == "start":
+        print(json.dumps(start(), indent=2))
+    elif cmd == "stop":
+        print("stopped" if stop() else "not running")
+    elif cmd == "status":
+        state = read_state()
+        print(json.dumps(state, indent=2) if state else "not running")
+        return 0 if state else 1
+    elif cmd == "fingerprint":
+        print(fingerprint())
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
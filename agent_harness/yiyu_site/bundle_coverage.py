@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Per-route JS/CSS coverage of the shipped bundle (CDP Profiler + CSS).
+
+`check_site.py` runs this when `YIYU_COVERAGE=1` (or `--coverage`): each
+public route is loaded in a fresh page with V8 precise block coverage and
+CSS rule-usage tracking on, and every same-origin script / stylesheet gets
+used vs total bytes. Routes are then merged per chunk (union of used byte
+ranges), so "unused" means unused on every visited route.
+
+With source maps the chunks are split further into modules (npm package, or
+`src/...` file), which is where `pdfjs-dist`, the Supabase client or
+`StrategyCompanionPage.tsx` show up. Maps are off in the deployed build;
+`YIYU_SOURCEMAP=1 npm run build` emits hidden ones (`build.sourcemap` in
+vite.config.ts) for the local preview. Without them the report stays at
+chunk level.
+
+Flags:
+
+- `eager_unused`: chunks/modules loaded on every visited route whose used
+  share stays below `EAGER_UNUSED_PCT` (loaded eagerly, practically never
+  executed: code-splitting candidates);
+- regression: total unused bytes grew more than `YIYU_COVERAGE_GROWTH_PCT`
+  (default 5) over the accepted baseline for the same base and set of
+  visited routes (`.cache/coverage_baseline.json`); a warning or a failure
+  per the `perf_budgets` mode.
+
+Baselines are pinned, not rolled forward, so slow growth below the threshold
+per run still adds up to a regression. The first clean run (no route
+errors) for a base + route set records one; after an intended change,
+`accept` a run's report to move it. Runs with route errors never record.
+
+Usage:
+  python bundle_coverage.py show
+  python bundle_coverage.py accept <run_id>       # coverage.json from the evidence store
+  python bundle_coverage.py accept evidence/<run>/check_site/coverage.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext
+
+from harness import BASE, EVIDENCE_DIR, HERE, page_url
+from tracing import span
+from waits import WaitLog, goto_ready
+
+BASELINE_FILE = HERE / ".cache" / "coverage_baseline.json"
+SMOKE_CHECK = "check_site"
+PUBLIC_ROUTES = ["home", "insights", "library", "report-library", "article-center", "about", "consult-apply"]
+EAGER_UNUSED_PCT = 5.0
+GROWTH_PCT = float(os.environ.get("YIYU_COVERAGE_GROWTH_PCT", "5"))
+TOP_N = 15
+
+Ranges = List[Tuple[int, int]]
+
+B64 = {c: i for i, c in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")}
+
+
+def enabled() -> bool:
+    return os.environ.get("YIYU_COVERAGE", "0") == "1"
+
+
+def routes() -> List[str]:
+    raw = os.environ.get("YIYU_COVERAGE_ROUTES")
+    return [r for r in raw.split(",") if r] if raw else PUBLIC_ROUTES
+
+
+# -- byte ranges -------------------------------------------------------------
+
+
+def merge(ranges: Ranges) -> Ranges:
+    out: Ranges = []
+    for s, e in sorted(ranges):
+        if out and s <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        elif e > s:
+            out.append((s, e))
+    return out
+
+
+def size(ranges: Ranges) -> int:
+    return sum(e - s for s, e in ranges)
+
+
+def js_used_ranges(functions: List[Dict[str, Any]]) -> Tuple[Ranges, int]:
+    """Disjoint executed ranges from V8 block coverage (innermost range wins), and the script length."""
+    spans = sorted(
+        ((r["startOffset"], r["endOffset"], r["count"]) for fn in functions for r in fn["ranges"]),
+        key=lambda r: (r[0], -r[1]),
+    )
+    used: Ranges = []
+    stack: List[Tuple[int, int]] = []  # (end, count)
+    pos = 0
+
+    def flush(to: int) -> None:
+        nonlocal pos
+        if to > pos:
+            if stack and stack[-1][1] > 0:
+                used.append((pos, to))
+            pos = to
+
+    for start, end, count in spans:
+        while stack and stack[-1][0] <= start:
+            flush(stack[-1][0])
+            stack.pop()
+        flush(start)
+        stack.append((end, count))
+    while stack:
+        flush(stack[-1][0])
+        stack.pop()
+    return merge(used), max((s[1] for s in spans), default=0)
+
+
+# -- source maps -------------------------------------------------------------
+
+
+def _vlq(segment: str) -> List[int]:
+    values, shift, acc = [], 0, 0
+    for ch in segment:
+        digit = B64[ch]
+        acc += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+            continue
+        values.append(-(acc >> 1) if acc & 1 else acc >> 1)
+        shift = acc = 0
+    return values
+
+
+def module_of(source: str) -> str:
+    """`../node_modules/@supabase/x/dist/a.js` -> `@supabase/x`; `../../src/App.tsx` -> `src/App.tsx`."""
+    if "node_modules/" in source:
+        parts = source.rsplit("node_modules/", 1)[1].split("/")
+        return "/".join(parts[:2]) if parts[0].startswith("@") else parts[0]
+    return re.sub(r"^(?:\.\./|\./|/)+", "", source)
+
+
+def segments(text: str, smap: Dict[str, Any]) -> Tuple[List[int], List[str]]:
+    """Generated offsets where a mapped segment starts, and the module each segment belongs to."""
+    line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+    sources = [module_of(s) for s in smap.get("sources", [])]
+    starts: List[int] = []
+    owners: List[str] = []
+    src = 0
+    for line, groups in enumerate(smap.get("mappings", "").split(";")):
+        if line >= len(line_starts):
+            break
+        col = 0
+        for seg in groups.split(","):
+            if not seg:
+                continue
+            fields = _vlq(seg)
+            col += fields[0]
+            if len(fields) >= 4:
+                src += fields[1]
+                owner = sources[src] if src < len(sources) else "(unmapped)"
+            else:
+                owner = "(unmapped)"
+            starts.append(line_starts[line] + col)
+            owners.append(owner)
+    return starts, owners
+
+
+def by_module(used: Ranges, total: int, starts: List[int], owners: List[str]) -> Dict[str, Dict[str, int]]:
+    out: Dict[str, Dict[str, int]] = {}
+    bounds = starts + [total]
+    j = 0
+    for i, owner in enumerate(owners):
+        s, e = bounds[i], bounds[i + 1]
+        if e <= s:
+            continue
+        m = out.setdefault(owner, {"total": 0, "used": 0})
+        m["total"] += e - s
+        while j < len(used) and used[j][1] <= s:
+            j += 1
+        k = j
+        while k < len(used) and used[k][0] < e:
+            m["used"] += min(e, used[k][1]) - max(s, used[k][0])
+            k += 1
+    return out
+
+
+def _fetch_text(url: str) -> Optional[str]:
+    from assets_check import TIMEOUT, http_session
+
+    try:
+        r = http_session().get(url, timeout=TIMEOUT)
+    except Exception:
+        return None
+    return r.text if r.status_code == 200 else None
+
+
+# -- collection --------------------------------------------------------------
+
+
+def _chunk(url: str) -> Optional[str]:
+    parts, base = urlsplit(url), urlsplit(BASE)
+    if parts.netloc != base.netloc or not parts.path.startswith(base.path):
+        return None
+    return parts.path[len(base.path) :] or "index.html"
+
+
+async def route_coverage(context: BrowserContext, route: str) -> Dict[str, Dict[str, Any]]:
+    """chunk -> {"type", "total", "used" (ranges)} for one route load."""
+    page = await context.new_page()
+    cdp = await context.new_cdp_session(page)
+    sheets: Dict[str, Tuple[str, int]] = {}
+    cdp.on(
+        "CSS.styleSheetAdded",
+        lambda e: sheets.__setitem__(e["header"]["styleSheetId"], (e["header"]["sourceURL"], int(e["header"]["length"]))),
+    )
+    await cdp.send("Profiler.enable")
+    await cdp.send("Profiler.startPreciseCoverage", {"callCount": False, "detailed": True})
+    await cdp.send("DOM.enable")
+    await cdp.send("CSS.enable")
+    await cdp.send("CSS.startRuleUsageTracking")
+    try:
+        waits = WaitLog()
+        await goto_ready(page, BASE if route == "home" else page_url(f"?page={route}"), waits, route=route)
+        await page.wait_for_load_state("load", timeout=60000)
+        js = (await cdp.send("Profiler.takePreciseCoverage"))["result"]
+        css = (await cdp.send("CSS.stopRuleUsageTracking"))["ruleUsage"]
+        await cdp.send("Profiler.stopPreciseCoverage")
+    finally:
+        await cdp.detach()
+        await page.close()
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for script in js:
+        name = _chunk(script["url"]) if script["url"] else None
+        if name is None:
+            continue
+        used, total = js_used_ranges(script["functions"])
+        entry = out.setdefault(name, {"type": "js", "url": script["url"], "total": 0, "used": []})
+        entry["total"] = max(entry["total"], total)
+        entry["used"] = merge(entry["used"] + used)
+    css_used: Dict[str, Ranges] = {}
+    for rule in css:
+        if rule["used"]:
+            css_used.setdefault(rule["styleSheetId"], []).append((int(rule["startOffset"]), int(rule["endOffset"])))
+    for sid, (url, length) in sheets.items():
+        name = _chunk(url) if url else None
+        if name is None:
+            continue
+        entry = out.setdefault(name, {"type": "css", "url": url, "total": 0, "used": []})
+        entry["total"] = max(entry["total"], length)
+        entry["used"] = merge(entry["used"] + css_used.get(sid, []))
+    return out
+
+
+def aggregate(per_route: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Merge routes per chunk (union of used ranges) and, with source maps, per module.
+
+    Blocking (fetches the chunks and their maps); `collect_coverage` runs it in a thread.
+    """
+    chunks: Dict[str, Dict[str, Any]] = {}
+    for route, entries in per_route.items():
+        for name, e in entries.items():
+            c = chunks.setdefault(name, {"type": e["type"], "url": e["url"], "total": 0, "used": [], "routes": []})
+            c["total"] = max(c["total"], e["total"])
+            c["used"] = merge(c["used"] + e["used"])
+            c["routes"].append(route)
+
+    n_routes = len(per_route)
+    modules: Dict[str, Dict[str, Any]] = {}
+    flagged: List[Dict[str, Any]] = []
+    for name, c in chunks.items():
+        c["used_bytes"] = size(c["used"])
+        c["unused_bytes"] = c["total"] - c["used_bytes"]
+        c["used_pct"] = round(100 * c["used_bytes"] / c["total"], 1) if c["total"] else 100.0
+        eager = len(c["routes"]) == n_routes
+        if c["type"] == "js":
+            text = _fetch_text(c["url"])
+            smap_text = _fetch_text(c["url"] + ".map") if text is not None else None
+            if text is not None and smap_text is not None:
+                try:
+                    starts, owners = segments(text, json.loads(smap_text))
+                except (ValueError, KeyError):
+                    starts, owners = [], []
+                for mod, m in by_module(c["used"], c["total"], starts, owners).items():
+                    agg = modules.setdefault(mod, {"total": 0, "used": 0, "chunks": [], "eager": True})
+                    agg["total"] += m["total"]
+                    agg["used"] += m["used"]
+                    agg["chunks"].append(name)
+                    agg["eager"] = agg["eager"] and eager
+        if eager and c["used_pct"] < EAGER_UNUSED_PCT and c["total"]:
+            flagged.append({"chunk": name, "bytes": c["total"], "used_pct": c["used_pct"]})
+        del c["used"]
+
+    for mod, m in modules.items():
+        m["used_pct"] = round(100 * m["used"] / m["total"], 1) if m["total"] else 100.0
+        if m["eager"] and m["used_pct"] < EAGER_UNUSED_PCT:
+            flagged.append({"module": mod, "bytes": m["total"], "used_pct": m["used_pct"]})
+
+    totals = {
+        kind: {
+            "total": sum(c["total"] for c in chunks.values() if c["type"] == kind),
+            "used": sum(c["used_bytes"] for c in chunks.values() if c["type"] == kind),
+        }
+        for kind in ("js", "css")
+    }
+    for t in totals.values():
+        t["unused"] = t["total"] - t["used"]
+    return {
+        "routes": list(per_route),
+        "totals": totals,
+        "unused_bytes": totals["js"]["unused"] + totals["css"]["unused"],
+        "chunks": dict(sorted(chunks.items(), key=lambda kv: -kv[1]["unused_bytes"])),
+        "modules": dict(sorted(modules.items(), key=lambda kv: -(kv[1]["total"] - kv[1]["used"]))[:TOP_N * 4]),
+        "source_maps": bool(modules),
+        "eager_unused": sorted(flagged, key=lambda f: -f["bytes"]),
+    }
+
+
+def baseline_key(base: str, visited: List[str]) -> str:
+    return f"{base} {','.join(sorted(visited))}"
+
+
+def load_baselines(path: Path = BASELINE_FILE) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def accept(report: Dict[str, Any], path: Path = BASELINE_FILE) -> str:
+    """Pin `report`'s unused bytes as the baseline for its base + visited routes; returns the key."""
+    if report.get("errors"):
+        raise ValueError(f"report has route errors: {sorted(report['errors'])}")
+    key = baseline_key(report["base"], report["routes"])
+    baselines = load_baselines(path)
+    baselines[key] = {"unused_bytes": report["unused_bytes"], "ts": time.time()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+    tmp.replace(path)
+    return key
+
+
+def regression(report: Dict[str, Any], path: Path = BASELINE_FILE) -> Optional[str]:
+    """Compare unused bytes with the pinned baseline for this base + route set (pinning the first clean run)."""
+    entry = load_baselines(path).get(baseline_key(report["base"], report["routes"]))
+    if entry is None:
+        if not report["errors"]:
+            accept(report, path)
+        return None
+    before, now = entry["unused_bytes"], report["unused_bytes"]
+    if before and now > before * (1 + GROWTH_PCT / 100):
+        return f"unused_bytes={now} > baseline {before} (+{GROWTH_PCT:g}%)"
+    return None
+
+
+async def collect_coverage(context: BrowserContext) -> Dict[str, Any]:
+    per_route: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    for route in routes():
+        try:
+            with span("coverage.route", route=route):
+                per_route[route] = await route_coverage(context, route)
+        except Exception as e:
+            errors[route] = str(e).splitlines()[0]
+    report = await asyncio.to_thread(aggregate, per_route)
+    report["base"] = BASE
+    report["errors"] = errors
+    report["regression"] = regression(report) if per_route else None
+    return report
+
+
+def load_report(ref: str) -> Dict[str, Any]:
+    """A run's coverage.json: a file path, else `<run_id>` looked up raw then in the evidence store."""
+    path = Path(ref)
+    if not path.is_file():
+        path = EVIDENCE_DIR / ref / SMOKE_CHECK / "coverage.json"
+    if path.is_file():
+        return json.loads(path.read_text(encoding="utf-8"))
+    from evidence_store import manifest_files, read_blob
+
+    info = manifest_files(ref, SMOKE_CHECK).get("coverage.json")
+    if info is None:
+        raise FileNotFoundError(f"no coverage.json for {ref!r}")
+    return json.loads(read_blob(info))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Pinned unused-byte baselines of the bundle coverage check.")
+    ap.add_argument("cmd", choices=["show", "accept"])
+    ap.add_argument("report", nargs="?", help="run id, or path of the coverage.json to accept")
+    args = ap.parse_args(argv)
+    if args.cmd == "show":
+        print(json.dumps(load_baselines(), ensure_ascii=False, indent=2))
+        return 0
+    if args.report is None:
+        ap.error("accept needs a run id or a coverage.json")
+    try:
+        print(json.dumps({"accepted": accept(load_report(args.report))}))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[bundle_coverage] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
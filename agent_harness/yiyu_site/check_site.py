@@ -4,21 +4,41 @@
 """Smoke checks for the deployed Yiyu Think Tank site (SPA).
 
 Uses Playwright to verify rendered UI + surface console/network issues.
+Also captures front-end performance (Navigation Timing, LCP, CLS, long tasks,
+bytes per resource type, JS heap) on every budgeted route and checks it
+against `perf_budgets` in feature_list.json (see perf.py).
+
+With `YIYU_COVERAGE=1` (or `--coverage`) also records per-route JS/CSS
+coverage of the bundle and flags eagerly loaded, unexecuted code and growth
+in unused bytes (see bundle_coverage.py).
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import sys
 import time
 from dataclasses import dataclass
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import BrowserContext
 
-import requests
-from playwright.sync_api import sync_playwright
+from assets_check import http_session
+from bundle_coverage import collect_coverage, enabled as coverage_enabled
+from harness import BASE, ConsoleLog, ensure_target, launch_browser, new_context, page_url, save_json
+from perf import PERF_INIT_JS, collect_metrics, load_budgets, over_budget
+from retry import ATTEMPTS, retry
+from tracing import span, traced
+from waits import WaitLog, goto_ready
 
-BASE = "https://guyuan9300.github.io/yiyu-think-tank-website/"
 NAV_WORDS = ["首页", "前沿洞察", "战略陪伴", "学习中心", "关于我们"]
 
+CHECK = "smoke_check_site"
+TOP_UNUSED = 10
+
 
 @dataclass
 class Result:
@@ -27,63 +47,57 @@ class Result:
     details: str = ""
 
 
+@traced("check.http_entry")
 def check_http_entry() -> Result:
     try:
-        r = requests.get(BASE, timeout=30)
+        r = http_session().get(BASE, timeout=30)
         return Result(r.status_code == 200, "home_http", f"status={r.status_code}")
     except Exception as e:
         return Result(False, "home_http", f"error={e}")
 
 
-def check_dom_and_console() -> Result:
-    console_errors: List[str] = []
-    failed_requests: List[str] = []
+@traced("check.dom_and_console")
+async def check_dom_and_console(context: BrowserContext) -> Result:
+    console = ConsoleLog()
+    waits = WaitLog()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    page = console.attach(await context.new_page())
 
-        page.on(
-            "console",
-            lambda msg: console_errors.append(msg.text) if msg.type == "error" else None,
-        )
-        page.on(
-            "requestfailed",
-            lambda req: failed_requests.append(
-                f"{req.method} {req.url} failure={req.failure}"
-            ),
-        )
-
-        resp = page.goto(BASE, wait_until="networkidle", timeout=60000)
-        status = resp.status if resp else None
+    resp = await goto_ready(page, BASE, waits)
+    status = resp.status if resp else None
 
+    async with waits.timed("nav_words"):
         for w in NAV_WORDS:
-            page.get_by_role("button", name=w, exact=True).first.wait_for(timeout=20000)
-
-        missing = [
-            w for w in NAV_WORDS if page.get_by_role("button", name=w, exact=True).count() == 0
-        ]
-
-        # Check template artifact /vite.svg under the *site base path* (GitHub Pages project site).
-        # Previously we checked the user/organization root (https://guyuan9300.github.io/vite.svg),
-        # which is expected to 404 and produced a false alarm.
-        from urllib.parse import urljoin
-
-        vite_url = urljoin(BASE, "vite.svg")
-        vite_status = None
-        vite_error = None
-        # Playwright's APIRequestContext.get can occasionally flake (e.g. ECONNRESET).
-        # Treat it as a warning and keep the smoke check running.
-        for i in range(3):
-            try:
-                vite = page.request.get(vite_url)
-                vite_status = vite.status
-                break
-            except Exception as e:
-                vite_error = str(e)
-                time.sleep(0.4 * (i + 1))
-
-        browser.close()
+            await page.get_by_role("button", name=w, exact=True).first.wait_for(timeout=20000)
+
+    missing = [
+        w for w in NAV_WORDS if await page.get_by_role("button", name=w, exact=True).count() == 0
+    ]
+
+    # Check template artifact /vite.svg under the *site base path* (GitHub Pages project site).
+    # Previously we checked the user/organization root (https://guyuan9300.github.io/vite.svg),
+    # which is expected to 404 and produced a false alarm.
+    from urllib.parse import urljoin
+
+    vite_url = urljoin(BASE, "vite.svg")
+    vite_status = None
+    vite_error = None
+    vite_attempts = None
+
+    async def fetch_vite() -> int:
+        return (await page.request.get(vite_url)).status
+
+    # Playwright's APIRequestContext.get can occasionally flake (e.g. ECONNRESET).
+    # Retried with backoff (retry.py); a final failure is only a warning and the
+    # smoke check keeps running.
+    with span("vite_svg", url=vite_url):
+        try:
+            vite_status, vite_attempts = await retry(fetch_vite, "vite_svg")
+        except Exception as e:
+            vite_error = str(e)
+            vite_attempts = ATTEMPTS
+
+    await page.close()
 
     details = {
         "status": status,
@@ -91,10 +105,13 @@ def check_dom_and_console() -> Result:
         "vite_svg_url": vite_url,
         "vite_svg_status": vite_status,
         "vite_svg_error": vite_error,
-        "console_error_count": len(console_errors),
-        "failed_request_count": len(failed_requests),
-        "console_errors_sample": console_errors[:5],
-        "failed_requests_sample": failed_requests[:5],
+        "vite_svg_attempts": vite_attempts,
+        "console_error_count": console.error_count,
+        "failed_request_count": console.failed_request_count,
+        "console_errors_sample": console.events.examples("console.error", 5),
+        "failed_requests_sample": console.events.examples("requestfailed", 5),
+        "distinct_events": console.events.ranked(5),
+        "waits": waits.summary(),
     }
 
     if missing:
@@ -107,18 +124,122 @@ def check_dom_and_console() -> Result:
     if vite_status >= 400:
         return Result(True, "warning_vite_svg_404", json.dumps(details, ensure_ascii=False))
 
-    if console_errors:
+    if console.error_count:
         return Result(False, "console_errors", json.dumps(details, ensure_ascii=False))
 
     return Result(True, "dom_ok", json.dumps(details, ensure_ascii=False))
 
 
-def main() -> int:
-    results: List[Result] = [check_http_entry(), check_dom_and_console()]
+def route_url(route: str) -> str:
+    return BASE if route == "home" else page_url(f"?page={route}")
+
+
+@traced("check.perf")
+async def check_perf(context: BrowserContext) -> Result:
+    budgets = load_budgets()
+    routes: Dict[str, Any] = {}
+    violations: Dict[str, List[str]] = {}
+
+    for route, budget in budgets["routes"].items():
+        with span("perf.route", route=route):
+            page = await context.new_page()
+            await page.add_init_script(PERF_INIT_JS)
+            waits = WaitLog()
+            await goto_ready(page, route_url(route), waits, route=route)
+            # Navigation Timing's loadEventEnd is only populated after the load event.
+            with span("wait.load"):
+                await page.wait_for_load_state("load", timeout=60000)
+            metrics = await collect_metrics(page)
+            await page.close()
+
+        routes[route] = metrics
+        over = over_budget(metrics, budget)
+        if over:
+            violations[route] = over
+
+    details = {"mode": budgets["mode"], "routes": routes, "violations": violations}
+    if not violations:
+        return Result(True, "perf_ok", json.dumps(details, ensure_ascii=False))
+    # Same convention as warning_vite_svg_404: warnings keep ok=True.
+    if budgets["mode"] == "fail":
+        return Result(False, "perf_budget_exceeded", json.dumps(details, ensure_ascii=False))
+    return Result(True, "warning_perf_budget", json.dumps(details, ensure_ascii=False))
+
+
+@traced("check.coverage")
+async def check_coverage(context: BrowserContext, evidence_root: Optional[Path] = None) -> Result:
+    report = await collect_coverage(context)
+    if evidence_root is not None:
+        save_json(evidence_root / "coverage.json", report)
+    details = {
+        "routes": report["routes"],
+        "errors": report["errors"],
+        "totals": report["totals"],
+        "unused_bytes": report["unused_bytes"],
+        "source_maps": report["source_maps"],
+        "top_unused_chunks": {
+            name: {k: c[k] for k in ("type", "total", "unused_bytes", "used_pct", "routes")}
+            for name, c in list(report["chunks"].items())[:TOP_UNUSED]
+        },
+        "eager_unused": report["eager_unused"][:TOP_UNUSED],
+        "regression": report["regression"],
+    }
+    if report["errors"] and not report["routes"]:
+        return Result(False, "coverage_error", json.dumps(details, ensure_ascii=False))
+    if not report["regression"]:
+        return Result(True, "coverage_ok", json.dumps(details, ensure_ascii=False))
+    # Gated like perf budgets: a failure only when perf_budgets asks for "fail".
+    if load_budgets()["mode"] == "fail":
+        return Result(False, "coverage_unused_growth", json.dumps(details, ensure_ascii=False))
+    return Result(True, "warning_coverage_unused_growth", json.dumps(details, ensure_ascii=False))
+
+
+async def collect(context: BrowserContext, evidence_root: Optional[Path] = None) -> Dict[str, Any]:
+    http_result, dom_result = await asyncio.gather(
+        asyncio.to_thread(check_http_entry),
+        check_dom_and_console(context),
+    )
+    # Sequential on purpose: concurrent navigations would skew the timings.
+    perf_result = await check_perf(context)
+    results: List[Result] = [http_result, dom_result, perf_result]
+    if coverage_enabled():
+        results.append(await check_coverage(context, evidence_root))
     ok = all(r.ok for r in results)
-    out = {"ok": ok, "base": BASE, "results": [r.__dict__ for r in results]}
+    dom = json.loads(dom_result.details)
+    # Same shape as the scenario engine's per-step retry records (see retry.py).
+    step_attempts = [
+        {"step": "vite_svg", "attempts": dom["vite_svg_attempts"], "ok": dom["vite_svg_status"] is not None}
+    ]
+    return {"ok": ok, "base": BASE, "results": [r.__dict__ for r in results], "step_attempts": step_attempts}
+
+
+async def run(context: BrowserContext, evidence_root: Path) -> int:
+    out = await collect(context, evidence_root)
+    save_json(
+        evidence_root / "console_summary.json",
+        {**out, "check": CHECK, "evidence_dir": str(evidence_root), "ts": time.time()},
+    )
+    return 0 if out["ok"] else 2
+
+
+async def _main() -> Dict[str, Any]:
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+        try:
+            return await collect(await new_context(browser))
+        finally:
+            await browser.close()
+
+
+def main() -> int:
+    if "--coverage" in sys.argv[1:]:
+        os.environ["YIYU_COVERAGE"] = "1"
+    ensure_target()
+    out = asyncio.run(_main())
     print(json.dumps(out, ensure_ascii=False, indent=2))
-    return 0 if ok else 2
+    return 0 if out["ok"] else 2
 
 
 if __name__ == "__main__":
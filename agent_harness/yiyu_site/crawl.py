@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Full-site route crawler.
+
+Seeds every `?page=` route the app accepts (parsed from `ALLOWED_PAGES` in
+src/App.tsx) plus content detail routes (insight articles, cases, the hot topics on the
+home page, the default reports), then walks same-origin in-app links breadth-first through a bounded
+pool of pages in one browser context. URLs are deduplicated after
+normalising the query string (sorted, volatile/tracking params dropped,
+route aliases folded).
+
+Per route it reports render time (DOMContentLoaded -> app ready), console
+errors and failed requests, into `crawl_report.json`.
+
+Usage:
+  python crawl.py [--pool 6] [--max-pages 200]
+  python run_all.py crawl          # as a check in the shared browser
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
+
+from playwright.async_api import BrowserContext, Page
+
+from harness import BASE, HERE, ConsoleLog, page_url, run_standalone, save_json
+from waits import WaitLog, goto_ready
+
+CHECK = "crawl_full_site_routes"
+
+REPO = HERE.parents[1]
+APP_TSX = REPO / "src" / "App.tsx"
+INSIGHTS_JSON = REPO / "src" / "content" / "defaultInsights.json"
+CASES_DIR = REPO / "public" / "images" / "cases"
+HOME_TSX = REPO / "src" / "components" / "HomePage.tsx"
+DATA_SERVICE = REPO / "src" / "lib" / "dataService.ts"
+# Detail routes whose ids live in array literals in the source: (page, file, array head).
+ID_SOURCES = [
+    ("topic", HOME_TSX, r"const hotTopics = \["),
+    ("report", DATA_SERVICE, r"const initDefaultReports = \(\): Report\[\] => \["),
+]
+
+POOL = int(os.environ.get("YIYU_CRAWL_POOL", "6"))
+MAX_PAGES = int(os.environ.get("YIYU_CRAWL_MAX_PAGES", "200"))
+
+SKIP_PAGES = {"404", "test"}
+ROUTE_ALIASES = {"learning": "library"}
+# Params that mark one-off state rather than a different route.
+VOLATILE_PARAMS = {"rid", "submitted", "intro", "from", "debug", "t", "ts"}
+
+LINKS_JS = """
+() => Array.from(document.querySelectorAll('a[href]'), (a) => a.href)
+"""
+
+
+def normalise(url: str) -> Optional[str]:
+    """Canonical form of an in-app URL, or None if it leaves the site."""
+    parts = urlsplit(url)
+    base = urlsplit(BASE)
+    if (parts.scheme, parts.netloc) != (base.scheme, base.netloc) or not parts.path.startswith(base.path):
+        return None
+    if parts.path.rstrip("/") != base.path.rstrip("/"):
+        return None  # static asset / document, not an app route
+    params = {
+        k: v
+        for k, v in parse_qsl(parts.query)
+        if k not in VOLATILE_PARAMS and not k.startswith("utm_")
+    }
+    page = ROUTE_ALIASES.get(params.get("page", "home"), params.get("page", "home"))
+    if page in SKIP_PAGES:
+        return None
+    params.pop("page", None)
+    if page == "home" and not params:
+        return BASE
+    return page_url("?" + urlencode([("page", page)] + sorted(params.items())))
+
+
+def literal_ids(path: Path, head: str) -> List[str]:
+    """Top-level `id: '...'` values of the array literal that starts at `head` in a TS source."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return []
+    m = re.search(head, text)
+    if m is None:
+        return []
+    depth = 0
+    ids: List[str] = []
+    for i in range(m.end() - 1, len(text)):
+        ch = text[i]
+        if ch in "[{(":
+            depth += 1
+        elif ch in "]})":
+            depth -= 1
+            if depth == 0:
+                break
+        elif depth == 2 and text.startswith("id:", i):
+            idm = re.match(r"id:\s*['\"]([^'\"]+)['\"]", text[i:])
+            if idm:
+                ids.append(idm.group(1))
+    return ids
+
+
+def seed_urls() -> List[str]:
+    seeds = [BASE]
+    try:
+        block = re.search(r"ALLOWED_PAGES = new Set\(\[(.*?)\]\)", APP_TSX.read_text(encoding="utf-8"), re.S)
+        pages = re.findall(r"'([\w-]+)'", block.group(1)) if block else []
+    except OSError:
+        pages = []
+    seeds += [page_url(f"?page={p}") for p in pages]
+    try:
+        seeds += [
+            page_url(f"?page=article&id={a['id']}")
+            for a in json.loads(INSIGHTS_JSON.read_text(encoding="utf-8"))
+        ]
+    except (OSError, ValueError):
+        pass
+    seeds += [page_url(f"?page=case&id={p.stem}") for p in sorted(CASES_DIR.glob("*.png"))]
+    # The app navigates to these through onClick handlers, so no <a href> ever names them.
+    for page, path, head in ID_SOURCES:
+        seeds += [page_url(f"?page={page}&id={i}") for i in literal_ids(path, head)]
+    report_id = os.environ.get("YIYU_REPORT_ID", "r_weiaiqianxing_training_20260105")
+    seeds.append(page_url(f"?page=report&id={report_id}"))
+    out = []
+    for s in seeds:
+        n = normalise(s)
+        if n and n not in out:
+            out.append(n)
+    return out
+
+
+class RouteProbe:
+    """Per-page listeners, reset for each visit."""
+
+    def __init__(self, page: Page) -> None:
+        self.console = ConsoleLog()
+        self.console.attach(page)
+
+    def reset(self) -> None:
+        self.console.reset()
+
+
+async def visit(page: Page, probe: RouteProbe, url: str) -> Tuple[Dict[str, Any], List[str]]:
+    probe.reset()
+    waits = WaitLog()
+    route = dict(parse_qsl(urlsplit(url).query)).get("page", "home")
+    started = time.perf_counter()
+    status = None
+    error = None
+    links: List[str] = []
+    try:
+        resp = await goto_ready(page, url, waits, route=route)
+        status = resp.status if resp else None
+        links = await page.evaluate(LINKS_JS)
+    except Exception as e:
+        error = str(e).splitlines()[0]
+    goto_ms = next((w["ms"] for w in waits.entries if w["name"].startswith("goto:")), None)
+    ready_ms = next((w["ms"] for w in waits.entries if w["name"].startswith("app_ready:")), None)
+    return (
+        {
+            "url": url,
+            "status": status,
+            "render_ms": round((time.perf_counter() - started) * 1000, 1),
+            "dcl_ms": goto_ms,
+            "app_ready_ms": ready_ms,
+            "final_url": page.url,
+            "error": error,
+            "console_error_count": probe.console.error_count,
+            "console_errors_sample": probe.console.events.examples("console.error", 5),
+            "failed_request_count": probe.console.failed_request_count,
+            "failed_requests_sample": probe.console.events.examples("requestfailed", 5),
+        },
+        [urljoin(url, link) for link in links],
+    )
+
+
+async def crawl(
+    context: BrowserContext, pool: Optional[int] = None, max_pages: Optional[int] = None
+) -> Dict[str, Any]:
+    pool = pool or POOL
+    max_pages = max_pages or MAX_PAGES
+    queue: asyncio.Queue = asyncio.Queue()
+    seen = set()
+    routes: List[Dict[str, Any]] = []
+
+    def enqueue(url: str, depth: int) -> None:
+        n = normalise(url)
+        if n and n not in seen and len(seen) < max_pages:
+            seen.add(n)
+            queue.put_nowait((n, depth))
+
+    for s in seed_urls():
+        enqueue(s, 0)
+
+    async def worker() -> None:
+        page = await context.new_page()
+        probe = RouteProbe(page)
+        try:
+            while True:
+                url, depth = await queue.get()
+                try:
+                    result, links = await visit(page, probe, url)
+                    result["depth"] = depth
+                    routes.append(result)
+                    for link in links:
+                        enqueue(link, depth + 1)
+                finally:
+                    queue.task_done()
+        finally:
+            await page.close()
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, pool))]
+    await queue.join()
+    for w in workers:
+        w.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    routes.sort(key=lambda r: (r["depth"], r["url"]))
+    return {
+        "base": BASE,
+        "pool": pool,
+        "route_count": len(routes),
+        "wall_s": round(time.perf_counter() - started, 3),
+        "slowest": sorted(routes, key=lambda r: -r["render_ms"])[:5],
+        "routes": routes,
+    }
+
+
+async def run(context: BrowserContext, evidence_root: Path) -> int:
+    report = await crawl(context)
+    save_json(evidence_root / "crawl_report.json", report)
+
+    bad = [
+        r["url"]
+        for r in report["routes"]
+        if r["error"] or r["console_error_count"] or (r["status"] or 0) >= 400
+    ]
+    summary = {
+        "base": BASE,
+        "check": CHECK,
+        "evidence_dir": str(evidence_root),
+        "assertions": {
+            "all_routes_render": not any(r["error"] for r in report["routes"]),
+            "no_console_errors": not any(r["console_error_count"] for r in report["routes"]),
+        },
+        "crawl": {
+            "route_count": report["route_count"],
+            "wall_s": report["wall_s"],
+            "failing_routes": bad,
+        },
+        "ts": time.time(),
+    }
+    save_json(evidence_root / "console_summary.json", summary)
+    return 2 if bad else 0
+
+
+def main() -> int:
+    global POOL, MAX_PAGES
+    ap = argparse.ArgumentParser(description="Crawl every in-app route.")
+    ap.add_argument("--pool", type=int, default=POOL)
+    ap.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    args = ap.parse_args()
+    POOL, MAX_PAGES = args.pool, args.max_pages
+    return run_standalone(run)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
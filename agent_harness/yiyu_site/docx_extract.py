@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Incremental .docx -> text + outline extraction for the document library.
+
+Every `public/docs/**/*.docx` has its `word/document.xml` streamed out of the
+zip through `xml.etree.ElementTree.iterparse`, one paragraph at a time
+(elements are cleared as soon as their paragraph is emitted), so memory stays
+flat whatever the document size. Output per document under
+`.cache/docx_text/` (mirroring the path below `public/docs/`):
+
+- `<name>.txt`: clean text, one paragraph per line, tabs/breaks kept,
+  runs of empty paragraphs collapsed;
+- `<name>.outline.json`: `[{"level", "title", "paragraph"}]` headings.
+
+Headings come from paragraph styles (`heading N` / `Title` / `outlineLvl` in
+`styles.xml`, or a direct `w:outlineLvl`). Documents exported without styles
+(the 为爱黔行 transcripts) fall back to short all-bold paragraphs, levelled
+by font size (centred first at equal size), with speaker turns
+(`00:45 顾源源`) one level below the smallest of those.
+
+`manifest.json` records size, mtime and sha256 per source. A file whose
+size+mtime match is skipped without reading it; one whose bytes hash the same
+only has its stat refreshed. Changed files are extracted across a process
+pool, so a re-run over an unchanged library costs one `stat()` per file.
+
+`search_index.py` indexes the extracted text of every docx that has no
+hand-made `.txt` copy next to it.
+
+Usage:
+  python docx_extract.py [--workers 4] [--force]
+  python docx_extract.py outline public/docs/weiaiqianxing/raw/为爱黔行_战略对齐.docx
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+# Stdlib only: search_index.py runs this inside `npm run build`.
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parents[1]
+DOCS_ROOT = REPO / "public" / "docs"
+OUT_DIR = HERE / ".cache" / "docx_text"
+MANIFEST = "manifest.json"
+FORMAT = 1
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+HEADING_MAX_CHARS = 60
+TURN_RE = re.compile(r"^\d{1,2}:\d{2}(?::\d{2})?\s+\S.{0,30}$")
+HASH_CHUNK = 1 << 20
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def style_levels(zf: zipfile.ZipFile) -> Dict[str, int]:
+    """styleId -> outline level (1-based) for heading-like paragraph styles."""
+    try:
+        stream = zf.open("word/styles.xml")
+    except KeyError:
+        return {}
+    levels: Dict[str, int] = {}
+    with stream:
+        for _, el in iterparse(stream):
+            if el.tag != W + "style":
+                continue
+            sid = el.get(W + "styleId")
+            name_el = el.find(W + "name")
+            name = (name_el.get(W + "val") if name_el is not None else "").lower()
+            lvl_el = el.find(f"{W}pPr/{W}outlineLvl")
+            if lvl_el is not None and (lvl_el.get(W + "val") or "").isdigit():
+                levels[sid] = int(lvl_el.get(W + "val")) + 1
+            elif name == "title":
+                levels[sid] = 1
+            elif name.startswith("heading ") and name[8:].isdigit():
+                levels[sid] = int(name[8:])
+            el.clear()
+    return levels
+
+
+Para = Tuple[str, Optional[int], bool, int, bool]  # (text, styled level, all bold, max font size, centred)
+
+
+def paragraphs(zf: zipfile.ZipFile, levels: Dict[str, int]) -> Iterator[Para]:
+    """Stream `word/document.xml` paragraph by paragraph."""
+    parts: List[str] = []
+    level: Optional[int] = None
+    bold_runs = plain_runs = 0
+    size = 0
+    centred = False
+    run_bold = False
+    with zf.open("word/document.xml") as stream:
+        for event, el in iterparse(stream, events=("start", "end")):
+            tag = el.tag
+            if event == "start":
+                if tag == W + "p":
+                    parts, level, bold_runs, plain_runs, size, centred = [], None, 0, 0, 0, False
+                elif tag == W + "r":
+                    run_bold = False
+                continue
+            if tag == W + "t":
+                parts.append(el.text or "")
+                if (el.text or "").strip():
+                    if run_bold:
+                        bold_runs += 1
+                    else:
+                        plain_runs += 1
+            elif tag == W + "tab":
+                parts.append("\t")
+            elif tag in (W + "br", W + "cr"):
+                parts.append("\n")
+            elif tag == W + "b" and el.get(W + "val") not in ("0", "false"):
+                run_bold = True
+            elif tag == W + "sz" and (el.get(W + "val") or "").isdigit():
+                size = max(size, int(el.get(W + "val")))
+            elif tag == W + "jc":
+                centred = el.get(W + "val") == "center"
+            elif tag == W + "pStyle":
+                level = levels.get(el.get(W + "val") or "", level)
+            elif tag == W + "outlineLvl" and (el.get(W + "val") or "").isdigit():
+                level = int(el.get(W + "val")) + 1
+            elif tag == W + "p":
+                yield "".join(parts), level, bold_runs > 0 and plain_runs == 0, size, centred
+                el.clear()
+
+
+def extract(path: Path) -> Dict[str, Any]:
+    """Text + outline of one docx."""
+    with zipfile.ZipFile(path) as zf:
+        levels = style_levels(zf)
+        lines: List[str] = []
+        candidates: List[Tuple[int, str, Optional[int], int, bool]] = []
+        turns: List[Tuple[int, str]] = []
+        blank = False
+        for text, level, bold, size, centred in paragraphs(zf, levels):
+            text = "\n".join(line.rstrip() for line in text.split("\n")).strip("\n")
+            if not text.strip():
+                if lines and not blank:
+                    lines.append("")
+                blank = True
+                continue
+            blank = False
+            n = len(lines)
+            lines.append(text)
+            title = text.strip()
+            if level is not None or (bold and len(title) <= HEADING_MAX_CHARS):
+                candidates.append((n, title, level, size, centred))
+            elif TURN_RE.match(title):
+                turns.append((n, title))
+
+    if any(c[2] is not None for c in candidates):
+        outline = [{"level": c[2], "title": c[1], "paragraph": c[0]} for c in candidates if c[2] is not None]
+    else:
+        # No heading styles: rank bold-paragraph font sizes, centred ones first at equal size.
+        ranks = sorted({(c[3], c[4]) for c in candidates}, reverse=True)
+        outline = [
+            {"level": ranks.index((c[3], c[4])) + 1, "title": c[1], "paragraph": c[0]} for c in candidates
+        ] + [{"level": len(ranks) + 1, "title": title, "paragraph": n} for n, title in turns]
+        outline.sort(key=lambda h: h["paragraph"])
+    text = "\n".join(lines).strip() + "\n"
+    return {"text": text, "outline": outline, "paragraphs": sum(1 for line in lines if line), "chars": len(text)}
+
+
+def _out_paths(out: Path, rel: str) -> Tuple[Path, Path]:
+    base = out / rel
+    return base.with_suffix(".txt"), base.with_suffix(".outline.json")
+
+
+def _extract_job(src: str, out: str, rel: str, digest: str) -> Dict[str, Any]:
+    result = extract(Path(src))
+    txt, outline = _out_paths(Path(out), rel)
+    txt.parent.mkdir(parents=True, exist_ok=True)
+    txt.write_text(result["text"], encoding="utf-8")
+    outline.write_text(json.dumps(result["outline"], ensure_ascii=False, indent=2), encoding="utf-8")
+    return {"sha256": digest, "paragraphs": result["paragraphs"], "chars": result["chars"], "headings": len(result["outline"])}
+
+
+def load_manifest(out: Path = OUT_DIR) -> Dict[str, Any]:
+    try:
+        data = json.loads((out / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("format") == FORMAT else {}
+
+
+def run_pipeline(root: Path = DOCS_ROOT, out: Path = OUT_DIR, workers: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    started = time.perf_counter()
+    old = {} if force else load_manifest(out)
+    files: Dict[str, Any] = {}
+    todo: List[Tuple[str, Path, str]] = []
+    counts = {"unchanged_stat": 0, "unchanged_hash": 0, "extracted": 0, "failed": 0, "removed": 0}
+
+    for src in sorted(root.rglob("*.docx")):
+        rel = src.relative_to(root).as_posix()
+        st = src.stat()
+        prev = old.get(rel)
+        if prev and "error" in prev:
+            # Failed last time: extract again whatever the stat or hash says.
+            prev = None
+        txt, _ = _out_paths(out, rel)
+        if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns and txt.exists():
+            files[rel] = prev
+            counts["unchanged_stat"] += 1
+            continue
+        digest = sha256_file(src)
+        if prev and prev.get("sha256") == digest and txt.exists():
+            files[rel] = {**prev, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            counts["unchanged_hash"] += 1
+            continue
+        files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        todo.append((rel, src, digest))
+
+    def record(rel: str, get: Callable[[], Dict[str, Any]]) -> None:
+        try:
+            files[rel].update(get())
+            counts["extracted"] += 1
+        except Exception as e:
+            # Corrupt or non-Word zips: keep going, report, retry on the next run. Drop the
+            # previous version's output so nothing downstream (search_index.py) keeps using it.
+            files[rel]["error"] = f"{type(e).__name__}: {e}"
+            for p in _out_paths(out, rel):
+                p.unlink(missing_ok=True)
+            counts["failed"] += 1
+
+    if len(todo) > 1 and (workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(todo), workers or os.cpu_count() or 1)) as pool:
+            jobs = [(rel, pool.submit(_extract_job, str(src), str(out), rel, digest)) for rel, src, digest in todo]
+            for rel, job in jobs:
+                record(rel, job.result)
+    else:
+        # A single changed file is cheaper inline than a pool start-up.
+        for rel, src, digest in todo:
+            record(rel, lambda: _extract_job(str(src), str(out), rel, digest))
+
+    for rel in set(old) - set(files):
+        for p in _out_paths(out, rel):
+            p.unlink(missing_ok=True)
+        counts["removed"] += 1
+
+    out.mkdir(parents=True, exist_ok=True)
+    tmp = out / f"{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps({"format": FORMAT, "files": files}, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(out / MANIFEST)
+    return {"files": len(files), **counts, "wall_s": round(time.perf_counter() - started, 3)}
+
+
+def extracted_text(rel: str, out: Path = OUT_DIR) -> Path:
+    """Where the text of `public/docs/<rel>` lands."""
+    return _out_paths(out, rel)[0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("cmd", nargs="?", default="run", choices=["run", "outline"])
+    ap.add_argument("path", nargs="?", type=Path)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="ignore the manifest and re-extract everything")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "outline":
+        if args.path is None:
+            ap.error("outline needs a .docx path")
+        for h in extract(args.path)["outline"]:
+            print(f"{'  ' * (h['level'] - 1)}{h['title']}  (¶{h['paragraph']})")
+        return 0
+    stats = run_pipeline(workers=args.workers, force=args.force)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
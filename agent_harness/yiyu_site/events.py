@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Bounded, deduplicating collector for page events.
+
+Console errors/warnings, uncaught page errors, failed requests and dialogs are
+reduced to a fingerprint: the message with query strings, Vite content hashes,
+`line:col` positions, UUIDs, hex ids and other numbers normalised away, plus
+the first stack frame / source URL (normalised the same way). Each fingerprint
+is one bucket holding a count, first/last seen time, a few distinct raw
+examples and the checks that hit it, so a page logging in a loop costs one
+counter instead of an ever-growing list, and a rare distinct problem is not
+buried under a repeated one.
+
+Memory is bounded: at most `MAX_BUCKETS` fingerprints per collector (later new
+ones only bump `dropped`), `MAX_EXAMPLES` examples and `MAX_CHECKS` checks
+per bucket. Per-kind totals stay exact.
+
+`harness.ConsoleLog` keeps a collector per check and feeds the process-wide
+`EVENTS`; `run_all.py` merges the shards' collectors and writes the run's
+distinct problems, most frequent first, to `evidence/<run>/events.json` (top
+entries also under `events` in `run_summary.json`).
+
+Usage:
+  python events.py top evidence/<run>/events.json [-n 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Leaf module like tracing.py: harness.py imports it.
+KINDS = ("console.error", "console.warning", "pageerror", "requestfailed", "dialog")
+MAX_BUCKETS = 256
+MAX_EXAMPLES = 3
+MAX_CHECKS = 16
+MAX_TEXT = 500
+
+_NORMALISERS = [
+    (re.compile(r"(https?://[^\s?#'\"()]+)[?#][^\s'\"()]*"), r"\1"),
+    (re.compile(r"([-.])[A-Za-z0-9_]{8,}(?=\.(?:m?js|css)\b)"), r"\1<hash>"),
+    (re.compile(r":\d+:\d+\b"), ":<line>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b(?:0x[0-9a-f]+|[0-9a-f]{12,})\b", re.I), "<hex>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalise(text: str) -> str:
+    out = text[:MAX_TEXT]
+    for pattern, repl in _NORMALISERS:
+        out = pattern.sub(repl, out)
+    return out.strip()
+
+
+def top_frame(stack: Optional[str]) -> Optional[str]:
+    """First `at ...` line of a JS stack, if any."""
+    for line in (stack or "").splitlines():
+        line = line.strip()
+        if line.startswith("at "):
+            return line
+    return None
+
+
+def fingerprint(kind: str, text: str, where: Optional[str] = None) -> tuple[str, str]:
+    """`(fingerprint, normalised message)` for one event; `where` is a source URL or stack frame."""
+    key = normalise(text)
+    site = normalise(where) if where else ""
+    digest = hashlib.sha1(f"{kind}\0{key}\0{site}".encode("utf-8")).hexdigest()[:12]
+    return digest, key
+
+
+@dataclass
+class Bucket:
+    fingerprint: str
+    kind: str
+    message: str
+    where: Optional[str] = None
+    count: int = 0
+    first_ts: float = 0.0
+    last_ts: float = 0.0
+    examples: List[str] = field(default_factory=list)
+    checks: Dict[str, int] = field(default_factory=dict)
+
+    def hit(self, raw: str, check: Optional[str], ts: float, n: int = 1) -> None:
+        self.count += n
+        self.first_ts = min(self.first_ts, ts) if self.first_ts else ts
+        self.last_ts = max(self.last_ts, ts)
+        raw = raw[:MAX_TEXT]
+        if len(self.examples) < MAX_EXAMPLES and raw not in self.examples:
+            self.examples.append(raw)
+        if check and (check in self.checks or len(self.checks) < MAX_CHECKS):
+            self.checks[check] = self.checks.get(check, 0) + n
+
+
+class EventCollector:
+    def __init__(self, max_buckets: int = MAX_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        self.buckets: Dict[str, Bucket] = {}
+        self.totals: Dict[str, int] = {}
+        self.dropped = 0
+
+    def add(
+        self, kind: str, text: str, where: Optional[str] = None, check: Optional[str] = None, n: int = 1
+    ) -> None:
+        """Count `n` occurrences (more than one when folding a pre-counted log, e.g. a Node check's)."""
+        self.totals[kind] = self.totals.get(kind, 0) + n
+        fp, message = fingerprint(kind, text, where)
+        bucket = self.buckets.get(fp)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.dropped += n
+                return
+            bucket = self.buckets[fp] = Bucket(fp, kind, message, normalise(where) if where else None)
+        bucket.hit(text, check, time.time(), n)
+
+    def count(self, kind: str) -> int:
+        return self.totals.get(kind, 0)
+
+    def examples(self, kind: str, n: int) -> List[str]:
+        """Up to `n` raw messages of `kind`, one per fingerprint, most frequent first."""
+        return [b.examples[0] for b in self._ranked() if b.kind == kind][:n]
+
+    def _ranked(self) -> List[Bucket]:
+        return sorted(self.buckets.values(), key=lambda b: (-b.count, b.first_ts))
+
+    def ranked(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [asdict(b) for b in self._ranked()[:n]]
+
+    def reset(self) -> None:
+        self.buckets.clear()
+        self.totals.clear()
+        self.dropped = 0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"totals": dict(self.totals), "dropped": self.dropped, "buckets": self.ranked()}
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Fold another collector's `to_json()` (e.g. a shard's) into this one."""
+        for kind, n in data["totals"].items():
+            self.totals[kind] = self.totals.get(kind, 0) + n
+        self.dropped += data["dropped"]
+        for b in data["buckets"]:
+            mine = self.buckets.get(b["fingerprint"])
+            if mine is None:
+                if len(self.buckets) >= self.max_buckets:
+                    self.dropped += b["count"]
+                    continue
+                mine = self.buckets[b["fingerprint"]] = Bucket(b["fingerprint"], b["kind"], b["message"], b["where"])
+            mine.count += b["count"]
+            mine.first_ts = min(mine.first_ts or b["first_ts"], b["first_ts"])
+            mine.last_ts = max(mine.last_ts, b["last_ts"])
+            for ex in b["examples"]:
+                if len(mine.examples) < MAX_EXAMPLES and ex not in mine.examples:
+                    mine.examples.append(ex)
+            for check, n in b["checks"].items():
+                if check in mine.checks or len(mine.checks) < MAX_CHECKS:
+                    mine.checks[check] = mine.checks.get(check, 0) + n
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        return {
+            "totals": dict(self.totals),
+            "distinct": len(self.buckets),
+            "dropped": self.dropped,
+            "top": [
+                {k: b[k] for k in ("fingerprint", "kind", "count", "message", "checks")} for b in self.ranked(top)
+            ],
+        }
+
+
+EVENTS = EventCollector()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Show a run's most frequent distinct page problems")
+    ap.add_argument("cmd", choices=["top"])
+    ap.add_argument("events", type=Path)
+    ap.add_argument("-n", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    data = json.loads(args.events.read_text(encoding="utf-8"))
+    for b in data["buckets"][: args.n]:
+        checks = ",".join(sorted(b["checks"]))
+        print(f"{b['count']:7d}  {b['kind']:<15}  {b['message'][:100]}  [{checks}]")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Content-addressed, compressed evidence store with retention.
+
+Layout under `evidence/store/`:
+
+- `blobs/<ab>/<sha256>`: one blob per distinct file content (sha256 of the
+  original bytes), so an unchanged page's screenshot is stored once no matter
+  how many cycles capture it. PNGs are re-encoded as lossless WebP (Pillow)
+  and other files compressed with zstd (`zstandard`) or gzip, whichever
+  codecs are installed; the smaller of raw/encoded wins.
+- `manifests/<run_id>/<check>.json`: file name -> blob + codec, one per check.
+
+`gc` evicts whole runs, i.e. a run's manifests together with its raw
+`evidence/<run_id>/` dir (run_summary.json, events.json, traces,
+results.jsonl, console summaries), by age and then oldest-first until the
+blobs still referenced plus the remaining run dirs fit a size cap, and
+sweeps blobs no manifest references any more.
+
+Usage:
+  python evidence_store.py ingest evidence/<run>/<check> --run <run> --check <check>
+  python evidence_store.py restore <run> <check> <dest>
+  python evidence_store.py gc [--max-age-days 14] [--max-mb 2048]
+  python evidence_store.py stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # optional: PNGs are stored as-is without Pillow
+    Image = None
+
+try:
+    import zstandard
+except ImportError:  # optional: falls back to gzip
+    zstandard = None
+
+from harness import EVIDENCE_DIR, save_json
+
+STORE_DIR = EVIDENCE_DIR / "store"
+BLOBS_DIR = STORE_DIR / "blobs"
+MANIFESTS_DIR = STORE_DIR / "manifests"
+
+# Kept as plain files next to the manifest's check dir (small, read by results_store).
+KEEP_RAW = {"console_summary.json"}
+# `harness.ts_dir()` names; anything else under evidence/ (store/, durations.json, ...) is not a run.
+RUN_DIR_RE = re.compile(r"^(\d{8}-\d{6})(?:-[0-9a-f]+)?$")
+
+
+def _encode(name: str, data: bytes) -> Tuple[str, bytes]:
+    if name.lower().endswith(".png") and Image is not None:
+        buf = io.BytesIO()
+        try:
+            Image.open(io.BytesIO(data)).save(buf, "WEBP", lossless=True, quality=100, method=4)
+        except (OSError, ValueError):
+            # WebP caps both sides at 16383 px; tall full-page captures go through the generic codec.
+            pass
+        else:
+            encoded = buf.getvalue()
+            return ("webp-lossless", encoded) if len(encoded) < len(data) else ("raw", data)
+    if zstandard is not None:
+        encoded = zstandard.ZstdCompressor(level=10).compress(data)
+        codec = "zstd"
+    else:
+        encoded = gzip.compress(data, compresslevel=6, mtime=0)
+        codec = "gzip"
+    return (codec, encoded) if len(encoded) < len(data) else ("raw", data)
+
+
+def _decode(codec: str, data: bytes) -> bytes:
+    if codec == "raw":
+        return data
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to restore this blob")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "webp-lossless":
+        if Image is None:
+            raise RuntimeError("Pillow is required to restore this blob")
+        # Pixel-identical PNG; the byte stream may differ from the original encoder's.
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(data)).save(buf, "PNG")
+        return buf.getvalue()
+    raise ValueError(f"unknown codec {codec}")
+
+
+def _blob_path(digest: str) -> Path:
+    return BLOBS_DIR / digest[:2] / digest
+
+
+def put(path: Path) -> Dict[str, Any]:
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    blob = _blob_path(digest)
+    meta = blob.with_suffix(".json")
+    if meta.is_file():
+        info = json.loads(meta.read_text(encoding="utf-8"))
+        return {"sha256": digest, "size": len(data), "codec": info["codec"], "stored": info["stored"], "dedup": True}
+
+    codec, encoded = _encode(path.name, data)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    tmp = blob.with_suffix(".tmp")
+    tmp.write_bytes(encoded)
+    tmp.replace(blob)
+    save_json(meta, {"codec": codec, "stored": len(encoded), "size": len(data)})
+    return {"sha256": digest, "size": len(data), "codec": codec, "stored": len(encoded), "dedup": False}
+
+
+def ingest(check_dir: Path, run_id: str, check: str, keep_raw: bool = False) -> Dict[str, Any]:
+    """Store every file of one check's evidence dir; drop the raw copies unless asked not to.
+
+    Raw files are only removed once every blob and the manifest are written, so
+    a failure leaves the evidence dir untouched.
+    """
+    paths = sorted(p for p in check_dir.rglob("*") if p.is_file())
+    files: Dict[str, Any] = {}
+    for path in paths:
+        files[path.relative_to(check_dir).as_posix()] = put(path)
+    manifest = {"run_id": run_id, "check": check, "created": time.time(), "files": files}
+    out = MANIFESTS_DIR / run_id / f"{check}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    save_json(tmp, manifest)
+    tmp.replace(out)
+    if not keep_raw:
+        for path in paths:
+            if path.relative_to(check_dir).as_posix() not in KEEP_RAW:
+                path.unlink()
+    return {
+        "manifest": str(out),
+        "files": len(files),
+        "bytes": sum(f["size"] for f in files.values()),
+        "new_bytes_stored": sum(f["stored"] for f in files.values() if not f["dedup"]),
+    }
+
+
+def manifest_files(run_id: str, check: str) -> Dict[str, Any]:
+    """file name -> blob info of one check's manifest (empty when it was never ingested)."""
+    try:
+        manifest = json.loads((MANIFESTS_DIR / run_id / f"{check}.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return manifest["files"]
+
+
+def read_blob(info: Dict[str, Any]) -> bytes:
+    return _decode(info["codec"], _blob_path(info["sha256"]).read_bytes())
+
+
+def restore(run_id: str, check: str, dest: Path) -> int:
+    files = json.loads((MANIFESTS_DIR / run_id / f"{check}.json").read_text(encoding="utf-8"))["files"]
+    for rel, info in files.items():
+        target = dest / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(read_blob(info))
+    return len(files)
+
+
+def _manifests() -> List[Tuple[float, Path]]:
+    out = []
+    for p in MANIFESTS_DIR.glob("*/*.json"):
+        try:
+            out.append((json.loads(p.read_text(encoding="utf-8"))["created"], p))
+        except Exception:
+            out.append((p.stat().st_mtime, p))
+    return sorted(out)
+
+
+def _referenced(manifests: List[Path]) -> Dict[str, int]:
+    """sha256 -> stored size for every blob the given manifests reference."""
+    refs: Dict[str, int] = {}
+    for p in manifests:
+        for info in json.loads(p.read_text(encoding="utf-8"))["files"].values():
+            refs[info["sha256"]] = info["stored"]
+    return refs
+
+
+def _run_dirs() -> Dict[str, Path]:
+    if not EVIDENCE_DIR.is_dir():
+        return {}
+    return {d.name: d for d in EVIDENCE_DIR.iterdir() if d.is_dir() and RUN_DIR_RE.match(d.name)}
+
+
+def _dir_bytes(d: Path) -> int:
+    return sum(p.stat().st_size for p in d.rglob("*") if p.is_file())
+
+
+def gc(max_age_days: Optional[float] = None, max_mb: Optional[float] = None) -> Dict[str, Any]:
+    manifests = _manifests()
+    dirs = _run_dirs()
+    by_run: Dict[str, List[Path]] = {}
+    created: Dict[str, float] = {}
+    for ts, p in manifests:
+        by_run.setdefault(p.parent.name, []).append(p)
+        created[p.parent.name] = min(created.get(p.parent.name, ts), ts)
+    for run in dirs:
+        ts = datetime.strptime(RUN_DIR_RE.match(run).group(1), "%Y%m%d-%H%M%S").timestamp()
+        created[run] = min(created.get(run, ts), ts)
+    runs = sorted(created, key=lambda r: (created[r], r))
+
+    evicted: List[str] = []
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        evicted += [r for r in runs if created[r] < cutoff]
+    live = [r for r in runs if r not in evicted]
+
+    if max_mb is not None:
+        raw = {r: _dir_bytes(dirs[r]) for r in live if r in dirs}
+
+        def footprint() -> int:
+            referenced = _referenced([p for r in live for p in by_run.get(r, [])])
+            return sum(referenced.values()) + sum(raw.get(r, 0) for r in live)
+
+        # Drop oldest runs until what the rest references, plus their raw dirs, fits the cap.
+        while live and footprint() > max_mb * 1024 * 1024:
+            evicted.append(live.pop(0))
+
+    freed = 0
+    for run in evicted:
+        for p in by_run.get(run, []):
+            p.unlink(missing_ok=True)
+        if (MANIFESTS_DIR / run).is_dir() and not any((MANIFESTS_DIR / run).iterdir()):
+            (MANIFESTS_DIR / run).rmdir()
+        if run in dirs:
+            freed += _dir_bytes(dirs[run])
+            shutil.rmtree(dirs[run], ignore_errors=True)
+
+    keep = _referenced([p for r in live for p in by_run.get(r, [])])
+    for blob in BLOBS_DIR.glob("*/*"):
+        if blob.suffix or blob.name in keep:
+            continue
+        freed += blob.stat().st_size
+        blob.unlink()
+        blob.with_suffix(".json").unlink(missing_ok=True)
+    return {
+        "runs_evicted": len(evicted),
+        "manifests_evicted": sum(len(by_run.get(r, [])) for r in evicted),
+        "manifests_live": sum(len(by_run.get(r, [])) for r in live),
+        "run_dirs_evicted": sum(1 for r in evicted if r in dirs),
+        "run_dirs_live": sum(1 for r in live if r in dirs),
+        "bytes_freed": freed,
+    }
+
+
+def stats() -> Dict[str, Any]:
+    blobs = [b for b in BLOBS_DIR.glob("*/*") if not b.suffix]
+    manifests = _manifests()
+    logical = 0
+    for _, p in manifests:
+        logical += sum(f["size"] for f in json.loads(p.read_text(encoding="utf-8"))["files"].values())
+    stored = sum(b.stat().st_size for b in blobs)
+    return {
+        "manifests": len(manifests),
+        "blobs": len(blobs),
+        "logical_bytes": logical,
+        "stored_bytes": stored,
+        "ratio": round(logical / stored, 2) if stored else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Content-addressed evidence store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest")
+    p.add_argument("check_dir", type=Path)
+    p.add_argument("--run", required=True)
+    p.add_argument("--check", required=True)
+    p.add_argument("--keep-raw", action="store_true")
+    p = sub.add_parser("restore")
+    p.add_argument("run")
+    p.add_argument("check")
+    p.add_argument("dest", type=Path)
+    p = sub.add_parser("gc")
+    p.add_argument("--max-age-days", type=float)
+    p.add_argument("--max-mb", type=float)
+    sub.add_parser("stats")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ingest":
+        out: Any = ingest(args.check_dir, args.run, args.check, args.keep_raw)
+    elif args.cmd == "restore":
+        out = {"restored": restore(args.run, args.check, args.dest)}
+    elif args.cmd == "gc":
+        out = gc(args.max_age_days, args.max_mb)
+    else:
+        out = stats()
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
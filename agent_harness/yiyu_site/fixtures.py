@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Named storage-state fixtures for privileged checks.
+
+Every app flag the checks seed is read as `localStorage ?? sessionStorage`, so
+a Playwright storage state (cookies + per-origin localStorage) is enough to
+start a context already logged in / admin / subscribed, with no extra
+navigation and no racing against init scripts.
+
+States are built once per run from the specs below and cached on disk under
+`.cache/storage_states/<name>-<hash>.json`, keyed by a content hash of the
+spec and the target origin, so a spec or target change rebuilds them.
+
+Usage:
+  python fixtures.py subscribed   # print the storage-state path
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from harness import BASE, HERE
+
+STATES_DIR = HERE / ".cache" / "storage_states"
+
+SUBSCRIBED_EMAIL = "e2e-seed@example.com"
+
+E2E_USER = {
+    "id": "e2e_user_gold",
+    "name": "E2E Gold",
+    "email": "e2e-gold@example.com",
+    "memberType": "gold",
+    "status": "active",
+}
+
+SUBSCRIPTION_PREFS = {
+    "enabled": True,
+    "email": SUBSCRIBED_EMAIL,
+    "frequency": "weekly",
+    "topics": {"insights": True, "reports": True, "tools": False, "strategyUpdates": True},
+    "formats": {"digest": True, "keyTakeaways": True, "actionChecklist": False},
+    "updatedAt": "2026-01-01T00:00:00.000Z",
+}
+
+# name -> localStorage entries (non-string values are JSON-encoded).
+FIXTURES: Dict[str, Dict[str, Any]] = {
+    "admin": {"yiyu_is_admin": "true"},
+    "user": {"yiyu_current_user": E2E_USER},
+    "subscribed": {"yiyu_is_admin": "true", "yiyu_subscription_prefs": SUBSCRIPTION_PREFS},
+}
+
+_built: Dict[str, Path] = {}
+
+
+def _origin(base: str) -> str:
+    parts = urlsplit(base)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def build_state(name: str, base: str = BASE) -> Dict[str, Any]:
+    entries = FIXTURES[name]
+    return {
+        "cookies": [],
+        "origins": [
+            {
+                "origin": _origin(base),
+                "localStorage": [
+                    {"name": k, "value": v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)}
+                    for k, v in sorted(entries.items())
+                ],
+            }
+        ],
+    }
+
+
+def storage_state_path(name: Optional[str], base: str = BASE) -> Optional[Path]:
+    """Path of the cached storage state for `name` (None passes through)."""
+    if name is None:
+        return None
+    key = f"{name}@{base}"
+    if key in _built:
+        return _built[key]
+
+    state = build_state(name, base)
+    digest = hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    path = STATES_DIR / f"{name}-{digest}.json"
+    if not path.is_file():
+        STATES_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(path)
+    _built[key] = path
+    return path
+
+
+def main(argv: list[str]) -> int:
+    if not argv or argv[0] not in FIXTURES:
+        print(f"usage: fixtures.py {{{','.join(FIXTURES)}}}")
+        return 2
+    print(storage_state_path(argv[0]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Shared plumbing for the Yiyu closed-loop checks.
+
+Every Python check module (`check_site.py`, `scenarios.py`, `crawl.py`, ...) exposes:
+
+- `CHECK`: the check id written into `console_summary.json`
+- `async def run(context, evidence_root) -> int`: the steps, run inside a
+  caller-provided Playwright `BrowserContext`; returns the exit code.
+- optionally `FIXTURE`: a named storage state from `fixtures.py` the context
+  should start in (admin / user / subscribed).
+- optionally `RESOURCES`: `"fast"` to stub images/fonts/media/third parties
+  for checks that assert nothing visual (see `resources.py`).
+
+`run_standalone()` keeps `python <check>.py` working on its own, while
+`run_all.py` drives many checks against one shared browser.
+
+Target selection (the one config surface for every check):
+
+- `YIYU_BASE=<url>`: explicit base URL, wins over everything else.
+- `YIYU_TARGET=local`: serve the built `dist/` (or `YIYU_DIST`) on
+  `127.0.0.1:$YIYU_LOCAL_PORT` (default 4173) via `serve_dist.py`; no network.
+- default: the deployed GitHub Pages site.
+
+The Node checks resolve the same variables through `resolveBase()` in
+waits.mjs (standalone, `YIYU_TARGET=local` needs `python serve_dist.py` up).
+
+`YIYU_PW_TRACE=on-failure` records a Playwright trace (screenshots + DOM
+snapshots) for every context and keeps `playwright-trace.zip` in the evidence
+dir only when the check fails.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import socket
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+
+from events import EVENTS, EventCollector, top_frame
+from tracing import TRACER, current_track, export, span
+
+HERE = Path(__file__).resolve().parent
+EVIDENCE_DIR = HERE / "evidence"
+
+SITE_PATH = "/yiyu-think-tank-website/"
+PAGES_BASE = "https://guyuan9300.github.io" + SITE_PATH
+
+TARGET = os.environ.get("YIYU_TARGET", "pages")
+LOCAL_PORT = int(os.environ.get("YIYU_LOCAL_PORT", "4173"))
+DIST_DIR = Path(os.environ.get("YIYU_DIST", HERE.parents[1] / "dist"))
+
+
+def resolve_base() -> str:
+    if os.environ.get("YIYU_BASE"):
+        return os.environ["YIYU_BASE"]
+    if TARGET == "local":
+        return f"http://127.0.0.1:{LOCAL_PORT}{SITE_PATH}"
+    return PAGES_BASE
+
+
+BASE = resolve_base()
+VIEWPORT = {"width": 1280, "height": 720}
+
+CheckFn = Callable[[BrowserContext, Path], Awaitable[int]]
+
+PW_TRACE_FILE = "playwright-trace.zip"
+
+
+def ts_dir() -> str:
+    """Unique run id: timestamp + random suffix, so runs started in the same second never share a dir."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def save_json(p: Path, obj: Any):
+    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def page_url(query: str = "") -> str:
+    """`page_url("?page=about")` -> `<BASE>/?page=about`."""
+    return BASE.rstrip("/") + "/" + query
+
+
+class ConsoleLog:
+    """Collects console messages, page errors, failed requests and dialogs from every page it is attached to.
+
+    Events are fingerprinted and counted in bounded buckets (events.py), both
+    per log and in the run-wide `EVENTS`, so a page logging in a loop cannot
+    grow memory. Only console errors affect exit codes.
+    """
+
+    SAMPLE = 10
+
+    def __init__(self) -> None:
+        self.events = EventCollector()
+        self._check = current_track()
+
+    @property
+    def error_count(self) -> int:
+        return self.events.count("console.error")
+
+    @property
+    def warning_count(self) -> int:
+        return self.events.count("console.warning")
+
+    @property
+    def failed_request_count(self) -> int:
+        return self.events.count("requestfailed")
+
+    def reset(self) -> None:
+        """Start counting afresh (e.g. per crawled route); the run-wide `EVENTS` keep everything."""
+        self.events.reset()
+
+    def _add(self, kind: str, text: str, where: Optional[str], check: str) -> None:
+        self.events.add(kind, text, where, check)
+        EVENTS.add(kind, text, where, check)
+
+    def attach(self, page: Page) -> Page:
+        # Playwright dispatches events outside the check's task; capture its track now.
+        check = current_track()
+
+        def on_console(msg) -> None:
+            if msg.type in ("error", "warning"):
+                self._add(f"console.{msg.type}", msg.text, (msg.location or {}).get("url"), check)
+
+        page.on("console", on_console)
+        page.on("pageerror", lambda e: self._add("pageerror", f"{e.name}: {e.message}", top_frame(e.stack), check))
+        page.on(
+            "requestfailed",
+            lambda r: self._add("requestfailed", f"{r.method} {r.url} failure={r.failure}", None, check),
+        )
+        self._check = check
+        return page
+
+    def dialog(self, d) -> None:
+        """Record a dialog. Not hooked by `attach()`: any dialog listener stops
+        Playwright's auto-dismiss, so pages that handle dialogs call this from their handler."""
+        self._add("dialog", f"{d.type}: {d.message}", None, self._check)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "error_count": self.error_count,
+            "warning_count": self.warning_count,
+            "page_error_count": self.events.count("pageerror"),
+            "failed_request_count": self.failed_request_count,
+            "errors_sample": self.events.examples("console.error", self.SAMPLE),
+            "warnings_sample": self.events.examples("console.warning", self.SAMPLE),
+            "distinct": self.events.ranked(self.SAMPLE),
+        }
+
+
+def port_open(port: int) -> bool:
+    with socket.socket() as s:
+        s.settimeout(0.2)
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+_local_server = None
+
+
+def ensure_target() -> None:
+    """Start the local `dist/` server for `YIYU_TARGET=local` unless one is already listening.
+
+    The server runs in a daemon thread of the calling process, so worker
+    processes spawned afterwards find the port taken and simply reuse it.
+    """
+    global _local_server
+    if TARGET != "local" or os.environ.get("YIYU_BASE") or _local_server is not None:
+        return
+    if port_open(LOCAL_PORT):
+        return
+    from serve_dist import start_background
+
+    _local_server = start_background(LOCAL_PORT, DIST_DIR)
+
+
+async def launch_browser(p, shared: bool = True) -> Browser:
+    """Attach to the warm browser daemon when one is up, otherwise cold-launch.
+
+    `shared=False` forces a private browser (used by process shards).
+    Closing a connected browser only drops our connection; the daemon lives on.
+    """
+    if shared:
+        from browser_daemon import ws_endpoint
+
+        ws = ws_endpoint()
+        if ws:
+            try:
+                with span("browser.connect"):
+                    return await p.chromium.connect(ws)
+            except Exception:
+                pass
+    with span("browser.launch"):
+        return await p.chromium.launch(headless=True)
+
+
+def pw_trace_enabled() -> bool:
+    return os.environ.get("YIYU_PW_TRACE", "off") == "on-failure"
+
+
+async def new_context(
+    browser, fixture: Optional[str] = None, resources: Optional[str] = None
+) -> BrowserContext:
+    from fixtures import storage_state_path
+    from resources import apply_policy
+
+    with span("context.new", fixture=fixture, resources=resources):
+        state = storage_state_path(fixture)
+        context = await browser.new_context(viewport=VIEWPORT, storage_state=str(state) if state else None)
+        await apply_policy(context, resources)
+        if pw_trace_enabled():
+            await context.tracing.start(screenshots=True, snapshots=True)
+        return context
+
+
+async def close_context(context: BrowserContext, keep_trace: Optional[Path] = None) -> None:
+    """Close `context`; with Playwright tracing on, `keep_trace` (set for failing checks) saves the zip."""
+    with span("context.close", trace=str(keep_trace) if keep_trace else None):
+        if pw_trace_enabled():
+            try:
+                await context.tracing.stop(path=str(keep_trace) if keep_trace else None)
+            except Exception:
+                pass
+        await context.close()
+
+
+async def _run_standalone(check: CheckFn, fixture: Optional[str], resources: Optional[str]) -> int:
+    evidence_root = EVIDENCE_DIR / ts_dir()
+    evidence_root.mkdir(parents=True, exist_ok=True)
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+        try:
+            context = await new_context(browser, fixture, resources)
+            code = 1
+            try:
+                code = await check(context, evidence_root)
+                return code
+            finally:
+                await close_context(context, evidence_root / PW_TRACE_FILE if code != 0 else None)
+        finally:
+            await browser.close()
+            if TRACER.enabled:
+                export(TRACER.events, evidence_root)
+
+
+def run_standalone(check: CheckFn, fixture: Optional[str] = None, resources: Optional[str] = None) -> int:
+    """Run one check in its own browser (the historical per-script behaviour)."""
+    ensure_target()
+    return asyncio.run(_run_standalone(check, fixture, resources))
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Change-impact index: which checks does a diff actually affect?
+
+The index has three layers, all derived from the tree (nothing hand-kept
+except a few overrides):
+
+1. check -> `?page=` routes, scraped from each check's source or, for the
+   scenario checks, its spec in scenarios.json (`page=...`, `route="..."`,
+   `gotoReady(..., 'route')`, `${BASE}/` = home);
+2. route -> top-level component, from the `if (currentPage === '...')`
+   blocks in src/App.tsx (the trailing default return is `home`);
+3. component -> every `src/` module it imports, transitively (shared
+   components such as Footer/Header land on every route whose page imports
+   them, however deep).
+
+`select(range)` maps `git diff --name-only <range>` through the index and
+returns the affected checks plus the always-on smoke set. A changed component
+also selects the checks that name it in their source (run_p0_ix_09/14 drive
+"the footer" of pages that render their own). Selection errs on the side of
+running more: changes to global files (App.tsx, main.tsx, styles, build
+config, shared harness modules) and any `src/` file no route's import graph
+reaches select everything; a change to scenarios.json selects every spec.
+
+Usage:
+  python impact.py index
+  python impact.py select HEAD~1..HEAD
+  python run_all.py --changed HEAD~1..HEAD
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from harness import HERE
+from scenarios import SPECS_FILE, check_name, load_specs
+
+REPO = HERE.parents[1]
+SRC = REPO / "src"
+APP_TSX = SRC / "App.tsx"
+HARNESS_REL = HERE.relative_to(REPO).as_posix()
+
+ALWAYS_ON = ["check_site"]
+ALL_ROUTES = "*"
+
+# Checks whose routes can't be read off their source.
+ROUTE_OVERRIDES: Dict[str, List[str]] = {
+    "crawl": [ALL_ROUTES],
+    "assets_check": [ALL_ROUTES],
+}
+
+GLOBAL_FILES = {
+    "src/App.tsx",
+    "src/main.tsx",
+    "src/index.css",
+    "index.html",
+    "package.json",
+    "package-lock.json",
+    "vite.config.ts",
+    "tailwind.config.js",
+    "postcss.config.js",
+    "tsconfig.json",
+}
+
+# public/ subtrees -> routes that load them.
+PUBLIC_ROUTES: Dict[str, List[str]] = {
+    "public/images/cases/": ["case", "home"],
+    "public/images/insights/": ["insights", "article", "home"],
+    "public/docs/": ["report", "report-library"],
+    "public/download-proxy.html": ["report"],
+}
+
+ROUTE_PATTERNS = [
+    re.compile(r"[?&]page=([\w-]+)"),
+    re.compile(r"""route\s*[=:]\s*["']([\w-]+)["']"""),
+    re.compile(r'"route":\s*"([\w-]+)"'),
+    re.compile(r"""(?:gotoReady|waitAppReady)\([^)]*?,\s*'([\w-]+)'\)"""),
+]
+HOME_PATTERNS = [re.compile(r"goto_ready\(page, BASE\b"), re.compile(r"Url = `\$\{BASE\}/`;")]
+IMPORT_RE = re.compile(
+    r"""(?:import|export)[^'"]*?from\s+['"](\.{1,2}/[^'"]+)['"]"""
+    r"""|(?:import\(\s*|^import\s+)['"](\.{1,2}/[^'"]+)['"]""",  # dynamic / side-effect (`import './x.css'`)
+    re.M,
+)
+MENTION_MIN_CHARS = 4
+BUILT_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", ".css", ".json")
+JSX_TAG_RE = re.compile(r"<([A-Z]\w*)\b")
+APP_IMPORT_RE = re.compile(r"import\s+(?:\{\s*(\w+)\s*\}|(\w+))\s+from\s+'(\./components/[^']+)'")
+
+
+def check_files() -> Dict[str, Path]:
+    files = {p.stem: p for p in HERE.glob("run_p0_ix_*.py")}
+    files.update({p.stem: p for p in HERE.glob("run_p0_ix_*.mjs")})
+    files["check_site"] = HERE / "check_site.py"
+    # Opt-in checks (`run_all.py crawl assets_check --changed ...`); routes from ROUTE_OVERRIDES.
+    files.update({name: HERE / f"{name}.py" for name in ROUTE_OVERRIDES})
+    return files
+
+
+def check_sources() -> Dict[str, str]:
+    """check name -> the text its routes and component mentions are read from."""
+    sources = {name: path.read_text(encoding="utf-8") for name, path in check_files().items()}
+    # Scenario routes live in the specs (one check each), not in the engine.
+    sources.update({check_name(s): json.dumps(s, ensure_ascii=False) for s in load_specs()})
+    return sources
+
+
+def check_routes(name: str, text: str, known: Set[str]) -> List[str]:
+    if name in ROUTE_OVERRIDES:
+        return ROUTE_OVERRIDES[name]
+    routes: Set[str] = set()
+    for pat in ROUTE_PATTERNS:
+        routes.update(pat.findall(text))
+    if any(p.search(text) for p in HOME_PATTERNS):
+        routes.add("home")
+    if name == "check_site":
+        from perf import load_budgets
+
+        routes.add("home")
+        routes.update(load_budgets()["routes"])
+    # ?page=learning is an alias App.tsx folds into library; anything else unknown
+    # (e.g. `?page=xxx` in a docstring) is not a route.
+    return sorted({"library" if r == "learning" else r for r in routes} & known)
+
+
+def _resolve(from_file: Path, spec: str) -> Optional[Path]:
+    base = (from_file.parent / spec).resolve()
+    for cand in (base, *(base.with_name(base.name + ext) for ext in (".tsx", ".ts", ".jsx", ".js", ".json", ".css"))):
+        if cand.is_file():
+            return cand
+    for index in ("index.tsx", "index.ts"):
+        if (base / index).is_file():
+            return base / index
+    return None
+
+
+@lru_cache(maxsize=None)
+def module_closure(path: Path) -> frozenset:
+    """`path` plus every src module it imports, transitively."""
+    seen: Set[Path] = set()
+    stack = [path]
+    while stack:
+        cur = stack.pop()
+        if cur in seen or not cur.is_file():
+            continue
+        seen.add(cur)
+        try:
+            text = cur.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        for a, b in IMPORT_RE.findall(text):
+            dep = _resolve(cur, a or b)
+            if dep is not None:
+                stack.append(dep)
+    return frozenset(seen)
+
+
+def route_components() -> Dict[str, List[Path]]:
+    """route -> component files rendered by App.tsx for it."""
+    text = APP_TSX.read_text(encoding="utf-8")
+    imports = {(a or b): _resolve(APP_TSX, spec) for a, b, spec in APP_IMPORT_RE.findall(text)}
+    blocks = re.split(r"\n  if \(currentPage === '([\w-]+)'\) \{", text)
+    out: Dict[str, List[Path]] = {}
+    # blocks = [preamble, route1, body1, route2, body2, ...]; the last body's tail is the home return.
+    for route, body in zip(blocks[1::2], blocks[2::2]):
+        head, _, tail = body.partition("\n  }\n")
+        out[route] = [imports[t] for t in JSX_TAG_RE.findall(head) if imports.get(t)]
+        if tail and "return (" in tail:
+            out.setdefault("home", []).extend(imports[t] for t in JSX_TAG_RE.findall(tail) if imports.get(t))
+    return out
+
+
+def build_index() -> Dict[str, Dict[str, List[str]]]:
+    routes_to_files: Dict[str, Set[str]] = {}
+    components = route_components()
+    for route, comps in components.items():
+        files: Set[str] = set()
+        for comp in comps:
+            files.update(p.relative_to(REPO).as_posix() for p in module_closure(comp))
+        routes_to_files[route] = files
+    known = set(components) | {"home", "404"}
+    checks = {name: check_routes(name, text, known) for name, text in sorted(check_sources().items())}
+    return {
+        "checks": checks,
+        "routes": {r: sorted(f) for r, f in sorted(routes_to_files.items())},
+    }
+
+
+@lru_cache(maxsize=None)
+def checks_mentioning(name: str) -> frozenset:
+    """Checks whose source names a component (case-insensitive), e.g. `Footer` in `clickFooterLink`."""
+    if len(name) < MENTION_MIN_CHARS:
+        return frozenset()
+    needle = name.lower()
+    return frozenset(check for check, text in check_sources().items() if needle in text.lower())
+
+
+def changed_files(diff_range: str) -> List[str]:
+    out = subprocess.run(
+        ["git", "diff", "--name-only", diff_range], cwd=REPO, capture_output=True, text=True, check=True
+    )
+    return [line for line in out.stdout.splitlines() if line]
+
+
+def select(files: Iterable[str], index: Optional[Dict[str, Dict[str, List[str]]]] = None) -> List[str]:
+    index = index or build_index()
+    checks = index["checks"]
+    hit_routes: Set[str] = set()
+    selected: Set[str] = set(ALWAYS_ON)
+
+    for f in files:
+        if f in GLOBAL_FILES:
+            return sorted(checks)
+        if f.startswith(HARNESS_REL + "/"):
+            stem = Path(f).stem
+            if f == SPECS_FILE.relative_to(REPO).as_posix():
+                selected.update(check_name(s) for s in load_specs())
+            elif stem in checks:
+                selected.add(stem)
+            elif f.endswith((".py", ".mjs")):
+                # Shared harness code (harness.py, waits.*, fixtures.py, ...) touches every check.
+                return sorted(checks)
+            continue
+        if f.startswith("public/"):
+            hit_routes.update(next((r for p, r in PUBLIC_ROUTES.items() if f.startswith(p)), [ALL_ROUTES]))
+            continue
+        routes = [route for route, mods in index["routes"].items() if f in mods]
+        if f.startswith("src/") and not routes and f.endswith(BUILT_SUFFIXES):
+            # Not reachable through any page's imports (alias import, new file, ...): unknown impact.
+            return sorted(checks)
+        hit_routes.update(routes)
+        if f.startswith("src/components/"):
+            selected.update(checks_mentioning(Path(f).stem) & set(checks))
+
+    if ALL_ROUTES in hit_routes:
+        return sorted(checks)
+    for name, routes in checks.items():
+        if ALL_ROUTES in routes or hit_routes.intersection(routes):
+            selected.add(name)
+    return sorted(selected)
+
+
+def main(argv: List[str]) -> int:
+    if argv[:1] == ["index"]:
+        print(json.dumps(build_index(), ensure_ascii=False, indent=2))
+        return 0
+    if argv[:1] == ["select"] and len(argv) == 2:
+        print("\n".join(select(changed_files(argv[1]))))
+        return 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -2,14 +2,53 @@
 set -euo pipefail
 cd "$(dirname "$0")"
 
+# Phase timings for the cycle trace: run_all.py folds .cache/init_spans.jsonl into trace.json.
+INIT_SPANS=.cache/init_spans.jsonl
+mkdir -p .cache
+: > "${INIT_SPANS}"
+now_us() {
+  local t
+  t="$(date +%s%6N)"
+  # BSD date (macOS) has no %N and prints it literally.
+  case "${t}" in
+    *N*) python3 -c 'import time; print(time.time_ns() // 1000)' ;;
+    *) echo "${t}" ;;
+  esac
+}
+phase() {
+  local name="$1" t0 rc=0
+  shift
+  t0="$(now_us)"
+  "$@" || rc=$?
+  printf '{"name": "%s", "ts_us": %s, "dur_us": %s}\n' "${name}" "${t0}" "$(( $(now_us) - t0 ))" >> "${INIT_SPANS}"
+  return "${rc}"
+}
+
 if [ ! -d .venv ]; then
-  /opt/homebrew/bin/python3 -m venv .venv
+  phase venv /opt/homebrew/bin/python3 -m venv .venv
 fi
 
 source .venv/bin/activate
-python -m pip install -q --upgrade pip
-python -m pip install -q requests playwright
-python -m playwright install chromium > /dev/null 2>&1 || true
+
+install_env() {
+  python -m pip install -q --upgrade pip
+  python -m pip install -q requests playwright numpy pillow
+  python -m playwright install chromium > /dev/null 2>&1 || true
+}
+
+# Skip pip/browser setup when python + package versions + browser build are unchanged.
+FP_FILE=.venv/.yiyu_env_fingerprint
+FP="$(python browser_daemon.py fingerprint 2>/dev/null || true)"
+if [ -z "${FP}" ] || [ "${FP}" != "$(cat "${FP_FILE}" 2>/dev/null || true)" ]; then
+  phase pip_install install_env
+  python browser_daemon.py fingerprint > "${FP_FILE}"
+  echo "[init] env installed"
+fi
+
+# Keep a warm browser server around; checks attach to it instead of launching.
+phase browser_daemon python browser_daemon.py start > /dev/null 2>&1 || echo "[init] browser daemon unavailable, checks will launch"
 
 echo "[init] env ok"
-python check_site.py | head -n 120
+if [ "${YIYU_INIT_SMOKE:-1}" = "1" ]; then
+  phase smoke python check_site.py | head -n 120
+fi
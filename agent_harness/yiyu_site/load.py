@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Load-generation mode: concurrent virtual users against the local preview.
+
+Two kinds of virtual users (VUs), both looping their flow until the test ends:
+
+- browser VUs: a fresh `BrowserContext` per iteration running a flow through
+  the scenario engine: `consult` (the P0-IX-07 consult-apply wizard from
+  scenarios.json, screenshots dropped, no step retries) or `reader` (report
+  detail page until its download counter renders);
+- HTTP VUs: raw keep-alive `requests` sessions replaying what those visits
+  download: the route's HTML, the entry JS/CSS chunks, and for readers the
+  interview transcripts under `docs/weiaiqianxing/`.
+
+The site has no backend (the consult form is client-side), so the server under
+load is the `dist/` preview itself: `serve_dist.py` runs in its own process so
+the load generator does not share its GIL. Only loopback targets are allowed
+unless `--allow-remote`.
+
+Ramp-up profiles decide when each VU starts:
+
+- `constant`: all at t=0;
+- `ramp`: evenly spread over `--ramp-s`;
+- `steps:A,B,C`: A users at t=0, B at `--step-s`, C at 2x`--step-s`, ... (cumulative totals).
+
+The report (`evidence/<ts>/load_report.json`, also printed) has throughput
+(iterations/s per flow), per-step p50/p95/p99/max latencies and error counts,
+and a per-second timeline of active VUs and completed iterations.
+
+Usage:
+  python load.py --browser-users 4 --http-users 32 --duration 60
+  python load.py --profile ramp --ramp-s 20 --http-users 100 --browser-users 0
+  python load.py --profile steps:10,20,40 --step-s 15 --flows consult
+"""
+
+from __future__ import annotations
+
+import os
+
+# Load mode only ever targets the local preview by default, and thousands of
+# iterations would only pile up spans nobody exports.
+os.environ.setdefault("YIYU_TARGET", "local")
+os.environ.setdefault("YIYU_TRACE", "0")
+
+import argparse
+import asyncio
+import copy
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from playwright.async_api import async_playwright
+
+from harness import (
+    BASE,
+    DIST_DIR,
+    EVIDENCE_DIR,
+    HERE,
+    LOCAL_PORT,
+    TARGET,
+    launch_browser,
+    new_context,
+    page_url,
+    port_open,
+    save_json,
+    ts_dir,
+)
+from tracing import percentile
+
+REPO = HERE.parents[1]
+REPORT_ID = os.environ.get("YIYU_REPORT_ID", "r_weiaiqianxing_training_20260105")
+READER_DOCS = sorted((REPO / "public" / "docs" / "weiaiqianxing").glob("*.txt"))
+
+FLOWS = ("consult", "reader")
+HTTP_TIMEOUT = 30
+
+READER_SPEC = {
+    "id": "load-reader",
+    "steps": [
+        {"goto": f"?page=report&id={REPORT_ID}", "route": "report"},
+        {"wait": {"text": "次下载", "first": True}},
+    ],
+}
+
+
+def consult_spec() -> Dict[str, Any]:
+    from scenarios import load_specs
+
+    spec = copy.deepcopy(next(s for s in load_specs() if s["id"] == "P0-IX-07"))
+    spec["id"] = "load-consult"
+    spec["steps"] = [
+        {**step, "retries": 1} for step in spec["steps"] if "screenshot" not in step
+    ]
+    return spec
+
+
+def start_offsets(users: int, profile: str, ramp_s: float, step_s: float) -> List[float]:
+    """Start time (seconds from t0) of each of `users` VUs under `profile`."""
+    if users <= 0:
+        return []
+    if profile == "constant":
+        return [0.0] * users
+    if profile == "ramp":
+        return [ramp_s * i / users for i in range(users)]
+    if profile.startswith("steps:"):
+        totals = [int(x) for x in profile[len("steps:"):].split(",") if x]
+        # Cumulative totals are given for all VUs; scale them to this VU kind's share.
+        scale = users / totals[-1]
+        offsets: List[float] = []
+        for level, total in enumerate(totals):
+            while len(offsets) < min(users, round(total * scale)):
+                offsets.append(level * step_s)
+        return offsets + [len(totals) * step_s] * (users - len(offsets))
+    raise ValueError(f"unknown profile {profile!r} (constant | ramp | steps:A,B,...)")
+
+
+class Recorder:
+    """Thread-safe sample sink shared by browser and HTTP VUs."""
+
+    def __init__(self) -> None:
+        self.t0 = time.monotonic()
+        self.samples: List[Tuple[str, str, str, float, bool]] = []  # (kind, flow, step, ms, ok)
+        self.iterations: List[Tuple[str, str, float, bool]] = []  # (kind, flow, t_end, ok)
+        self.active: Dict[str, int] = {"browser": 0, "http": 0}
+        self.timeline: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def step(self, kind: str, flow: str, step: str, ms: float, ok: bool) -> None:
+        with self.lock:
+            self.samples.append((kind, flow, step, ms, ok))
+
+    def iteration(self, kind: str, flow: str, ok: bool) -> None:
+        with self.lock:
+            self.iterations.append((kind, flow, time.monotonic() - self.t0, ok))
+
+    def vu(self, kind: str, delta: int) -> None:
+        with self.lock:
+            self.active[kind] += delta
+
+    def report(self, wall_s: float) -> Dict[str, Any]:
+        steps: Dict[str, Dict[str, Any]] = {}
+        grouped: Dict[Tuple[str, str, str], List[Tuple[float, bool]]] = {}
+        for kind, flow, step, ms, ok in self.samples:
+            grouped.setdefault((kind, flow, step), []).append((ms, ok))
+        for (kind, flow, step), rows in sorted(grouped.items()):
+            ms = sorted(m for m, ok in rows if ok)
+            steps[f"{kind}/{flow}/{step}"] = {
+                "count": len(rows),
+                "errors": sum(1 for _, ok in rows if not ok),
+                "p50_ms": round(percentile(ms, 50), 1),
+                "p95_ms": round(percentile(ms, 95), 1),
+                "p99_ms": round(percentile(ms, 99), 1),
+                "max_ms": round(ms[-1], 1) if ms else 0.0,
+            }
+        throughput: Dict[str, Dict[str, Any]] = {}
+        for kind, flow, _, ok in self.iterations:
+            t = throughput.setdefault(f"{kind}/{flow}", {"iterations": 0, "errors": 0})
+            t["iterations"] += 1
+            t["errors"] += 0 if ok else 1
+        for t in throughput.values():
+            t["per_s"] = round(t["iterations"] / wall_s, 2) if wall_s else 0.0
+        return {"throughput": throughput, "steps": steps, "timeline": self.timeline}
+
+
+def http_iteration(session, flow: str, assets: List[str], rec: Recorder) -> bool:
+    route = "consult-apply" if flow == "consult" else "report"
+    query = f"?page={route}" + (f"&id={quote(REPORT_ID)}" if flow == "reader" else "")
+    plan: List[Tuple[str, List[str]]] = [("html", [page_url(query)]), ("assets", assets)]
+    if flow == "reader":
+        plan.append(("docs", [page_url(f"docs/weiaiqianxing/{quote(p.name)}") for p in READER_DOCS]))
+
+    all_ok = True
+    for step, urls in plan:
+        started = time.perf_counter()
+        ok = True
+        for url in urls:
+            try:
+                r = session.get(url, timeout=HTTP_TIMEOUT)
+                r.content  # drain so the connection goes back to the pool
+                ok = ok and r.status_code == 200
+            except Exception:
+                ok = False
+        rec.step("http", flow, step, (time.perf_counter() - started) * 1000, ok)
+        all_ok = all_ok and ok
+    return all_ok
+
+
+async def http_vu(
+    flow: str, assets: List[str], rec: Recorder, start_at: float, end_at: float, pool: ThreadPoolExecutor
+) -> None:
+    from assets_check import http_session
+
+    await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+    loop = asyncio.get_running_loop()
+    rec.vu("http", 1)
+    try:
+        while time.monotonic() < end_at:
+            # http_session() is per thread, so each pool thread keeps its own keep-alive pool.
+            ok = await loop.run_in_executor(pool, lambda: http_iteration(http_session(), flow, assets, rec))
+            rec.iteration("http", flow, ok)
+    finally:
+        rec.vu("http", -1)
+
+
+async def browser_vu(browser, spec: Dict[str, Any], flow: str, rec: Recorder, start_at: float, end_at: float) -> None:
+    from scenarios import ScenarioRun
+
+    await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+    rec.vu("browser", 1)
+    try:
+        while time.monotonic() < end_at:
+            context = await new_context(browser)
+            try:
+                run = ScenarioRun(spec, await context.new_page(), None)
+                result = await run.execute()
+            finally:
+                await context.close()
+            for entry in run.log:
+                rec.step("browser", flow, f"{entry['i']:02d}:{entry['label']}", entry["ms"], entry.get("passed", True))
+            rec.iteration("browser", flow, result["exit_code"] == 0)
+    finally:
+        rec.vu("browser", -1)
+
+
+async def sample_timeline(rec: Recorder, end_at: float) -> None:
+    last_done = 0
+    while time.monotonic() < end_at:
+        await asyncio.sleep(1.0)
+        with rec.lock:
+            done = len(rec.iterations)
+            rec.timeline.append(
+                {"t": round(time.monotonic() - rec.t0), **{f"active_{k}": v for k, v in rec.active.items()}, "completed": done - last_done}
+            )
+        last_done = done
+
+
+def _assign(users: int, flows: List[str]) -> List[str]:
+    return [flows[i % len(flows)] for i in range(users)]
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    from assets_check import entry_assets
+    from scenarios import compile_spec
+
+    flows = args.flows
+    specs = {}
+    if "consult" in flows:
+        specs["consult"] = compile_spec(consult_spec())
+    if "reader" in flows:
+        specs["reader"] = compile_spec(READER_SPEC)
+    assets = await asyncio.to_thread(entry_assets)
+
+    rec = Recorder()
+    start = time.monotonic()
+    ramp_end = max(start_offsets(args.browser_users + args.http_users, args.profile, args.ramp_s, args.step_s) or [0.0])
+    end_at = start + ramp_end + args.duration
+    http_pool = ThreadPoolExecutor(max_workers=max(1, args.http_users), thread_name_prefix="load-http")
+
+    tasks = [
+        http_vu(flow, assets, rec, start + off, end_at, http_pool)
+        for flow, off in zip(_assign(args.http_users, flows), start_offsets(args.http_users, args.profile, args.ramp_s, args.step_s))
+    ]
+    async with async_playwright() as p:
+        browser = await launch_browser(p) if args.browser_users else None
+        try:
+            tasks += [
+                browser_vu(browser, specs[flow], flow, rec, start + off, end_at)
+                for flow, off in zip(
+                    _assign(args.browser_users, flows),
+                    start_offsets(args.browser_users, args.profile, args.ramp_s, args.step_s),
+                )
+            ]
+            await asyncio.gather(sample_timeline(rec, end_at), *tasks)
+        finally:
+            if browser is not None:
+                await browser.close()
+            http_pool.shutdown(wait=False)
+
+    wall_s = round(time.monotonic() - start, 3)
+    return {
+        "base": BASE,
+        "profile": args.profile,
+        "browser_users": args.browser_users,
+        "http_users": args.http_users,
+        "flows": flows,
+        "duration_s": args.duration,
+        "wall_s": wall_s,
+        "entry_assets": len(assets),
+        **rec.report(wall_s),
+        "ts": time.time(),
+    }
+
+
+def _start_server() -> Optional[subprocess.Popen]:
+    """Run the preview in its own process unless something already listens on the port."""
+    if TARGET != "local" or os.environ.get("YIYU_BASE") or port_open(LOCAL_PORT):
+        return None
+    proc = subprocess.Popen(
+        [sys.executable, str(HERE / "serve_dist.py"), "--port", str(LOCAL_PORT), "--dist", str(DIST_DIR)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while not port_open(LOCAL_PORT):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError("serve_dist.py did not come up; is dist/ built?")
+        time.sleep(0.05)
+    return proc
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--browser-users", type=int, default=4)
+    ap.add_argument("--http-users", type=int, default=32)
+    ap.add_argument("--duration", type=float, default=60, help="seconds to hold full load after ramp-up")
+    ap.add_argument("--profile", default="ramp", help="constant | ramp | steps:A,B,...")
+    ap.add_argument("--ramp-s", type=float, default=20)
+    ap.add_argument("--step-s", type=float, default=15)
+    ap.add_argument("--flows", type=lambda s: [f for f in s.split(",") if f], default=list(FLOWS))
+    ap.add_argument("--allow-remote", action="store_true", help="allow a non-loopback YIYU_BASE")
+    args = ap.parse_args(argv)
+
+    unknown = [f for f in args.flows if f not in FLOWS]
+    if unknown or not args.flows:
+        ap.error(f"--flows must be a subset of {','.join(FLOWS)}")
+    start_offsets(1, args.profile, args.ramp_s, args.step_s)  # validate the profile early
+    host = urlsplit(BASE).hostname or ""
+    if host not in ("127.0.0.1", "localhost", "::1") and not args.allow_remote:
+        print(f"[load] refusing to load-test {BASE}; use the local preview or --allow-remote")
+        return 2
+
+    server = _start_server()
+    try:
+        report = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    out_dir = EVIDENCE_DIR / ts_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    save_json(out_dir / "load_report.json", report)
+    print(json.dumps({k: v for k, v in report.items() if k != "timeline"}, ensure_ascii=False, indent=2))
+    errors = sum(t["errors"] for t in report["throughput"].values())
+    return 2 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
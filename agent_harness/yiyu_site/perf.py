@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Front-end performance capture + per-route budgets.
+
+`PERF_INIT_JS` is installed before navigation and buffers LCP, layout shifts
+and long tasks; `collect_metrics()` then reads Navigation Timing, transferred
+bytes per resource type and the JS heap (CDP `Performance.getMetrics`).
+
+Budgets live next to the entries in `feature_list.json`:
+
+    "perf_budgets": {
+      "mode": "warn",                      # or "fail"
+      "routes": {"home": {"lcp_ms": 3000, "transfer_kb": {"script": 1500}}}
+    }
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from harness import HERE
+
+FEATURE_LIST = HERE / "feature_list.json"
+
+PERF_INIT_JS = """
+(() => {
+  const perf = (window.__yiyuPerf = { lcp: 0, cls: 0, longTasks: [] });
+  const observe = (type, cb) => {
+    try { new PerformanceObserver((list) => list.getEntries().forEach(cb)).observe({ type, buffered: true }); } catch (e) {}
+  };
+  observe('largest-contentful-paint', (e) => { perf.lcp = Math.max(perf.lcp, e.startTime); });
+  observe('layout-shift', (e) => { if (!e.hadRecentInput) perf.cls += e.value; });
+  observe('longtask', (e) => { perf.longTasks.push(Math.round(e.duration)); });
+})();
+"""
+
+COLLECT_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const kind = (r) => {
+    const path = new URL(r.name, location.href).pathname.toLowerCase();
+    if (/\\.(m?js)$/.test(path) || r.initiatorType === 'script') return 'script';
+    if (/\\.css$/.test(path) || r.initiatorType === 'css' || r.initiatorType === 'link') return 'stylesheet';
+    if (/\\.(png|jpe?g|gif|webp|avif|svg|ico)$/.test(path) || r.initiatorType === 'img') return 'image';
+    if (/\\.(woff2?|ttf|otf)$/.test(path)) return 'font';
+    if (r.initiatorType === 'fetch' || r.initiatorType === 'xmlhttprequest') return 'fetch';
+    return 'other';
+  };
+  const bytes = {};
+  for (const r of performance.getEntriesByType('resource')) {
+    const k = kind(r);
+    bytes[k] = (bytes[k] || 0) + (r.transferSize || 0);
+  }
+  if (nav) bytes.document = nav.transferSize || 0;
+  const p = window.__yiyuPerf || { lcp: 0, cls: 0, longTasks: [] };
+  return {
+    ttfb_ms: nav ? nav.responseStart - nav.requestStart : null,
+    dcl_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    load_ms: nav ? nav.loadEventEnd - nav.startTime : null,
+    lcp_ms: p.lcp || null,
+    cls: Math.round(p.cls * 10000) / 10000,
+    long_task_count: p.longTasks.length,
+    long_tasks_ms: p.longTasks.reduce((a, b) => a + b, 0),
+    transfer_bytes: bytes,
+  };
+}
+"""
+
+
+def load_budgets(path: Path = FEATURE_LIST) -> Dict[str, Any]:
+    """Merge every entry's `perf_budgets` into {"mode": ..., "routes": {...}}."""
+    merged: Dict[str, Any] = {"mode": "warn", "routes": {}}
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return merged
+    for entry in entries:
+        b = entry.get("perf_budgets")
+        if not b:
+            continue
+        if b.get("mode") == "fail":
+            merged["mode"] = "fail"
+        merged["routes"].update(b.get("routes", {}))
+    return merged
+
+
+async def collect_metrics(page: Page) -> Dict[str, Any]:
+    metrics = await page.evaluate(COLLECT_JS)
+    metrics["transfer_kb"] = {k: round(v / 1024, 1) for k, v in metrics.pop("transfer_bytes").items()}
+    metrics["transfer_kb"]["total"] = round(sum(metrics["transfer_kb"].values()), 1)
+    metrics["js_heap_mb"] = None
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+        raw = await cdp.send("Performance.getMetrics")
+        heap = next((m["value"] for m in raw["metrics"] if m["name"] == "JSHeapUsedSize"), None)
+        metrics["js_heap_mb"] = round(heap / (1024 * 1024), 2) if heap is not None else None
+        await cdp.detach()
+    except Exception:
+        # Non-Chromium or connection without CDP access: heap stays unknown.
+        pass
+    return metrics
+
+
+def over_budget(metrics: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    """Human-readable violations, e.g. `lcp_ms=3412 > 3000`."""
+    out: List[str] = []
+    for key, limit in budget.items():
+        if isinstance(limit, dict):
+            actual_map: Optional[Dict[str, Any]] = metrics.get(key) or {}
+            for sub, sub_limit in limit.items():
+                actual = actual_map.get(sub)
+                if actual is not None and actual > sub_limit:
+                    out.append(f"{key}.{sub}={actual} > {sub_limit}")
+            continue
+        actual = metrics.get(key)
+        if actual is not None and actual > limit:
+            out.append(f"{key}={round(actual, 4)} > {limit}")
+    return out
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Per-check resource policies built on Playwright request routing.
+
+- `full` (default): no routing at all. Playwright disables the HTTP cache
+  for routed contexts and fulfilled responses skew Resource Timing, so
+  anything measuring bytes/timings or pixels (check_site perf, crawl's
+  failed requests, visual baselines) stays here.
+- `fast`: images, media and fonts are stubbed (tiny valid bodies, so no
+  console "Failed to load resource" errors), non-navigation PDF fetches are
+  stubbed, and so are third-party images, media, fonts and stylesheets.
+  Third-party fetch/XHR and scripts still go to the network: an empty 204
+  would read as a successful empty API answer (e.g. Supabase auth on the
+  login route). Immutable
+  build assets (`/assets/*`, content-hashed by Vite) are answered from the
+  local HAR-style cache once seen; other same-origin static files are
+  revalidated with `If-None-Match` / `If-Modified-Since` and served from the
+  cache on 304.
+
+Python checks opt in with `RESOURCES = "fast"`, scenarios with
+`"resources": "fast"` in their spec; `YIYU_RESOURCES=full` forces full
+fidelity everywhere. Specs that take screenshots must stay on `full`.
+
+Cache layout (one HAR-like entry per URL, bodies content-addressed):
+
+  .cache/asset_har/entries/<sha256(url)[:32]>.json
+  .cache/asset_har/bodies/<sha256(body)>
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Route
+
+from harness import BASE, HERE
+
+CACHE_DIR = HERE / ".cache" / "asset_har"
+ENTRIES_DIR = CACHE_DIR / "entries"
+BODIES_DIR = CACHE_DIR / "bodies"
+
+POLICIES = ("full", "fast")
+STUB_TYPES = {"image", "media", "font"}
+THIRD_PARTY_STUB_TYPES = STUB_TYPES | {"stylesheet"}
+IMMUTABLE_PREFIX = urlsplit(BASE).path.rstrip("/") + "/assets/"
+STATIC_SUFFIXES = (".js", ".css", ".png", ".jpg", ".jpeg", ".webp", ".svg", ".gif", ".ico", ".json", ".txt", ".woff", ".woff2")
+KEEP_HEADERS = {"content-type", "etag", "last-modified", "cache-control"}
+
+# 1x1 transparent GIF.
+STUB_IMAGE = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+_stats: "weakref.WeakKeyDictionary[BrowserContext, Dict[str, int]]" = weakref.WeakKeyDictionary()
+
+
+def resolve(policy: Optional[str]) -> str:
+    if os.environ.get("YIYU_RESOURCES") == "full":
+        return "full"
+    return policy if policy in POLICIES else "full"
+
+
+def _entry_path(url: str) -> Path:
+    return ENTRIES_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}.json"
+
+
+def load_entry(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        entry = json.loads(_entry_path(url).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    body = BODIES_DIR / entry["response"]["content"]["sha256"]
+    return entry if body.is_file() else None
+
+
+def store_entry(url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+    digest = hashlib.sha256(body).hexdigest()
+    BODIES_DIR.mkdir(parents=True, exist_ok=True)
+    ENTRIES_DIR.mkdir(parents=True, exist_ok=True)
+    blob = BODIES_DIR / digest
+    if not blob.exists():
+        tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(body)
+        tmp.replace(blob)
+    entry = {
+        "request": {"method": "GET", "url": url},
+        "response": {
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() in KEEP_HEADERS},
+            "content": {"size": len(body), "sha256": digest},
+        },
+    }
+    path = _entry_path(url)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+async def _fulfill_cached(route: Route, entry: Dict[str, Any]) -> None:
+    resp = entry["response"]
+    await route.fulfill(
+        status=resp["status"], headers=resp["headers"], path=str(BODIES_DIR / resp["content"]["sha256"])
+    )
+
+
+def _stub(resource_type: str) -> Dict[str, Any]:
+    if resource_type == "image":
+        return {"status": 200, "content_type": "image/gif", "body": STUB_IMAGE}
+    if resource_type == "script":
+        return {"status": 200, "content_type": "application/javascript", "body": ""}
+    if resource_type == "stylesheet":
+        return {"status": 200, "content_type": "text/css", "body": ""}
+    # Fonts, media, beacons: no content; the page falls back without a network error.
+    return {"status": 204, "body": ""}
+
+
+class FastRouter:
+    def __init__(self, stats: Dict[str, int]) -> None:
+        self.stats = stats
+        self.origin = urlsplit(BASE).netloc
+
+    def _count(self, key: str, n: int = 1) -> None:
+        self.stats[key] = self.stats.get(key, 0) + n
+
+    async def handle(self, route: Route) -> None:
+        req = route.request
+        parts = urlsplit(req.url)
+        kind = req.resource_type
+
+        if parts.scheme not in ("http", "https"):
+            await route.fallback()
+            return
+        if parts.netloc != self.origin and not req.is_navigation_request():
+            if kind in THIRD_PARTY_STUB_TYPES:
+                self._count("third_party_stubbed")
+                await route.fulfill(**_stub(kind))
+            else:
+                self._count("third_party_passed")
+                await route.fallback()
+            return
+        if kind in STUB_TYPES or (parts.path.endswith(".pdf") and not req.is_navigation_request()):
+            self._count(f"{kind}_stubbed")
+            await route.fulfill(**_stub(kind))
+            return
+        if req.method != "GET" or parts.netloc != self.origin or not parts.path.endswith(STATIC_SUFFIXES):
+            await route.fallback()
+            return
+
+        entry = load_entry(req.url)
+        if entry and parts.path.startswith(IMMUTABLE_PREFIX):
+            self._count("cache_hit")
+            self._count("bytes_saved", entry["response"]["content"]["size"])
+            await _fulfill_cached(route, entry)
+            return
+
+        headers = dict(req.headers)
+        if entry:
+            cached = {k.lower(): v for k, v in entry["response"]["headers"].items()}
+            if "etag" in cached:
+                headers["if-none-match"] = cached["etag"]
+            if "last-modified" in cached:
+                headers["if-modified-since"] = cached["last-modified"]
+        try:
+            resp = await route.fetch(headers=headers)
+        except Exception:
+            await route.fallback()
+            return
+        if resp.status == 304 and entry:
+            self._count("revalidated")
+            self._count("bytes_saved", entry["response"]["content"]["size"])
+            await _fulfill_cached(route, entry)
+            return
+        body = await resp.body()
+        if resp.status == 200:
+            store_entry(req.url, resp.status, resp.headers, body)
+            self._count("cache_store")
+        await route.fulfill(response=resp, body=body)
+
+
+async def apply_policy(context: BrowserContext, policy: Optional[str]) -> str:
+    """Install the routing for `policy` on `context`; returns the policy actually applied."""
+    policy = resolve(policy)
+    if policy == "fast":
+        stats: Dict[str, int] = {}
+        _stats[context] = stats
+        await context.route("**/*", FastRouter(stats).handle)
+    return policy
+
+
+def policy_stats(context: BrowserContext) -> Dict[str, int]:
+    return dict(_stats.get(context, {}))
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Indexed results store for harness cycles (SQLite, `results.db`).
+
+Every `run_all.py` run is recorded as one cycle: each check's exit code and
+duration, its boolean assertions, every numeric metric found in its
+`console_summary.json` (console counts, wait timings, perf per route, ...)
+and its per-step retry records (`step_attempts`, see retry.py).
+`bench.py` runs land in `bench_runs` / `bench_results`, one row per
+primitive with its median and p95, keyed by commit and host.
+Queries hit indexed rows only, instead of re-parsing `progress.log`, which is
+kept as a rendered view (`render`).
+
+Usage:
+  python results_store.py ingest evidence/<run>/run_summary.json
+  python results_store.py trend check_site [--metric console.error_count] [--last 20]
+  python results_store.py first-failure run_p0_ix_07
+  python results_store.py flaky [--last 50]
+  python results_store.py flaky-steps [--last 50]
+  python results_store.py render [--last 1]
+  python results_store.py last-id
+  python results_store.py bench goto.local [--last 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import subprocess
+import sys
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+DB_PATH = HERE / "results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles (
+  id INTEGER PRIMARY KEY,
+  ts REAL NOT NULL,
+  git_commit TEXT,
+  target TEXT,
+  base TEXT,
+  ok INTEGER NOT NULL,
+  wall_s REAL
+);
+CREATE TABLE IF NOT EXISTS checks (
+  id INTEGER PRIMARY KEY,
+  cycle_id INTEGER NOT NULL REFERENCES cycles(id),
+  name TEXT NOT NULL,
+  exit_code INTEGER NOT NULL,
+  duration_s REAL,
+  evidence_dir TEXT,
+  error TEXT
+);
+CREATE TABLE IF NOT EXISTS assertions (
+  check_id INTEGER NOT NULL REFERENCES checks(id),
+  name TEXT NOT NULL,
+  passed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+  check_id INTEGER NOT NULL REFERENCES checks(id),
+  name TEXT NOT NULL,
+  value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS step_attempts (
+  check_id INTEGER NOT NULL REFERENCES checks(id),
+  step TEXT NOT NULL,
+  attempts INTEGER NOT NULL,
+  ok INTEGER NOT NULL,
+  quarantined INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS bench_runs (
+  id INTEGER PRIMARY KEY,
+  ts REAL NOT NULL,
+  git_commit TEXT,
+  host TEXT,
+  warmup INTEGER,
+  trials INTEGER
+);
+CREATE TABLE IF NOT EXISTS bench_results (
+  run_id INTEGER NOT NULL REFERENCES bench_runs(id),
+  name TEXT NOT NULL,
+  median_ms REAL,
+  p95_ms REAL,
+  min_ms REAL,
+  max_ms REAL,
+  trials INTEGER NOT NULL,
+  failures INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checks_name_cycle ON checks(name, cycle_id);
+CREATE INDEX IF NOT EXISTS idx_assertions_check ON assertions(check_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_check_name ON metrics(check_id, name);
+CREATE INDEX IF NOT EXISTS idx_step_attempts_step ON step_attempts(step, check_id);
+CREATE INDEX IF NOT EXISTS idx_bench_results_run ON bench_results(run_id, name);
+"""
+
+SKIP_KEYS = {"ts", "entries", "slowest"}
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def flatten(obj: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Yield (dotted.name, leaf) for dict leaves; lists are samples and are skipped."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k in SKIP_KEYS:
+                continue
+            yield from flatten(v, f"{prefix}{k}.")
+    elif not isinstance(obj, list):
+        yield prefix[:-1], obj
+
+
+def summary_rows(summary: Dict[str, Any]) -> Tuple[List[Tuple[str, bool]], List[Tuple[str, float]]]:
+    assertions = [(k, bool(v)) for k, v in (summary.get("assertions") or {}).items()]
+    body = {k: v for k, v in summary.items() if k != "assertions"}
+    # check_site.py nests its per-result details as JSON strings.
+    for r in body.pop("results", None) or []:
+        assertions.append((r["name"], bool(r["ok"])))
+        try:
+            body[r["name"]] = json.loads(r["details"])
+        except (TypeError, ValueError):
+            pass
+    metrics = [
+        (name, float(v))
+        for name, v in flatten(body)
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    ]
+    return assertions, metrics
+
+
+def record_run(out: Dict[str, Any], path: Path = DB_PATH) -> int:
+    """Store one `run_all.py` summary; returns the cycle id."""
+    with closing(connect(path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO cycles (ts, git_commit, target, base, ok, wall_s) VALUES (?, ?, ?, ?, ?, ?)",
+            (out["ts"], git_commit(), out.get("target"), out.get("base"), int(out["ok"]), out.get("wall_s")),
+        )
+        cycle_id = cur.lastrowid
+        for c in out["checks"]:
+            cur = conn.execute(
+                "INSERT INTO checks (cycle_id, name, exit_code, duration_s, evidence_dir, error)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (cycle_id, c["name"], c["exit_code"], c["duration_s"], c.get("evidence_dir"), c.get("error")),
+            )
+            check_id = cur.lastrowid
+            try:
+                summary = json.loads((Path(c["evidence_dir"]) / "console_summary.json").read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            assertions, metrics = summary_rows(summary)
+            conn.executemany(
+                "INSERT INTO assertions (check_id, name, passed) VALUES (?, ?, ?)",
+                [(check_id, n, int(p)) for n, p in assertions],
+            )
+            conn.executemany(
+                "INSERT INTO metrics (check_id, name, value) VALUES (?, ?, ?)",
+                [(check_id, n, v) for n, v in metrics],
+            )
+            conn.executemany(
+                "INSERT INTO step_attempts (check_id, step, attempts, ok, quarantined) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (check_id, a["step"], a["attempts"], int(a["ok"]), int(a.get("quarantined", False)))
+                    for a in summary.get("step_attempts") or []
+                ],
+            )
+        return cycle_id
+
+
+def record_bench(report: Dict[str, Any], path: Path = DB_PATH) -> int:
+    """Store one `bench.py` run (per-primitive stats); returns the bench run id."""
+    with closing(connect(path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO bench_runs (ts, git_commit, host, warmup, trials) VALUES (?, ?, ?, ?, ?)",
+            (report["ts"], report["git_commit"], report["host"], report["warmup"], report["trials"]),
+        )
+        run_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO bench_results (run_id, name, median_ms, p95_ms, min_ms, max_ms, trials, failures)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, name, r.get("median_ms"), r.get("p95_ms"), r.get("min_ms"), r.get("max_ms"), r["trials"], r["failures"])
+                for name, r in report["results"].items()
+            ],
+        )
+        return run_id
+
+
+def bench_baseline(
+    conn: sqlite3.Connection, host: str, commit: Optional[str] = None, exclude_commit: Optional[str] = None
+) -> Tuple[Optional[str], Dict[str, float]]:
+    """(commit, {name: median_ms}) of the latest bench run on `host`.
+
+    `commit` pins the baseline to that commit's latest run; otherwise the latest
+    run from any commit other than `exclude_commit` (normally HEAD) is used.
+    """
+    if commit:
+        where, params = "host = ? AND git_commit = ?", (host, commit)
+    else:
+        where, params = "host = ? AND git_commit IS NOT ?", (host, exclude_commit)
+    row = conn.execute(f"SELECT id, git_commit FROM bench_runs WHERE {where} ORDER BY id DESC LIMIT 1", params).fetchone()
+    if row is None:
+        return None, {}
+    medians = conn.execute(
+        "SELECT name, median_ms FROM bench_results WHERE run_id = ? AND median_ms IS NOT NULL", (row[0],)
+    ).fetchall()
+    return row[1], dict(medians)
+
+
+def bench_history(conn: sqlite3.Connection, name: str, last: int) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT r.ts, r.git_commit, r.host, b.median_ms, b.p95_ms, b.trials, b.failures"
+        " FROM bench_results b JOIN bench_runs r ON r.id = b.run_id"
+        " WHERE b.name = ? ORDER BY r.id DESC LIMIT ?",
+        (name, last),
+    ).fetchall()
+    keys = ("ts", "git_commit", "host", "median_ms", "p95_ms", "trials", "failures")
+    return [dict(zip(keys, r)) for r in reversed(rows)]
+
+
+def trend(conn: sqlite3.Connection, check: str, metric: Optional[str], last: int) -> List[Dict[str, Any]]:
+    if metric:
+        rows = conn.execute(
+            "SELECT cy.id, cy.ts, cy.git_commit, m.value FROM checks c"
+            " JOIN cycles cy ON cy.id = c.cycle_id"
+            " JOIN metrics m ON m.check_id = c.id AND m.name = ?"
+            " WHERE c.name = ? ORDER BY c.cycle_id DESC LIMIT ?",
+            (metric, check, last),
+        ).fetchall()
+        keys = ("cycle", "ts", "commit", metric)
+    else:
+        rows = conn.execute(
+            "SELECT cy.id, cy.ts, cy.git_commit, c.exit_code, c.duration_s FROM checks c"
+            " JOIN cycles cy ON cy.id = c.cycle_id"
+            " WHERE c.name = ? ORDER BY c.cycle_id DESC LIMIT ?",
+            (check, last),
+        ).fetchall()
+        keys = ("cycle", "ts", "commit", "exit_code", "duration_s")
+    return [dict(zip(keys, r)) for r in reversed(rows)]
+
+
+def first_failure(conn: sqlite3.Connection, check: str) -> Optional[Dict[str, Any]]:
+    """First failing cycle of the current failure streak, plus the last good cycle before it."""
+    last_pass = conn.execute(
+        "SELECT MAX(cycle_id) FROM checks WHERE name = ? AND exit_code = 0", (check,)
+    ).fetchone()[0]
+    row = conn.execute(
+        "SELECT c.cycle_id, cy.ts, cy.git_commit FROM checks c JOIN cycles cy ON cy.id = c.cycle_id"
+        " WHERE c.name = ? AND c.exit_code != 0 AND c.cycle_id > ? ORDER BY c.cycle_id LIMIT 1",
+        (check, last_pass or 0),
+    ).fetchone()
+    if row is None:
+        return None
+    good = None
+    if last_pass is not None:
+        good = conn.execute("SELECT id, ts, git_commit FROM cycles WHERE id = ?", (last_pass,)).fetchone()
+    return {
+        "check": check,
+        "first_failing": {"cycle": row[0], "ts": row[1], "commit": row[2]},
+        "last_passing": {"cycle": good[0], "ts": good[1], "commit": good[2]} if good else None,
+    }
+
+
+def flaky(conn: sqlite3.Connection, last: int) -> List[Dict[str, Any]]:
+    """Fail rate and flip rate (pass<->fail transitions per run) over the last N cycles."""
+    out = []
+    names = [r[0] for r in conn.execute("SELECT DISTINCT name FROM checks ORDER BY name")]
+    for name in names:
+        codes = [
+            r[0]
+            for r in conn.execute(
+                "SELECT exit_code FROM checks WHERE name = ? ORDER BY cycle_id DESC LIMIT ?", (name, last)
+            )
+        ]
+        if not codes:
+            continue
+        fails = sum(1 for c in codes if c != 0)
+        flips = sum(1 for a, b in zip(codes, codes[1:]) if (a == 0) != (b == 0))
+        out.append(
+            {
+                "check": name,
+                "runs": len(codes),
+                "fail_rate": round(fails / len(codes), 3),
+                "flip_rate": round(flips / max(1, len(codes) - 1), 3),
+            }
+        )
+    return sorted(out, key=lambda r: -r["flip_rate"])
+
+
+QUARANTINE_MIN_RUNS = 5
+QUARANTINE_RETRY_RATE = 0.2
+
+
+def flaky_steps(conn: sqlite3.Connection, last: int) -> List[Dict[str, Any]]:
+    """Per step over the last N cycles: how often it needed a retry and how often it failed outright.
+
+    Steps that keep needing retries are quarantine candidates (mark them
+    `"quarantine": true` in their spec); steps that fail are real failures.
+    """
+    out = []
+    rows = conn.execute(
+        "SELECT s.step, c.name, COUNT(*), SUM(s.attempts > 1), SUM(1 - s.ok), MAX(s.attempts), MAX(s.quarantined)"
+        " FROM step_attempts s JOIN checks c ON c.id = s.check_id"
+        " WHERE c.cycle_id > (SELECT COALESCE(MAX(id), 0) FROM cycles) - ?"
+        " GROUP BY s.step, c.name",
+        (last,),
+    )
+    for step, check, runs, retried, failed, max_attempts, quarantined in rows:
+        retry_rate = retried / runs
+        out.append(
+            {
+                "step": step,
+                "check": check,
+                "runs": runs,
+                "retry_rate": round(retry_rate, 3),
+                "fail_rate": round(failed / runs, 3),
+                "max_attempts": max_attempts,
+                "quarantined": bool(quarantined),
+                "quarantine_candidate": not quarantined
+                and runs >= QUARANTINE_MIN_RUNS
+                and retry_rate >= QUARANTINE_RETRY_RATE,
+            }
+        )
+    return sorted((r for r in out if r["retry_rate"] or r["fail_rate"]), key=lambda r: (-r["retry_rate"], -r["fail_rate"]))
+
+
+def render(conn: sqlite3.Connection, last: int) -> str:
+    """progress.log-style Markdown for the last N cycles."""
+    from datetime import datetime
+
+    blocks = []
+    cycles = conn.execute(
+        "SELECT id, ts, git_commit, target, ok, wall_s FROM cycles ORDER BY id DESC LIMIT ?", (last,)
+    ).fetchall()
+    for cid, ts, commit, target, ok, wall_s in reversed(cycles):
+        lines = [
+            f"## {datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')}",
+            f"- action: run_all (cycle {cid}, commit {commit or '?'}, target {target or '?'})",
+            f"- result: {'ok' if ok else 'FAIL'} in {wall_s}s",
+            "",
+        ]
+        for name, code, dur in conn.execute(
+            "SELECT name, exit_code, duration_s FROM checks WHERE cycle_id = ? ORDER BY id", (cid,)
+        ):
+            lines.append(f"  - {'✅' if code == 0 else '❌'} {name} (exit {code}, {dur}s)")
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+
+def last_cycle_id(conn: sqlite3.Connection) -> int:
+    """Id of the newest recorded cycle, 0 when none is."""
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM cycles").fetchone()[0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Query the harness results store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest")
+    p.add_argument("run_summary", type=Path)
+    p = sub.add_parser("trend")
+    p.add_argument("check")
+    p.add_argument("--metric")
+    p.add_argument("--last", type=int, default=20)
+    p = sub.add_parser("first-failure")
+    p.add_argument("check")
+    p = sub.add_parser("flaky")
+    p.add_argument("--last", type=int, default=50)
+    p = sub.add_parser("flaky-steps")
+    p.add_argument("--last", type=int, default=50)
+    p = sub.add_parser("render")
+    p.add_argument("--last", type=int, default=1)
+    sub.add_parser("last-id")
+    p = sub.add_parser("bench")
+    p.add_argument("name")
+    p.add_argument("--last", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ingest":
+        print(record_run(json.loads(args.run_summary.read_text(encoding="utf-8"))))
+        return 0
+
+    with closing(connect()) as conn:
+        if args.cmd == "trend":
+            out: Any = trend(conn, args.check, args.metric, args.last)
+        elif args.cmd == "first-failure":
+            out = first_failure(conn, args.check)
+        elif args.cmd == "flaky":
+            out = flaky(conn, args.last)
+        elif args.cmd == "flaky-steps":
+            out = flaky_steps(conn, args.last)
+        elif args.cmd == "bench":
+            out = bench_history(conn, args.name, args.last)
+        elif args.cmd == "last-id":
+            out = last_cycle_id(conn)
+        else:
+            sys.stdout.write(render(conn, args.last))
+            return 0
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Step-level retry with backoff and context checkpoints.
+
+A flaky click late in a flow used to cost the whole check. Instead, the
+scenario engine takes a `Checkpoint` (URL + localStorage + sessionStorage)
+before each action step; when the step raises, the page is brought back to
+the checkpoint and only that step is retried, with exponential backoff.
+
+Checkpoints restore what the browser can restore: if the failed step
+navigated away, the page goes back to the checkpoint URL with the
+checkpoint's storage; in-memory React state (e.g. the consult wizard's
+current step) is kept as long as the page did not navigate.
+
+Each retried step leaves a `StepAttempt` record; checks put them under
+`step_attempts` in their `console_summary.json`, `results_store.py` keeps
+them per cycle, and `python results_store.py flaky-steps` ranks chronically
+flaky steps. A step marked `"quarantine": true` in its spec gets a larger
+retry budget; exhausting it still fails the check, so real failures never
+turn green.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from playwright.async_api import Page
+
+from tracing import span
+
+T = TypeVar("T")
+
+ATTEMPTS = 3
+QUARANTINE_ATTEMPTS = 5
+BASE_DELAY_S = 0.4
+BACKOFF = 2.0
+
+SNAPSHOT_JS = """
+() => ({
+  local: Object.fromEntries(Object.keys(localStorage).map((k) => [k, localStorage.getItem(k)])),
+  session: Object.fromEntries(Object.keys(sessionStorage).map((k) => [k, sessionStorage.getItem(k)])),
+})
+"""
+
+RESTORE_JS = """
+(snap) => {
+  localStorage.clear();
+  sessionStorage.clear();
+  for (const [k, v] of Object.entries(snap.local)) localStorage.setItem(k, v);
+  for (const [k, v] of Object.entries(snap.session)) sessionStorage.setItem(k, v);
+}
+"""
+
+
+@dataclass
+class StepAttempt:
+    step: str
+    attempts: int
+    ok: bool
+    quarantined: bool = False
+    errors: Optional[List[str]] = None
+
+
+async def retry(
+    fn: Callable[[], Awaitable[T]],
+    name: str,
+    attempts: int = ATTEMPTS,
+    base_delay: float = BASE_DELAY_S,
+    before_retry: Optional[Callable[[], Awaitable[Any]]] = None,
+    errors: Optional[List[str]] = None,
+) -> Tuple[T, int]:
+    """Call `fn` up to `attempts` times; returns `(result, attempts_used)` or re-raises the last error.
+
+    Failed attempts' messages go to `errors`. The backoff only runs on the
+    failure path, so a healthy step costs nothing extra.
+    """
+    for i in range(attempts):
+        try:
+            with span("attempt", step=name, n=i + 1):
+                return await fn(), i + 1
+        except Exception as e:
+            if errors is not None:
+                errors.append(str(e).splitlines()[0] if str(e) else type(e).__name__)
+            if i == attempts - 1:
+                raise
+            await asyncio.sleep(base_delay * BACKOFF**i)
+            if before_retry is not None:
+                await before_retry()
+    raise AssertionError("unreachable")
+
+
+class Checkpoint:
+    """URL + storage of a page at a step boundary."""
+
+    def __init__(self, url: str, storage: Dict[str, Dict[str, str]]) -> None:
+        self.url = url
+        self.storage = storage
+        self.taken_at = time.time()
+
+    @classmethod
+    async def take(cls, page: Page) -> "Checkpoint":
+        try:
+            storage = await page.evaluate(SNAPSHOT_JS)
+        except Exception:
+            # about:blank and friends have no storage to snapshot.
+            storage = {"local": {}, "session": {}}
+        return cls(page.url, storage)
+
+    async def restore(self, page: Page, goto: Callable[[str], Awaitable[Any]]) -> None:
+        """Return to the checkpoint; only navigates when the failed step left the checkpoint URL."""
+        with span("checkpoint.restore", url=self.url):
+            if page.url == self.url:
+                return
+            await goto(self.url)
+            await page.evaluate(RESTORE_JS, self.storage)
+            await goto(self.url)
+
+
+def as_records(attempts: List[StepAttempt]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in asdict(a).items() if v is not None} for a in attempts]
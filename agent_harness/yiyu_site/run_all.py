@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Run every closed-loop check against one shared browser.
+
+Instead of paying a Chromium cold start per script, this launches a single
+browser and gives each check its own isolated `BrowserContext`, running up to
+`--concurrency` checks at the same time on the async Playwright API.
+
+The Node checks (`run_p0_ix_*.mjs`) are discovered alongside and run as
+`node` subprocesses in the same bounded pool, with `YIYU_BASE` and
+`YIYU_EVIDENCE_ROOT` pointing them at this run's target and evidence dir.
+Every check, Python or Node, gets `--timeout` seconds (exit code 1 past it).
+As each check finishes its result, with the assertions and console counts
+parsed from its `console_summary.json`, is appended to
+`evidence/<run>/results.jsonl` and a status line goes to stderr.
+
+Each check still writes its own `console_summary.json` (under
+`evidence/<run>/<check>/`) and keeps its exit-code contract; the run summary
+lands in `evidence/<run>/run_summary.json`. The scenario specs
+(scenarios.json) are checks too, named after the scripts they replaced
+(`run_p0_ix_05`..`08`); whichever of them are selected run together as one
+shared-lane plan in one pool slot, but each gets its own result and
+evidence dir. `scenarios` on the command line selects all of them.
+
+With `--shards N` the checks are spread over N worker processes, each with its
+own browser. Shards are filled longest-job-first from the durations recorded
+by earlier runs (`evidence/durations.json`) so they finish at about the same
+time; the merged summary adds per-worker utilisation.
+
+Console messages, page errors, failed requests and dialogs from all checks
+(Node checks: their console errors/warnings, folded in from
+`console_summary.json`) are deduplicated by fingerprint (events.py) into
+`evidence/<run>/events.json`,
+distinct problems ranked by frequency; the top ones go into the run summary.
+
+Every run exports its tracing spans (see tracing.py) as
+`evidence/<run>/trace.json` (Chrome trace events) and `trace.folded`
+(flame graph input), with the top self-time spans in the run summary.
+
+Usage:
+  python run_all.py                      # all checks, concurrency 4
+  python run_all.py -c 2 scenarios       # selected checks (all scenario specs)
+  python run_all.py --shards 3           # 3 processes x 3 browsers
+  python run_all.py --changed HEAD~1..HEAD   # only checks the diff affects
+  python run_all.py run_p0_ix_09 run_p0_ix_10 --timeout 120
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Browser, async_playwright
+
+from harness import (
+    BASE,
+    EVIDENCE_DIR,
+    HERE,
+    TARGET,
+    ensure_target,
+    launch_browser,
+    new_context,
+    PW_TRACE_FILE,
+    close_context,
+    save_json,
+    ts_dir,
+)
+from events import EVENTS
+from resources import policy_stats
+from scenarios import check_names as scenario_checks
+from tracing import TRACER, export, set_track, span, take_init_spans
+
+SMOKE = "check_site"
+SCENARIOS = "scenarios"
+DURATIONS_FILE = EVIDENCE_DIR / "durations.json"
+DURATION_HISTORY = 5
+DEFAULT_DURATION_S = 30.0
+CHECK_TIMEOUT_S = float(os.environ.get("YIYU_CHECK_TIMEOUT_S", "300"))
+NODE_OUTPUT_TAIL = 4000
+
+
+def discover_checks() -> List[str]:
+    """Names of all checks: the smoke check, `run_p0_ix_*.py`, the scenario specs and `run_p0_ix_*.mjs`."""
+    python = [SMOKE] + sorted([*(p.stem for p in HERE.glob("run_p0_ix_*.py")), *scenario_checks()])
+    return python + sorted(p.stem for p in HERE.glob("run_p0_ix_*.mjs") if p.stem not in python)
+
+
+def is_node_check(name: str) -> bool:
+    return (HERE / f"{name}.mjs").is_file() and not (HERE / f"{name}.py").is_file()
+
+
+def is_scenario_check(name: str) -> bool:
+    return name in scenario_checks()
+
+
+def fold_node_events(name: str, evidence_root: Path) -> None:
+    """Feed a Node check's console messages (waits.mjs `ConsoleLog`) into the run-wide `EVENTS`.
+
+    Python checks feed `EVENTS` live; Node checks only leave counts and capped
+    distinct messages in their `console_summary.json`.
+    """
+    try:
+        summary = json.loads((evidence_root / "console_summary.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    console = summary.get("console") or {}
+    folded: Dict[str, int] = {}
+    for m in console.get("messages") or []:
+        EVENTS.add(m["kind"], m["text"], m.get("where"), name, n=m["count"])
+        folded[m["kind"]] = folded.get(m["kind"], 0) + m["count"]
+    # Messages past the Node-side cap still count towards the totals.
+    missing = {
+        kind: console.get(key, 0) - folded.get(kind, 0)
+        for kind, key in (("console.error", "error_count"), ("console.warning", "warning_count"))
+    }
+    missing = {k: v for k, v in missing.items() if v > 0}
+    if missing:
+        EVENTS.merge({"totals": missing, "dropped": sum(missing.values()), "buckets": []})
+
+
+def evidence_digest(evidence_root: Path) -> Dict[str, Any]:
+    """Failed assertions and console counts from a check's `console_summary.json` (either language)."""
+    try:
+        summary = json.loads((evidence_root / "console_summary.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    assertions = summary.get("assertions") or {}
+    console = summary.get("console") or {}
+    return {
+        "assertions": len(assertions),
+        "failed_assertions": sorted(k for k, v in assertions.items() if v is False),
+        "console_errors": console.get("error_count", 0),
+        "console_warnings": console.get("warning_count", 0),
+    }
+
+
+async def run_python_check(browser: Browser, name: str, evidence_root: Path, timeout: float) -> Dict[str, Any]:
+    error = None
+    code = 1
+    context = None
+    resources: Dict[str, int] = {}
+    try:
+        mod = importlib.import_module(name)
+        context = await new_context(browser, getattr(mod, "FIXTURE", None), getattr(mod, "RESOURCES", None))
+        code = await asyncio.wait_for(mod.run(context, evidence_root), timeout)
+    except asyncio.TimeoutError:
+        code = 1
+        error = f"timeout after {timeout:g}s"
+    except Exception:
+        # Mirrors an uncaught exception in a standalone script (exit code 1).
+        code = 1
+        error = traceback.format_exc(limit=5)
+    finally:
+        if context is not None:
+            resources = policy_stats(context)
+            await close_context(context, evidence_root / PW_TRACE_FILE if code != 0 else None)
+    out: Dict[str, Any] = {"exit_code": code, "error": error}
+    if resources:
+        out["resources"] = resources
+    return out
+
+
+async def run_node_check(name: str, evidence_root: Path, timeout: float) -> Dict[str, Any]:
+    node = shutil.which("node")
+    if node is None:
+        return {"exit_code": 1, "error": "node not found on PATH"}
+    env = {**os.environ, "YIYU_BASE": BASE, "YIYU_EVIDENCE_ROOT": str(evidence_root)}
+    proc = await asyncio.create_subprocess_exec(
+        node, str(HERE / f"{name}.mjs"),
+        cwd=str(HERE), env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    error = None
+    try:
+        output, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        code = proc.returncode
+    except asyncio.TimeoutError:
+        proc.kill()
+        output, _ = await proc.communicate()
+        code = 1
+        error = f"timeout after {timeout:g}s"
+    text = output.decode("utf-8", "replace")
+    (evidence_root / "node_output.log").write_text(text, encoding="utf-8")
+    if code != 0 and error is None:
+        # Node checks print only on failure; keep the end of it like a Python traceback.
+        error = text[-NODE_OUTPUT_TAIL:] or None
+    return {"exit_code": code, "error": error}
+
+
+def stream_result(run_root: Path, result: Dict[str, Any]) -> None:
+    with (run_root / "results.jsonl").open("a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    status = "ok" if result["exit_code"] == 0 else f"exit {result['exit_code']}"
+    print(f"[run_all] {result['name']}: {status} ({result['duration_s']}s)", file=sys.stderr, flush=True)
+
+
+async def run_scenario_checks(
+    browser: Browser, names: List[str], run_root: Path, sem: asyncio.Semaphore, timeout: float = CHECK_TIMEOUT_S
+) -> List[Dict[str, Any]]:
+    """Run scenario checks as one plan (see scenarios.run_specs); one result per check, same shape as `run_check`."""
+    from scenarios import run_specs
+
+    ids = scenario_checks()
+    roots = {ids[n]: run_root / n for n in names}
+    async with sem:
+        set_track(SCENARIOS)
+        for root in roots.values():
+            root.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        error = None
+        context = None
+        with span("check", name=SCENARIOS, checks=len(names)):
+            try:
+                context = await new_context(browser)
+                _, results = await asyncio.wait_for(run_specs(context, roots), timeout)
+            except asyncio.TimeoutError:
+                error = f"timeout after {timeout:g}s"
+            except Exception:
+                # Nothing ran to completion; every selected scenario counts as an uncaught exception.
+                error = traceback.format_exc(limit=5)
+            finally:
+                if context is not None:
+                    failed = [n for n in names if results.get(ids[n], {}).get("exit_code", 1) != 0]
+                    await close_context(context, run_root / failed[0] / PW_TRACE_FILE if failed else None)
+        wall_s = round(time.perf_counter() - started, 3)
+
+        outs = []
+        for name in names:
+            res = results.get(ids[name]) or {"exit_code": 1, "duration_s": wall_s, "error": error}
+            out = {
+                "name": name,
+                "exit_code": res["exit_code"],
+                "duration_s": res["duration_s"],
+                "evidence_dir": str(run_root / name),
+                "error": res["error"],
+                **evidence_digest(run_root / name),
+            }
+            stream_result(run_root, out)
+            outs.append(out)
+        return outs
+
+
+async def run_check(
+    browser: Browser, name: str, run_root: Path, sem: asyncio.Semaphore, timeout: float = CHECK_TIMEOUT_S
+) -> Dict[str, Any]:
+    if is_scenario_check(name):
+        return (await run_scenario_checks(browser, [name], run_root, sem, timeout))[0]
+    async with sem:
+        set_track(name)
+        evidence_root = run_root / name
+        evidence_root.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        node = is_node_check(name)
+        with span("check", name=name, node=node or None):
+            if node:
+                res = await run_node_check(name, evidence_root, timeout)
+                fold_node_events(name, evidence_root)
+            else:
+                res = await run_python_check(browser, name, evidence_root, timeout)
+        out = {
+            "name": name,
+            "exit_code": res["exit_code"],
+            "duration_s": round(time.perf_counter() - started, 3),
+            "evidence_dir": str(evidence_root),
+            "error": res["error"],
+            **evidence_digest(evidence_root),
+        }
+        if node:
+            out["runtime"] = "node"
+        if "resources" in res:
+            out["resources"] = res["resources"]
+        stream_result(run_root, out)
+        return out
+
+
+async def run_group(
+    browser: Optional[Browser], names: List[str], run_root: Path, sem: asyncio.Semaphore, timeout: float = CHECK_TIMEOUT_S
+) -> List[Dict[str, Any]]:
+    """Run `names` in the pool, the scenario checks among them as one plan; results in `names` order."""
+    scenario = [n for n in names if is_scenario_check(n)]
+
+    async def single(name: str) -> List[Dict[str, Any]]:
+        return [await run_check(browser, name, run_root, sem, timeout)]
+
+    batches = await asyncio.gather(
+        *([run_scenario_checks(browser, scenario, run_root, sem, timeout)] if scenario else []),
+        *(single(n) for n in names if n not in scenario),
+    )
+    by_name = {r["name"]: r for batch in batches for r in batch}
+    return [by_name[n] for n in names]
+
+
+async def run_checks(
+    names: List[str], run_root: Path, concurrency: int, shared_browser: bool = True, timeout: float = CHECK_TIMEOUT_S
+) -> List[Dict[str, Any]]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+    async with async_playwright() as p:
+        # A Node-only selection never touches the Python browser.
+        browser = await launch_browser(p, shared=shared_browser) if not all(map(is_node_check, names)) else None
+        try:
+            return await run_group(browser, names, run_root, sem, timeout)
+        finally:
+            if browser is not None:
+                await browser.close()
+
+
+def load_durations() -> Dict[str, List[float]]:
+    try:
+        return json.loads(DURATIONS_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def record_durations(results: List[Dict[str, Any]]) -> None:
+    history = load_durations()
+    for r in results:
+        runs = history.setdefault(r["name"], [])
+        runs.append(r["duration_s"])
+        del runs[:-DURATION_HISTORY]
+    DURATIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    save_json(DURATIONS_FILE, history)
+
+
+def expected_duration(history: Dict[str, List[float]], name: str) -> float:
+    """Median of the recorded runs; unseen checks get the median of the known ones."""
+
+    def median(xs: List[float]) -> float:
+        xs = sorted(xs)
+        return xs[len(xs) // 2]
+
+    if history.get(name):
+        return median(history[name])
+    known = [median(v) for v in history.values() if v]
+    return median(known) if known else DEFAULT_DURATION_S
+
+
+def plan_shards(names: List[str], shards: int, history: Dict[str, List[float]]) -> List[List[str]]:
+    """Longest-processing-time-first: biggest check goes to the least-loaded shard."""
+    bins: List[List[str]] = [[] for _ in range(max(1, shards))]
+    loads = [0.0] * len(bins)
+    for name in sorted(names, key=lambda n: -expected_duration(history, n)):
+        i = loads.index(min(loads))
+        bins[i].append(name)
+        loads[i] += expected_duration(history, name)
+    return [b for b in bins if b]
+
+
+def _run_shard(worker: int, names: List[str], run_root: str, concurrency: int, timeout: float) -> Dict[str, Any]:
+    # Forked/reused workers inherit earlier spans and events; ship back only this shard's.
+    TRACER.events.clear()
+    EVENTS.reset()
+    started = time.perf_counter()
+    # Each shard owns its browser; attaching all of them to the daemon would
+    # recreate the single-browser bottleneck sharding is meant to remove.
+    results = asyncio.run(run_checks(names, Path(run_root), concurrency, shared_browser=False, timeout=timeout))
+    return {
+        "worker": worker,
+        "checks": names,
+        "wall_s": round(time.perf_counter() - started, 3),
+        "busy_s": round(sum(r["duration_s"] for r in results), 3),
+        "results": results,
+        "spans": TRACER.events,
+        "events": EVENTS.to_json(),
+    }
+
+
+def run_sharded(
+    names: List[str], run_root: Path, shards: int, concurrency: int, timeout: float = CHECK_TIMEOUT_S
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    plan = plan_shards(names, shards, load_durations())
+    with ProcessPoolExecutor(max_workers=len(plan)) as pool:
+        futures = [
+            pool.submit(_run_shard, i, shard, str(run_root), concurrency, timeout)
+            for i, shard in enumerate(plan)
+        ]
+        workers = [f.result() for f in futures]
+
+    TRACER.events.extend(e for w in workers for e in w.pop("spans"))
+    for w in workers:
+        EVENTS.merge(w.pop("events"))
+    by_name = {r["name"]: r for w in workers for r in w.pop("results")}
+    # Keep the serial ordering so merged reports diff cleanly against a serial run.
+    return [by_name[n] for n in names], workers
+
+
+def run_visual_diff(results: List[Dict[str, Any]], gate: bool) -> None:
+    """Compare each check's screenshots to its baselines; `gate` turns changes into exit code 2."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from visual_diff import MAX_WORKERS, diff_dir
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        diffs = list(pool.map(lambda r: diff_dir(Path(r["evidence_dir"]), r["name"]), results))
+    for r, d in zip(results, diffs):
+        r["visual"] = {"changed": d.get("changed", []), "skipped": d.get("skipped")}
+        if gate and d.get("changed") and r["exit_code"] == 0:
+            r["exit_code"] = 2
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("checks", nargs="*", help="module names (default: all)")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("--shards", type=int, default=0, help="worker processes (0 = single browser)")
+    ap.add_argument(
+        "--timeout", type=float, default=CHECK_TIMEOUT_S, help="per-check timeout in seconds (env YIYU_CHECK_TIMEOUT_S)"
+    )
+    ap.add_argument(
+        "--changed",
+        metavar="GIT_RANGE",
+        help="only run checks affected by this diff range (plus the smoke set), see impact.py",
+    )
+    ap.add_argument("--no-store", action="store_true", help="don't record the run in results.db")
+    ap.add_argument(
+        "--visual",
+        choices=["off", "report", "gate"],
+        default="report",
+        help="visual regression against visual_baselines/ (gate: changes fail the check)",
+    )
+    ap.add_argument(
+        "--pw-trace",
+        choices=["off", "on-failure"],
+        help="record Playwright traces, keeping playwright-trace.zip for failing checks (env YIYU_PW_TRACE)",
+    )
+    ap.add_argument(
+        "--coverage",
+        action="store_true",
+        help="add per-route JS/CSS bundle coverage to smoke_check_site (env YIYU_COVERAGE=1)",
+    )
+    ap.add_argument(
+        "--keep-raw-evidence",
+        action="store_true",
+        help="leave screenshots as plain files instead of moving them into evidence/store",
+    )
+    args = ap.parse_args(argv)
+    if args.pw_trace:
+        os.environ["YIYU_PW_TRACE"] = args.pw_trace
+    if args.coverage:
+        os.environ["YIYU_COVERAGE"] = "1"
+
+    names = args.checks or discover_checks()
+    if SCENARIOS in names:
+        names = [m for n in names for m in (list(scenario_checks()) if n == SCENARIOS else [n])]
+    if args.changed:
+        from impact import changed_files, select
+
+        affected = set(select(changed_files(args.changed)))
+        names = [n for n in names if n in affected]
+    run_root = EVIDENCE_DIR / ts_dir()
+    run_root.mkdir(parents=True, exist_ok=True)
+
+    with span("target"):
+        ensure_target()
+    started = time.perf_counter()
+    workers: Optional[List[Dict[str, Any]]] = None
+    with span("checks", count=len(names), shards=args.shards or None):
+        if args.shards > 0:
+            results, workers = run_sharded(names, run_root, args.shards, args.concurrency, args.timeout)
+        else:
+            results = asyncio.run(run_checks(names, run_root, args.concurrency, timeout=args.timeout))
+    wall_s = round(time.perf_counter() - started, 3)
+    record_durations(results)
+    if args.visual != "off":
+        with span("visual_diff"):
+            run_visual_diff(results, gate=args.visual == "gate")
+
+    ok = all(r["exit_code"] == 0 for r in results)
+    out: Dict[str, Any] = {
+        "ok": ok,
+        "base": BASE,
+        "target": TARGET,
+        "concurrency": args.concurrency,
+        "wall_s": wall_s,
+        "checks": results,
+        "events": EVENTS.summary(),
+        "ts": time.time(),
+    }
+    if workers is not None:
+        for w in workers:
+            # Share of the overall wall clock this worker spent running checks.
+            w["utilisation"] = round(w["busy_s"] / (wall_s * args.concurrency), 3) if wall_s else 0.0
+        out["shards"] = len(workers)
+        out["workers"] = workers
+    save_json(run_root / "events.json", EVENTS.to_json())
+    save_json(run_root / "run_summary.json", out)
+    if not args.no_store:
+        from results_store import record_run
+
+        with span("results_store"):
+            out["cycle_id"] = record_run(out)
+    if not args.keep_raw_evidence:
+        from evidence_store import ingest
+
+        with span("evidence_ingest"):
+            for r in results:
+                try:
+                    r["evidence_store"] = ingest(Path(r["evidence_dir"]), run_root.name, r["name"])
+                except Exception as e:
+                    # The raw evidence stays in place; the run summary still gets written.
+                    r["evidence_store"] = {"error": f"{type(e).__name__}: {e}"}
+    if TRACER.enabled:
+        out["trace"] = export(take_init_spans() + TRACER.events, run_root)
+    save_json(run_root / "run_summary.json", out)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+    if ok:
+        return 0
+    return max(r["exit_code"] for r in results)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,23 +2,33 @@
 set -euo pipefail
 cd "$(dirname "$0")"
 
-NOW="$(date '+%Y-%m-%d %H:%M:%S')"
-OUT=$(./init.sh 2>&1 || true)
+# init.sh only prepares the env + browser daemon here; run_all.py runs the
+# checks (smoke included) and records them in results.db.
+YIYU_INIT_SMOKE=0 ./init.sh > /dev/null 2>&1 || true
+source .venv/bin/activate
+mkdir -p .cache
+before=$(python results_store.py last-id)
+status=0
+python run_all.py > .cache/last_cycle.log 2>&1 || status=$?
+after=$(python results_store.py last-id)
 
-{
-  echo "## ${NOW}"
-  echo "- action: init+smoke"
-  echo "- result:"
-  echo ""
-  echo '```'
-  # NOTE: piping multi-line JSON through echo can get weird in some shells;
-  # write to a temp file then tail for stability.
-  _tmp_out="$(mktemp)"
-  printf '%s\n' "${OUT}" > "${_tmp_out}"
-  tail -n 120 "${_tmp_out}"
-  rm -f "${_tmp_out}"
-  echo '```'
-  echo ""
-} >> progress.log
+# Retention for the content-addressed evidence store.
+python evidence_store.py gc --max-age-days "${YIYU_EVIDENCE_MAX_AGE_DAYS:-14}" --max-mb "${YIYU_EVIDENCE_MAX_MB:-2048}" > /dev/null 2>&1 || true
+
+# progress.log stays as a human-readable view rendered from the store. A run_all
+# that died before recording its cycle gets an explicit failure entry instead of
+# the previous cycle rendered again.
+if [ "$after" != "$before" ]; then
+  python results_store.py render --last 1 >> progress.log
+else
+  {
+    echo "## $(date '+%Y-%m-%d %H:%M:%S')"
+    echo "- action: run_all (no cycle recorded)"
+    echo "- result: FAIL, run_all exited $status; last output (.cache/last_cycle.log):"
+    echo ""
+    tail -n 20 .cache/last_cycle.log | sed 's/^/    /'
+    echo ""
+  } >> progress.log
+fi
 
 echo "[cycle] done. progress appended."
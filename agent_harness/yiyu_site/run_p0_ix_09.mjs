@@ -14,25 +14,26 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, waitAppReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
   fs.writeFileSync(p, JSON.stringify(obj, null, 2), 'utf-8');
 }
 
-async function clickFooterLink(page, evidenceRoot, { linkText, shotPrefix, urlMatchers }) {
+async function clickFooterLink(page, evidenceRoot, waits, { linkText, shotPrefix, urlMatchers, route }) {
   await page.evaluate(() => window.scrollTo(0, document.body.scrollHeight));
-  await page.waitForTimeout(800);
 
   const footer = page.locator('footer');
   await footer.waitFor({ state: 'attached', timeout: 20_000 });
@@ -69,7 +70,7 @@ async function clickFooterLink(page, evidenceRoot, { linkText, shotPrefix, urlMa
     }
   }
 
-  await page.waitForTimeout(500);
+  if (matched) await waitAppReady(page, waits, route).catch(() => {});
   await page.screenshot({ path: path.join(evidenceRoot, `${shotPrefix}-after-click.png`), fullPage: true });
 
   return {
@@ -80,30 +81,29 @@ async function clickFooterLink(page, evidenceRoot, { linkText, shotPrefix, urlMa
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
+  const waits = new WaitLog();
 
   const browser = await chromium.launch({ headless: true });
   const context = await browser.newContext({ viewport: { width: 1280, height: 720 } });
   const page = await context.newPage();
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
   const homeUrl = `${BASE}/`;
-  await page.goto(homeUrl, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, homeUrl, waits, 'home');
   await page.screenshot({ path: path.join(evidenceRoot, 'ix09-home-entry.png'), fullPage: true });
 
   // 1) insights
-  const r1 = await clickFooterLink(page, evidenceRoot, {
+  const r1 = await clickFooterLink(page, evidenceRoot, waits, {
     // In current build footer column uses “行业洞察” entry.
     linkText: /行业洞察|前沿洞察/,
     shotPrefix: 'ix09-insights',
+    route: 'insights',
     urlMatchers: [
       '**?page=insights',
       '**?page=insights**',
@@ -112,14 +112,14 @@ async function main() {
   });
 
   // Some routes (e.g. insights) render without footer; return to home for the next footer action.
-  await page.goto(homeUrl, { waitUntil: 'networkidle', timeout: 60_000 });
-  await page.waitForTimeout(300);
+  await gotoReady(page, homeUrl, waits, 'home');
 
   // 2) consult apply
   // In current build footer uses “预约对话” (maps to consult-apply).
-  const r2 = await clickFooterLink(page, evidenceRoot, {
+  const r2 = await clickFooterLink(page, evidenceRoot, waits, {
     linkText: /预约对话|咨询申请|申请咨询/,
     shotPrefix: 'ix09-consult',
+    route: 'consult-apply',
     urlMatchers: [
       '**?page=consult-apply',
       '**consult-apply**',
@@ -142,18 +142,14 @@ async function main() {
       insights: r1,
       consult_apply: r2,
     },
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0
+  const ok = consoleLog.errorCount === 0
     && summary.assertions.navigated_to_insights
     && summary.assertions.navigated_to_consult_apply;
 
@@ -17,16 +17,18 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, waitAppReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
@@ -34,23 +36,21 @@ function writeJson(p, obj) {
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
+  const waits = new WaitLog();
 
   const urlOpen = `${BASE}/?page=learning`;
 
   const browser = await chromium.launch({ headless: true });
   const page = await browser.newPage({ viewport: { width: 1280, height: 720 } });
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
-  await page.goto(urlOpen, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, urlOpen, waits);
   await page.screenshot({ path: path.join(evidenceRoot, 'ix10-entry-learning-param.png'), fullPage: true });
 
   try {
@@ -59,7 +59,7 @@ async function main() {
     // keep going; we will record final_url + assertions
   }
 
-  await page.waitForTimeout(300);
+  await waitAppReady(page, waits, 'library').catch(() => {});
   await page.screenshot({ path: path.join(evidenceRoot, 'ix10-after-normalize.png'), fullPage: true });
 
   // Assert a stable piece of Library page content exists
@@ -84,18 +84,14 @@ async function main() {
       final_url_contains_page_library: finalUrl.includes('?page=library'),
       library_content_visible: okContent,
     },
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0 && summary.assertions.final_url_contains_page_library && okContent;
+  const ok = consoleLog.errorCount === 0 && summary.assertions.final_url_contains_page_library && okContent;
   process.exit(ok ? 0 : 2);
 }
 
@@ -14,17 +14,19 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 const REPORT_ID = process.env.YIYU_REPORT_ID || 'r_weiaiqianxing_training_20260105';
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
@@ -38,11 +40,12 @@ function parseDownloads(text) {
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
+  const waits = new WaitLog();
 
   const browser = await chromium.launch({ headless: true });
   const context = await browser.newContext({ viewport: { width: 1280, height: 720 } });
@@ -60,13 +63,10 @@ async function main() {
     try { window.sessionStorage.setItem('yiyu_current_user', JSON.stringify(user)); } catch {}
   });
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
   const urlOpen = `${BASE}/?page=report&id=${encodeURIComponent(REPORT_ID)}`;
-  await page.goto(urlOpen, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, urlOpen, waits, 'report');
   await page.screenshot({ path: path.join(evidenceRoot, 'ix11-report-detail-entry.png'), fullPage: true });
 
   const downloadsLine = page.getByText(/次下载/).first();
@@ -83,13 +83,11 @@ async function main() {
   // Wait for downloads number to bump
   let afterText = beforeText;
   let after = before;
-  const start = Date.now();
-  while (Date.now() - start < 15_000) {
+  await waits.until(async () => {
     afterText = (await downloadsLine.innerText()).trim();
     after = parseDownloads(afterText);
-    if (before != null && after != null && after === before + 1) break;
-    await page.waitForTimeout(250);
-  }
+    return before != null && after != null && after === before + 1;
+  }, 'downloads_bumped', { timeout: 15_000 });
 
   await page.screenshot({ path: path.join(evidenceRoot, 'ix11-after-click-download.png'), fullPage: true });
 
@@ -147,18 +145,14 @@ async function main() {
     open: urlOpen,
     downloads: { before_text: beforeText, before, after_text: afterText, after },
     pdf,
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0
+  const ok = consoleLog.errorCount === 0
     && before != null
     && after != null
     && after === before + 1
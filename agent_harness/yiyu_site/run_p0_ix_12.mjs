@@ -14,16 +14,18 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, waitAppReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
@@ -31,24 +33,22 @@ function writeJson(p, obj) {
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
+  const waits = new WaitLog();
 
   const browser = await chromium.launch({ headless: true });
   const context = await browser.newContext({ viewport: { width: 1280, height: 720 } });
   const page = await context.newPage();
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
   const bad = `bad_${Date.now()}`;
   const urlBad = `${BASE}/?page=${encodeURIComponent(bad)}`;
-  await page.goto(urlBad, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, urlBad, waits, '404');
   await page.screenshot({ path: path.join(evidenceRoot, 'ix12-unknown-page.png'), fullPage: true });
 
   const notFoundTitle = page.getByText('页面不存在', { exact: true });
@@ -57,7 +57,7 @@ async function main() {
   // Click go home
   const goHome = page.getByRole('button', { name: '返回首页' });
   await goHome.click({ timeout: 20_000 });
-  await page.waitForLoadState('networkidle', { timeout: 60_000 }).catch(() => {});
+  await waitAppReady(page, waits, 'home').catch(() => {});
   await page.screenshot({ path: path.join(evidenceRoot, 'ix12-after-go-home.png'), fullPage: true });
 
   const finalUrl = page.url();
@@ -75,18 +75,14 @@ async function main() {
     ui: {
       home_nav_count: hasHomeNav,
     },
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0
+  const ok = consoleLog.errorCount === 0
     && finalUrl.startsWith(`${BASE}/`)
     && !finalUrl.includes(`page=${encodeURIComponent(bad)}`)
     && hasHomeNav > 0;
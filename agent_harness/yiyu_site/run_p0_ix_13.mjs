@@ -16,16 +16,18 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
@@ -33,21 +35,19 @@ function writeJson(p, obj) {
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
   const failedRequests = [];
   const viteSvgResponses = [];
+  const waits = new WaitLog();
 
   const browser = await chromium.launch({ headless: true });
   const page = await browser.newPage({ viewport: { width: 1280, height: 720 } });
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
   page.on('requestfailed', (req) => {
     const url = req.url();
@@ -62,7 +62,9 @@ async function main() {
   });
 
   const openUrl = `${BASE}/`;
-  await page.goto(openUrl, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, openUrl, waits, 'home');
+  // The favicon/vite.svg requests are issued by the browser after parse; let them land.
+  await waits.timed('load_event', () => page.waitForLoadState('load', { timeout: 60_000 }));
   await page.screenshot({ path: path.join(evidenceRoot, 'ix13-home.png'), fullPage: true });
 
   // Extract resolved favicon href from DOM
@@ -115,18 +117,14 @@ async function main() {
       root_vite_svg: rootViteSvg,
       saw_root_vite_svg_404: sawRootViteSvg404,
     },
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0
+  const ok = consoleLog.errorCount === 0
     && faviconStatus === 200
     && sawRootViteSvg404 === false;
 
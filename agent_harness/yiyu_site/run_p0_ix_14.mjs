@@ -14,16 +14,18 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { chromium } from 'playwright';
+import { ConsoleLog, WaitLog, gotoReady, resolveBase } from './waits.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-const BASE = (process.env.YIYU_BASE || 'https://guyuan9300.github.io/yiyu-think-tank-website/').replace(/\/+$/, '');
+const BASE = resolveBase();
 
 function tsDir() {
   const d = new Date();
   const pad = (n) => String(n).padStart(2, '0');
-  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}`;
+  const rand = Math.random().toString(16).slice(2, 8);
+  return `${d.getFullYear()}${pad(d.getMonth() + 1)}${pad(d.getDate())}-${pad(d.getHours())}${pad(d.getMinutes())}${pad(d.getSeconds())}-${rand}`;
 }
 
 function writeJson(p, obj) {
@@ -31,21 +33,19 @@ function writeJson(p, obj) {
 }
 
 async function main() {
-  const evidenceRoot = path.join(__dirname, 'evidence', tsDir());
+  // run_all.py passes the check's evidence dir; standalone runs get a fresh one.
+  const evidenceRoot = process.env.YIYU_EVIDENCE_ROOT || path.join(__dirname, 'evidence', tsDir());
   fs.mkdirSync(evidenceRoot, { recursive: true });
 
-  const consoleErrors = [];
-  const consoleWarnings = [];
+  const consoleLog = new ConsoleLog();
   const dialogs = [];
+  const waits = new WaitLog();
 
   const browser = await chromium.launch({ headless: true });
   const context = await browser.newContext({ viewport: { width: 1280, height: 720 } });
   const page = await context.newPage();
 
-  page.on('console', (msg) => {
-    if (msg.type() === 'error') consoleErrors.push(msg.text());
-    else if (msg.type() === 'warning') consoleWarnings.push(msg.text());
-  });
+  consoleLog.attach(page);
 
   page.on('dialog', async (d) => {
     dialogs.push({ type: d.type(), message: d.message() });
@@ -53,24 +53,23 @@ async function main() {
   });
 
   const openUrl = `${BASE}/?page=strategy`;
-  await page.goto(openUrl, { waitUntil: 'networkidle', timeout: 60_000 });
+  await gotoReady(page, openUrl, waits, 'strategy');
 
   // Wait for Strategy page to render (a stable text on the page)
   await page.getByText('合作方式').first().waitFor({ timeout: 30_000 });
 
   // Scroll to footer
   await page.evaluate(() => window.scrollTo(0, document.body.scrollHeight));
-  await page.waitForTimeout(800);
-  await page.screenshot({ path: path.join(evidenceRoot, 'ix14-strategy-footer.png'), fullPage: true });
-
   const footer = page.locator('footer');
-  await footer.waitFor({ state: 'visible', timeout: 20_000 });
+  await waits.timed('footer_visible', () => footer.waitFor({ state: 'visible', timeout: 20_000 }));
+
+  await page.screenshot({ path: path.join(evidenceRoot, 'ix14-strategy-footer.png'), fullPage: true });
   const link = footer.locator('a', { hasText: '战略规划' }).first();
   await link.waitFor({ state: 'visible', timeout: 20_000 });
 
   // Trigger dialog
   await link.click({ timeout: 20_000 });
-  await page.waitForTimeout(500);
+  await waits.until(() => dialogs.length >= 1, 'dialog:战略规划');
 
   await page.screenshot({ path: path.join(evidenceRoot, 'ix14-after-click.png'), fullPage: true });
 
@@ -91,18 +90,14 @@ async function main() {
       dialogs,
       text: dialogText,
     },
-    console: {
-      error_count: consoleErrors.length,
-      warning_count: consoleWarnings.length,
-      errors_sample: consoleErrors.slice(0, 10),
-      warnings_sample: consoleWarnings.slice(0, 10),
-    },
+    console: consoleLog.summary(),
+    waits: waits.summary(),
     ts: Date.now() / 1000,
   };
 
   writeJson(path.join(evidenceRoot, 'console_summary.json'), summary);
 
-  const ok = consoleErrors.length === 0
+  const ok = consoleLog.errorCount === 0
     && dialogs.length >= 1
     && /暂未开放/.test(dialogText)
     && /vBuild-1\.0/.test(dialogText)
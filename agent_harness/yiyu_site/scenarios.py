@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Declarative scenario engine for the P0 closed-loop checks.
+
+A scenario is a compact spec in `scenarios.json` (next to `feature_list.json`):
+
+    {
+      "id": "P0-IX-06",
+      "check": "P0-IX-06_about_intro_modal_deeplink_and_cleanup",
+      "fixture": null,
+      "steps": [
+        {"goto": "?page=about&intro=1", "route": "about"},
+        {"assert_visible": {"role": "dialog", "name": "介绍视频"}, "name": "modal_auto_open"},
+        {"click": {"role": "button", "name": "关闭", "exact": true,
+                   "within": {"role": "dialog", "name": "介绍视频"}}},
+        {"assert_url": {"not_contains": ["intro=1"]}, "name": "url_cleaned_after_close"}
+      ]
+    }
+
+Steps (one op per step, plus optional `name` for assertions and `timeout` in ms):
+
+- `goto`: `?page=...` query (route defaults to its `page=`, else home)
+- `seed`: `{key: value}` written to localStorage of the current page
+- `click` / `fill` (`value`) / `wait` (`state`): on a locator
+- `screenshot`: full-page PNG into the evidence dir
+- `assert_visible`, `assert_value` (`equals`), `assert_url` (`contains` /
+  `not_contains`), `assert_storage` (`key`, `path`, `equals`),
+  `assert_dialog` (`count`, `contains`; dialogs are auto-accepted)
+
+Locators: `role` + `name`/`exact`, `placeholder`, `text`, `label` or `css`,
+narrowed by `within` (another locator) and `first` / `last` / `nth`.
+Strings may use `${var}` from the spec's `vars` and the builtins
+`SUBSCRIBED_EMAIL` and `hhmmss`.
+
+`compile_plan()` validates every spec and packs them into lanes: one
+`BrowserContext` per lane, lanes grouped by fixture and resource policy
+(`"resources": "fast"`, see resources.py; specs that take screenshots must
+stay on the default `full`), scenarios within a lane
+run one after another on fresh pages with storage reset to the fixture in
+between. Lanes run concurrently.
+
+Action steps are checkpointed and retried on their own with backoff (see
+retry.py; `"retries": N` / `"quarantine": true` per step); assertions are
+never retried.
+
+Each scenario is still its own check, named after the script it replaced
+(`P0-IX-05` -> `run_p0_ix_05`, see `check_name()`): run_all.py discovers
+and reports it under that name, and `run_specs()` gives it its own evidence
+dir with `<id>.json` (step log), screenshots, a failing lane's Playwright
+trace and a `console_summary.json`. It keeps the old exit-code contract
+(1 = a step raised, 2 = failed assertion or console errors). Run
+standalone, the per-scenario dirs sit under one evidence dir whose
+`console_summary.json` carries every `assertions` entry as `<id>.<name>`.
+
+Usage:
+  python scenarios.py                 # every scenario
+  python scenarios.py P0-IX-06 ...    # selected scenarios (or run_p0_ix_06 ...)
+  python scenarios.py --plan          # print the compiled plan
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from playwright.async_api import BrowserContext, Locator, Page
+
+from fixtures import SUBSCRIBED_EMAIL, build_state
+from harness import (
+    BASE,
+    HERE,
+    PW_TRACE_FILE,
+    ConsoleLog,
+    close_context,
+    new_context,
+    page_url,
+    run_standalone,
+    save_json,
+)
+from resources import POLICIES, policy_stats, resolve
+from retry import ATTEMPTS, QUARANTINE_ATTEMPTS, Checkpoint, StepAttempt, as_records, retry
+from tracing import set_track, span
+from waits import WaitLog, goto_ready
+
+CHECK = "scenarios"
+SPECS_FILE = HERE / "scenarios.json"
+LANES = int(os.environ.get("YIYU_SCENARIO_LANES", "4"))
+
+DEFAULT_TIMEOUT_MS = 20000
+
+ACTIONS = {"goto", "seed", "click", "fill", "wait", "screenshot"}
+ASSERTIONS = {"assert_visible", "assert_value", "assert_url", "assert_storage", "assert_dialog"}
+LOCATOR_OPS = {"click", "fill", "wait", "assert_visible", "assert_value"}
+LOCATOR_KINDS = ("role", "placeholder", "text", "label", "css")
+
+# Reset a lane's origin to exactly the fixture's localStorage between scenarios.
+RESET_JS = """
+(entries) => {
+  localStorage.clear();
+  sessionStorage.clear();
+  for (const e of entries) localStorage.setItem(e.name, e.value);
+}
+"""
+
+
+class SpecError(ValueError):
+    pass
+
+
+@dataclass
+class Lane:
+    fixture: Optional[str]
+    resources: str = "full"
+    scenarios: List[Dict[str, Any]] = field(default_factory=list)
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+def load_specs(path: Path = SPECS_FILE) -> List[Dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def check_name(spec: Dict[str, Any]) -> str:
+    """run_all / results.db name of a spec: `P0-IX-05` -> `run_p0_ix_05`."""
+    return "run_" + spec["id"].lower().replace("-", "_")
+
+
+def check_names() -> Dict[str, str]:
+    """check name -> spec id, in spec order."""
+    return {check_name(s): s["id"] for s in load_specs()}
+
+
+def _expand(obj: Any, env: Dict[str, str]) -> Any:
+    if isinstance(obj, str):
+        return Template(obj).substitute(env)
+    if isinstance(obj, list):
+        return [_expand(x, env) for x in obj]
+    if isinstance(obj, dict):
+        return {k: _expand(v, env) for k, v in obj.items()}
+    return obj
+
+
+def _check_locator(sid: str, i: int, loc: Any) -> None:
+    if not isinstance(loc, dict) or sum(k in loc for k in LOCATOR_KINDS) != 1:
+        raise SpecError(f"{sid} step {i}: locator needs exactly one of {LOCATOR_KINDS}: {loc!r}")
+    if "within" in loc:
+        _check_locator(sid, i, loc["within"])
+
+
+def compile_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one spec and expand its `${vars}`; raises `SpecError` on the first problem."""
+    sid = spec.get("id")
+    if not sid or not spec.get("steps"):
+        raise SpecError(f"scenario needs an id and steps: {spec!r}")
+    env = {"SUBSCRIBED_EMAIL": SUBSCRIBED_EMAIL, "hhmmss": datetime.now().strftime("%H%M%S")}
+    try:
+        for k, v in (spec.get("vars") or {}).items():
+            env[k] = Template(v).substitute(env)
+        steps = _expand(spec["steps"], env)
+    except (KeyError, ValueError) as e:
+        raise SpecError(f"{sid}: bad ${{var}} reference: {e}") from None
+
+    for i, step in enumerate(steps):
+        ops = [k for k in step if k in ACTIONS | ASSERTIONS]
+        if len(ops) != 1:
+            raise SpecError(f"{sid} step {i}: expected exactly one op, got {sorted(step)}")
+        if ops[0] in LOCATOR_OPS:
+            _check_locator(sid, i, step[ops[0]])
+    if spec.get("resources", "full") not in POLICIES:
+        raise SpecError(f"{sid}: resources must be one of {POLICIES}")
+    if spec.get("resources") == "fast" and any("screenshot" in step for step in steps):
+        # `fast` stubs images and fonts; screenshots taken under it break the visual baselines.
+        raise SpecError(f"{sid}: screenshot steps need full resources")
+    return {**spec, "steps": steps, "fixture": spec.get("fixture"), "resources": resolve(spec.get("resources"))}
+
+
+def compile_plan(specs: List[Dict[str, Any]], lanes: int = LANES) -> List[Lane]:
+    """Group compiled specs by (fixture, resources) and spread each group over its share of `lanes` contexts."""
+    groups: Dict[Tuple[Optional[str], str], List[Dict[str, Any]]] = {}
+    for spec in specs:
+        compiled = compile_spec(spec)
+        groups.setdefault((compiled["fixture"], compiled["resources"]), []).append(compiled)
+
+    # Every group gets one lane; spare lanes go to whichever group has the most scenarios per lane.
+    share = {fx: 1 for fx in groups}
+    for _ in range(max(0, lanes - len(groups))):
+        fx = max(groups, key=lambda f: len(groups[f]) / share[f])
+        if share[fx] >= len(groups[fx]):
+            break
+        share[fx] += 1
+
+    plan: List[Lane] = []
+    for fx, scenarios in groups.items():
+        group = [Lane(*fx) for _ in range(share[fx])]
+        for i, s in enumerate(scenarios):
+            group[i % len(group)].scenarios.append(s)
+        plan.extend(group)
+    return plan
+
+
+def locate(page: Page, spec: Dict[str, Any]) -> Locator:
+    root = locate(page, spec["within"]) if "within" in spec else page
+    exact = spec.get("exact")
+    if "role" in spec:
+        loc = root.get_by_role(spec["role"], name=spec.get("name"), exact=exact)
+    elif "placeholder" in spec:
+        loc = root.get_by_placeholder(spec["placeholder"], exact=exact)
+    elif "text" in spec:
+        loc = root.get_by_text(spec["text"], exact=exact)
+    elif "label" in spec:
+        loc = root.get_by_label(spec["label"], exact=exact)
+    else:
+        loc = root.locator(spec["css"])
+    if spec.get("first"):
+        return loc.first
+    if spec.get("last"):
+        return loc.last
+    if "nth" in spec:
+        return loc.nth(spec["nth"])
+    return loc
+
+
+def _op(step: Dict[str, Any]) -> str:
+    return next(k for k in step if k in ACTIONS | ASSERTIONS)
+
+
+def _label(op: str, arg: Any) -> str:
+    if isinstance(arg, dict):
+        kind = next((k for k in LOCATOR_KINDS if k in arg), None)
+        if kind:
+            return f"{op}:{arg.get('name') or arg[kind]}"
+    return f"{op}:{arg}" if isinstance(arg, str) else op
+
+
+def _dig(value: Any, path: Optional[str]) -> Any:
+    for part in path.split(".") if path else []:
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+class ScenarioRun:
+    """Executes one compiled spec on a fresh page of its lane's context.
+
+    `evidence_root=None` (load.py) skips the per-scenario step log; such specs carry no screenshots.
+    """
+
+    def __init__(self, spec: Dict[str, Any], page: Page, evidence_root: Optional[Path]) -> None:
+        self.spec = spec
+        self.page = page
+        self.evidence_root = evidence_root
+        self.console = ConsoleLog()
+        self.waits = WaitLog()
+        self.dialogs: List[str] = []
+        self.assertions: Dict[str, bool] = {}
+        self.log: List[Dict[str, Any]] = []
+        self.attempts: List[StepAttempt] = []
+        self.console.attach(page)
+        page.on("dialog", self._on_dialog)
+
+    async def _on_dialog(self, d) -> None:
+        self.dialogs.append(d.message)
+        self.console.dialog(d)
+        await d.accept()
+
+    async def step(self, i: int, step: Dict[str, Any]) -> None:
+        op = _op(step)
+        arg = step[op]
+        timeout = step.get("timeout", DEFAULT_TIMEOUT_MS)
+        page = self.page
+        started = time.perf_counter()
+        entry: Dict[str, Any] = {"i": i, "op": op, "label": _label(op, arg)}
+
+        with span(f"step.{op}", label=entry["label"]) as attrs:
+            if op in ACTIONS:
+                entry["attempts"] = await self._act_with_retry(i, op, arg, step, attrs)
+            else:
+                passed, observed = await self._assert(op, arg, timeout)
+                name = step.get("name") or f"{op}_{i}"
+                self.assertions[name] = passed
+                entry.update({"name": name, "passed": passed, "observed": observed})
+
+        entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        entry["url"] = page.url
+        self.log.append(entry)
+
+    async def _act_with_retry(self, i: int, op: str, arg: Any, step: Dict[str, Any], attrs: Dict[str, Any]) -> int:
+        """Run an action step, retrying just this step from its checkpoint; returns the attempts used."""
+        page = self.page
+        quarantined = bool(step.get("quarantine"))
+        budget = step.get("retries", QUARANTINE_ATTEMPTS if quarantined else ATTEMPTS)
+        # goto re-navigates on its own; every other action resumes from where the step started.
+        checkpoint = None if op == "goto" else await Checkpoint.take(page)
+        errors: List[str] = []
+
+        async def before_retry() -> None:
+            if checkpoint is not None:
+                await checkpoint.restore(page, lambda url: goto_ready(page, url, self.waits))
+
+        record = StepAttempt(f"{self.spec['id']}/{i}:{_label(op, arg)}", budget, False, quarantined)
+        try:
+            _, record.attempts = await retry(
+                lambda: self._act(op, arg, step, attrs), record.step, budget, before_retry=before_retry, errors=errors
+            )
+            record.ok = True
+            return record.attempts
+        finally:
+            record.errors = errors or None
+            self.attempts.append(record)
+
+    async def _act(self, op: str, arg: Any, step: Dict[str, Any], attrs: Dict[str, Any]) -> None:
+        page = self.page
+        timeout = step.get("timeout", DEFAULT_TIMEOUT_MS)
+        if op == "goto":
+            route = step.get("route") or _route_of(arg)
+            attrs["url"] = page_url(arg)
+            await goto_ready(page, attrs["url"], self.waits, route=route)
+        elif op == "seed":
+            entries = [{"name": k, "value": v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)} for k, v in arg.items()]
+            await page.evaluate("(entries) => { for (const e of entries) localStorage.setItem(e.name, e.value); }", entries)
+        elif op == "click":
+            await locate(page, arg).click(timeout=timeout)
+        elif op == "fill":
+            await locate(page, arg).fill(arg["value"], timeout=timeout)
+        elif op == "wait":
+            async with self.waits.timed(_label(op, arg)):
+                await locate(page, arg).wait_for(state=arg.get("state", "visible"), timeout=timeout)
+        else:  # screenshot
+            attrs["bytes"] = len(await page.screenshot(path=str(self.evidence_root / f"{arg}.png"), full_page=True))
+
+    async def _assert(self, op: str, arg: Any, timeout: int) -> tuple[bool, Any]:
+        page = self.page
+        if op == "assert_visible":
+            try:
+                async with self.waits.timed(_label(op, arg)):
+                    await locate(page, arg).wait_for(state="visible", timeout=timeout)
+                return True, None
+            except Exception as e:
+                return False, str(e).splitlines()[0]
+        if op == "assert_value":
+            loc = locate(page, arg)
+            await loc.wait_for(timeout=timeout)
+            value = await loc.input_value()
+            return value == arg["equals"], value
+        if op == "assert_url":
+            url = page.url
+            ok = all(s in url for s in arg.get("contains", [])) and not any(
+                s in url for s in arg.get("not_contains", [])
+            )
+            return ok, url
+        if op == "assert_storage":
+            raw = await page.evaluate("(k) => localStorage.getItem(k)", arg["key"])
+            try:
+                value = _dig(json.loads(raw), arg.get("path")) if raw else None
+            except ValueError:
+                value = raw
+            ok = value is not None if "equals" not in arg else value == arg["equals"]
+            return ok, value
+        # assert_dialog
+        count = arg.get("count", 1)
+        seen = await self.waits.until(lambda: len(self.dialogs) >= count, f"dialog:{count}", timeout=timeout / 1000)
+        ok = seen and arg.get("contains", "") in self.dialogs[count - 1]
+        return ok, self.dialogs[count - 1] if seen else None
+
+    async def execute(self) -> Dict[str, Any]:
+        sid = self.spec["id"]
+        started = time.perf_counter()
+        error = None
+        code = 0
+        with span("scenario", id=sid) as attrs:
+            for i, step in enumerate(self.spec["steps"]):
+                try:
+                    await self.step(i, step)
+                except Exception as e:
+                    # Same as an uncaught exception in a standalone script: exit 1, stop here.
+                    error = f"step {i} {_label(_op(step), step[_op(step)])}: {e}"
+                    code = 1
+                    break
+            if code == 0 and (self.console.error_count or not all(self.assertions.values())):
+                code = 2
+            attrs["exit_code"] = code
+
+        if self.evidence_root is not None:
+            save_json(
+                self.evidence_root / f"{sid}.json",
+                {"id": sid, "check": self.spec.get("check"), "steps": self.log, "dialogs": self.dialogs},
+            )
+        return {
+            "check": self.spec.get("check"),
+            "backlog": self.spec.get("backlog"),
+            "fixture": self.spec.get("fixture"),
+            "exit_code": code,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "error": error,
+            "assertions": self.assertions,
+            "console": self.console.summary(),
+            "waits": {k: v for k, v in self.waits.summary().items() if k != "entries"},
+            "step_attempts": as_records(self.attempts),
+        }
+
+
+def _route_of(query: str) -> str:
+    return (parse_qs(query.lstrip("?")).get("page") or ["home"])[0]
+
+
+async def _reset(page: Page, fixture: Optional[str]) -> bool:
+    """Put the lane's context back to its fixture state; False means the context should be replaced."""
+    try:
+        entries = build_state(fixture)["origins"][0]["localStorage"] if fixture else []
+        if urlsplit(page.url).netloc == urlsplit(BASE).netloc:
+            await page.evaluate(RESET_JS, entries)
+        await page.context.clear_cookies()
+        return True
+    except Exception:
+        return False
+
+
+async def run_lane(
+    index: int, lane: Lane, browser, roots: Dict[str, Path], context: Optional[BrowserContext] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run a lane's scenarios in order, each writing into `roots[spec id]`."""
+    owned = context is None
+    if owned:
+        context = await new_context(browser, lane.fixture, lane.resources)
+    results: Dict[str, Dict[str, Any]] = {}
+    # A failing lane's trace goes to the first scenario that failed in it.
+    trace: Optional[Path] = None
+
+    async def release() -> None:
+        # The caller's context is closed (and its trace kept) by the caller.
+        lane.stats = _merge(lane.stats, policy_stats(context))
+        if owned:
+            await close_context(context, trace)
+
+    try:
+        with span("lane", index=index, fixture=lane.fixture):
+            for spec in lane.scenarios:
+                sid = spec["id"]
+                # Spans and console events belong to the scenario's own check.
+                set_track(check_name(spec))
+                page = await context.new_page()
+                try:
+                    results[sid] = await ScenarioRun(spec, page, roots[sid]).execute()
+                    if results[sid]["exit_code"] != 0 and trace is None:
+                        trace = roots[sid] / f"lane{index}-{PW_TRACE_FILE}"
+                    clean = await _reset(page, lane.fixture)
+                finally:
+                    await page.close()
+                if not clean:
+                    await release()
+                    context, owned, trace = await new_context(browser, lane.fixture, lane.resources), True, None
+    finally:
+        await release()
+    return results
+
+
+def _lane_json(lane: Lane) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"fixture": lane.fixture, "resources": lane.resources, "scenarios": [s["id"] for s in lane.scenarios]}
+    if lane.stats:
+        out["resource_stats"] = lane.stats
+    return out
+
+
+def _merge(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    return {k: a.get(k, 0) + b.get(k, 0) for k in set(a) | set(b)}
+
+
+async def run_specs(
+    context: BrowserContext, roots: Dict[str, Path]
+) -> Tuple[List[Lane], Dict[str, Dict[str, Any]]]:
+    """Run the specs in `roots` (spec id -> evidence dir) as one plan; every spec gets its own console_summary.json."""
+    specs = [s for s in load_specs() if s["id"] in roots]
+    plan = compile_plan(specs)
+
+    # The caller's plain context (no fixture, full resources) serves the first matching lane;
+    # the rest open their own.
+    lanes_done = []
+    reused = False
+    for i, lane in enumerate(plan):
+        reuse = lane.fixture is None and lane.resources == "full" and not reused
+        reused = reused or reuse
+        lanes_done.append(run_lane(i, lane, context.browser, roots, context if reuse else None))
+    per_lane = await asyncio.gather(*lanes_done)
+    results = {sid: r for lane in per_lane for sid, r in lane.items()}
+    ordered = {s["id"]: results[s["id"]] for s in specs}
+
+    lane_of = {s["id"]: lane for lane in plan for s in lane.scenarios}
+    for sid, r in ordered.items():
+        save_json(
+            roots[sid] / "console_summary.json",
+            {
+                "base": BASE,
+                "scenario": sid,
+                "evidence_dir": str(roots[sid]),
+                **r,
+                "lane": _lane_json(lane_of[sid]),
+                "retried_steps": sum(1 for a in r["step_attempts"] if a["attempts"] > 1),
+                "ts": time.time(),
+            },
+        )
+    return plan, ordered
+
+
+async def run(context: BrowserContext, evidence_root: Path, only: Optional[List[str]] = None) -> int:
+    specs = [s for s in load_specs() if not only or s["id"] in only]
+    roots = {s["id"]: evidence_root / check_name(s) for s in specs}
+    for root in roots.values():
+        root.mkdir(parents=True, exist_ok=True)
+    plan, ordered = await run_specs(context, roots)
+    step_attempts = [a for r in ordered.values() for a in r.pop("step_attempts")]
+
+    summary = {
+        "base": BASE,
+        "check": CHECK,
+        "evidence_dir": str(evidence_root),
+        "assertions": {f"{sid}.{n}": p for sid, r in ordered.items() for n, p in r["assertions"].items()},
+        "plan": [_lane_json(lane) for lane in plan],
+        "scenarios": ordered,
+        "console": {
+            "error_count": sum(r["console"]["error_count"] for r in ordered.values()),
+            "warning_count": sum(r["console"]["warning_count"] for r in ordered.values()),
+            "page_error_count": sum(r["console"]["page_error_count"] for r in ordered.values()),
+            "failed_request_count": sum(r["console"]["failed_request_count"] for r in ordered.values()),
+        },
+        "retried_steps": sum(1 for a in step_attempts if a["attempts"] > 1),
+        "step_attempts": step_attempts,
+        "ts": time.time(),
+    }
+    save_json(evidence_root / "console_summary.json", summary)
+    return max((r["exit_code"] for r in ordered.values()), default=0)
+
+
+def main(argv: List[str]) -> int:
+    if argv[:1] == ["--plan"]:
+        plan = compile_plan(load_specs())
+        print(json.dumps([_lane_json(lane) for lane in plan], ensure_ascii=False, indent=2))
+        return 0
+    # Either spec ids or their check names (`run_p0_ix_06`).
+    known = {**{sid: sid for sid in check_names().values()}, **check_names()}
+    unknown = [a for a in argv if a not in known]
+    if unknown:
+        print(f"unknown scenario(s): {', '.join(unknown)}; known: {', '.join(sorted(known))}")
+        return 2
+    return run_standalone(functools.partial(run, only=[known[a] for a in argv] or None))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Local static server for a built `dist/`, mounted like GitHub Pages.
+
+- Serves `<dist>/` under `/yiyu-think-tank-website/` (the Vite production base).
+- SPA fallback: extension-less paths that don't exist get `index.html`.
+- HTTP/1.1 keep-alive, ETag/Last-Modified revalidation, and file bodies sent
+  with `socket.sendfile` (kernel `sendfile(2)` where available).
+
+Checks reach it through `harness.py` (`YIYU_TARGET=local`); it can also be run
+by hand:
+
+  python serve_dist.py --port 4173 --dist ../../dist
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.utils
+import mimetypes
+import os
+import posixpath
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+SITE_PATH = "/yiyu-think-tank-website/"
+DEFAULT_DIST = Path(__file__).resolve().parents[2] / "dist"
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/javascript", ".mjs")
+mimetypes.add_type("image/svg+xml", ".svg")
+mimetypes.add_type("application/wasm", ".wasm")
+
+
+class DistHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "yiyu-dist"
+    root: Path = DEFAULT_DIST
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+        pass
+
+    def do_HEAD(self) -> None:
+        self._serve(send_body=False)
+
+    def do_GET(self) -> None:
+        self._serve(send_body=True)
+
+    def _resolve(self, url_path: str) -> Optional[Path]:
+        rel = posixpath.normpath(unquote(url_path[len(SITE_PATH):]))
+        if rel.startswith("..") or rel.startswith("/"):
+            return None
+        target = self.root / ("" if rel == "." else rel)
+        if target.is_dir():
+            target = target / "index.html"
+        if target.is_file():
+            return target
+        # SPA fallback: only for "page-like" paths, real asset misses must stay 404s.
+        if not posixpath.splitext(rel)[1]:
+            return self.root / "index.html"
+        return None
+
+    def _serve(self, send_body: bool) -> None:
+        url_path = urlsplit(self.path).path
+        if url_path + "/" == SITE_PATH or url_path == "/":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", SITE_PATH)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        target = self._resolve(url_path) if url_path.startswith(SITE_PATH) else None
+        if target is None or not target.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        st = target.stat()
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", mimetypes.guess_type(target.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(st.st_size))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(st.st_mtime, usegmt=True))
+        # Vite emits content-hashed files under assets/; everything else must revalidate.
+        immutable = "/assets/" in url_path
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable" if immutable else "no-cache")
+        self.end_headers()
+        if send_body:
+            with target.open("rb") as fh:
+                self.connection.sendfile(fh)
+
+
+def make_server(port: int, dist: Path = DEFAULT_DIST, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    if not (dist / "index.html").is_file():
+        raise FileNotFoundError(f"{dist}/index.html not found; run `npm run build` first")
+    handler = type("BoundDistHandler", (DistHandler,), {"root": dist.resolve()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_background(port: int, dist: Path = DEFAULT_DIST) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; the server dies with the calling process."""
+    server = make_server(port, dist)
+    threading.Thread(target=server.serve_forever, name="serve-dist", daemon=True).start()
+    return server
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Serve dist/ under the GitHub Pages base path.")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("YIYU_LOCAL_PORT", "4173")))
+    ap.add_argument("--dist", type=Path, default=Path(os.environ.get("YIYU_DIST", DEFAULT_DIST)))
+    args = ap.parse_args()
+
+    server = make_server(args.port, args.dist)
+    print(f"[serve] http://127.0.0.1:{args.port}{SITE_PATH} <- {args.dist}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Nested timing spans for harness runs.
+
+    with span("goto", url=url):
+        ...
+
+    @traced("check.perf")
+    async def check_perf(...): ...
+
+Spans nest through a `ContextVar`, so concurrent checks on one event loop (and
+`asyncio.to_thread` helpers) each keep their own stack. Every span records its
+track (the check it belongs to), parent, wall-clock start, duration and
+attributes (URL, locator, bytes written, ...). `run_all.py` exports one cycle's
+spans as:
+
+- `trace.json`: Chrome trace-event format (chrome://tracing, Perfetto);
+- `trace.folded`: collapsed stacks weighted by self time in microseconds, for
+  `flamegraph.pl` / speedscope.
+
+`init.sh` appends its phases (venv, pip, browser install, daemon) to
+`.cache/init_spans.jsonl`; the next `run_all.py` folds them into its trace.
+
+`YIYU_TRACE=0` turns span recording off. Playwright's own tracing is separate
+(`YIYU_PW_TRACE=on-failure`, see harness.py) and only kept for failing checks.
+
+Usage:
+  python tracing.py top evidence/<run>/trace.json [-n 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import inspect
+import itertools
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Leaf module: harness.py and waits.py import it, so it must not import them back.
+INIT_SPANS_FILE = Path(__file__).resolve().parent / ".cache" / "init_spans.jsonl"
+
+_stack: ContextVar[Tuple[Tuple[int, str], ...]] = ContextVar("yiyu_span_stack", default=())
+_track: ContextVar[str] = ContextVar("yiyu_span_track", default="main")
+_ids = itertools.count(1)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.enabled = os.environ.get("YIYU_TRACE", "1") != "0"
+        self.events: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str, /, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; the yielded dict takes extra attributes (e.g. `bytes`) set inside it."""
+        if not self.enabled:
+            yield attrs
+            return
+        parent = _stack.get()
+        sid = next(_ids)
+        token = _stack.set(parent + ((sid, name),))
+        start = time.time_ns()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _stack.reset(token)
+            self.events.append(
+                {
+                    "id": sid,
+                    "parent": parent[-1][0] if parent else None,
+                    "name": name,
+                    "stack": [n for _, n in parent] + [name],
+                    "track": _track.get(),
+                    "pid": os.getpid(),
+                    "ts_us": start // 1000,
+                    "dur_us": (time.time_ns() - start) // 1000,
+                    "attrs": {k: v for k, v in attrs.items() if v is not None},
+                }
+            )
+
+
+TRACER = Tracer()
+span = TRACER.span
+
+
+def set_track(name: str) -> None:
+    """Label spans of the current task (and tasks it spawns) with `name`, e.g. the check id."""
+    _track.set(name)
+
+
+def current_track() -> str:
+    return _track.get()
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `span()` for sync and async functions."""
+
+    def wrap(fn):
+        label = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with span(label):
+                    return await fn(*args, **kwargs)
+
+            return run_async
+
+        @functools.wraps(fn)
+        def run_sync(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+
+        return run_sync
+
+    return wrap
+
+
+def take_init_spans(path: Path = INIT_SPANS_FILE) -> List[Dict[str, Any]]:
+    """Consume the phases `init.sh` recorded, so only the run right after init reports them."""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+        path.unlink()
+    except OSError:
+        return []
+    events = []
+    for line in lines:
+        try:
+            e = json.loads(line)
+        except ValueError:
+            continue
+        events.append(
+            {"id": next(_ids), "parent": None, "name": e["name"], "stack": ["init", e["name"]],
+             "track": "init.sh", "pid": 0, "ts_us": e["ts_us"], "dur_us": e["dur_us"], "attrs": {}}
+        )
+    return events
+
+
+def self_times(events: List[Dict[str, Any]]) -> Dict[Tuple[int, int], int]:
+    """(pid, span id) -> duration minus its children's (clamped at 0 for overlapping concurrent children)."""
+    children: Dict[Tuple[int, int], int] = {}
+    for e in events:
+        if e["parent"] is not None:
+            key = (e["pid"], e["parent"])
+            children[key] = children.get(key, 0) + e["dur_us"]
+    return {(e["pid"], e["id"]): max(0, e["dur_us"] - children.get((e["pid"], e["id"]), 0)) for e in events}
+
+
+def to_chrome(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    tids: Dict[Tuple[int, str], int] = {}
+    out: List[Dict[str, Any]] = []
+    for e in sorted(events, key=lambda e: e["ts_us"]):
+        key = (e["pid"], e["track"])
+        if key not in tids:
+            tids[key] = len(tids) + 1
+            out.append({"name": "thread_name", "ph": "M", "pid": e["pid"], "tid": tids[key], "args": {"name": e["track"]}})
+        out.append(
+            {
+                "name": e["name"],
+                "cat": e["stack"][0],
+                "ph": "X",
+                "ts": e["ts_us"],
+                "dur": e["dur_us"],
+                "pid": e["pid"],
+                "tid": tids[key],
+                "args": e["attrs"],
+            }
+        )
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def to_folded(events: List[Dict[str, Any]]) -> str:
+    weights: Dict[str, int] = {}
+    selfs = self_times(events)
+    for e in events:
+        frames = [e["track"]] + e["stack"]
+        key = ";".join(f.replace(";", ":") for f in frames)
+        weights[key] = weights.get(key, 0) + selfs[(e["pid"], e["id"])]
+    return "".join(f"{k} {v}\n" for k, v in sorted(weights.items()) if v > 0)
+
+
+def top(events: List[Dict[str, Any]], n: int = 15) -> Dict[str, float]:
+    """Span name -> total self time in seconds, largest first."""
+    totals: Dict[str, int] = {}
+    selfs = self_times(events)
+    for e in events:
+        totals[e["name"]] = totals.get(e["name"], 0) + selfs[(e["pid"], e["id"])]
+    ranked = sorted(totals.items(), key=lambda kv: -kv[1])[:n]
+    return {k: round(v / 1e6, 3) for k, v in ranked}
+
+
+def percentile(xs: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when empty): the ceil(p% * n)-th value.
+
+    Pinned (`python -m doctest tracing.py`):
+
+    >>> [percentile([1, 2], 50), percentile(list(range(1, 11)), 50), percentile(list(range(1, 11)), 95)]
+    [1, 5, 10]
+    >>> [percentile(list(range(1, 21)), 95), percentile(list(range(1, 101)), 99), percentile(list(range(1, 101)), 100)]
+    [19, 99, 100]
+    >>> [percentile([7], 0), percentile([], 50)]
+    [7, 0.0]
+    """
+    if not xs:
+        return 0.0
+    # p * n first: `p / 100 * n` picks up float error (0.07 * 100 = 7.000000000000001).
+    k = math.ceil(p * len(xs) / 100) - 1
+    return xs[max(0, min(len(xs) - 1, k))]
+
+
+def export(events: List[Dict[str, Any]], out_dir: Path) -> Dict[str, Any]:
+    (out_dir / "trace.json").write_text(json.dumps(to_chrome(events), ensure_ascii=False), encoding="utf-8")
+    (out_dir / "trace.folded").write_text(to_folded(events), encoding="utf-8")
+    return {
+        "spans": len(events),
+        "chrome": str(out_dir / "trace.json"),
+        "folded": str(out_dir / "trace.folded"),
+        "top_self_s": top(events),
+    }
+
+
+def _from_chrome(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild parent links from an exported trace by interval nesting per thread."""
+    events: List[Dict[str, Any]] = []
+    open_spans: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+    xs = [e for e in trace["traceEvents"] if e.get("ph") == "X"]
+    for i, e in enumerate(sorted(xs, key=lambda e: (e["pid"], e["tid"], e["ts"], -e["dur"]))):
+        stack = open_spans.setdefault((e["pid"], e["tid"]), [])
+        while stack and stack[-1]["ts_us"] + stack[-1]["dur_us"] <= e["ts"]:
+            stack.pop()
+        ev = {"id": i, "parent": stack[-1]["id"] if stack else None, "name": e["name"],
+              "pid": e["pid"], "ts_us": e["ts"], "dur_us": e["dur"]}
+        events.append(ev)
+        stack.append(ev)
+    return events
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Summarise an exported harness trace")
+    ap.add_argument("cmd", choices=["top"])
+    ap.add_argument("trace", type=Path)
+    ap.add_argument("-n", type=int, default=15)
+    args = ap.parse_args(argv)
+
+    events = _from_chrome(json.loads(args.trace.read_text(encoding="utf-8")))
+    for name, secs in top(events, args.n).items():
+        print(f"{secs:10.3f}s  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Visual-regression stage: compare check screenshots against baselines.
+
+Per screenshot, cheapest test first:
+
+1. exact sha256 of the PNG bytes vs. the baseline index (no decode at all);
+2. 64-bit difference hash (dHash) of the decoded image, Hamming distance 0;
+3. only then a NumPy-vectorised diff: per-pixel max channel delta with
+   per-region ignore masks, SSIM on a 2x mean-pooled grayscale (box-window
+   statistics via integral images), and a red heatmap written next to the
+   screenshot as `<name>.diff.png`.
+
+Baselines live in `visual_baselines/<check>/`, with `index.json` caching their
+sha256/dHash/size so the fast paths never touch baseline pixels. Ignore masks
+are `visual_baselines/masks.json`: `{"<check>/<file>.png" | "*": [[x, y, w, h], ...]}`.
+
+NumPy and Pillow are optional dependencies; without them the stage reports
+`skipped`.
+
+Usage:
+  python visual_diff.py diff evidence/<run>/<check> <check>
+  python visual_diff.py approve evidence/<run>/<check> <check>
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # optional: the stage reports `skipped` without them
+    np = None
+    Image = None
+
+from harness import HERE, save_json
+
+BASELINE_DIR = HERE / "visual_baselines"
+INDEX_FILE = BASELINE_DIR / "index.json"
+MASKS_FILE = BASELINE_DIR / "masks.json"
+
+PIXEL_TOLERANCE = 16  # max per-channel delta still counted as "same"
+MAX_CHANGED_RATIO = 0.001
+MIN_SSIM = 0.98
+SSIM_WINDOW = 7
+# Full-page captures are large: bound how many are decoded at once.
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def available() -> bool:
+    return np is not None and Image is not None
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def dhash(img: "Image.Image") -> str:
+    small = np.asarray(img.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()
+
+
+def _box_mean(x: "np.ndarray", k: int) -> "np.ndarray":
+    c = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def ssim(a: "np.ndarray", b: "np.ndarray", k: int = SSIM_WINDOW) -> float:
+    if min(a.shape) < k:
+        return 1.0 if np.array_equal(a, b) else 0.0
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box_mean(a, k), _box_mean(b, k)
+    var_a = _box_mean(a * a, k) - mu_a**2
+    var_b = _box_mean(b * b, k) - mu_b**2
+    cov = _box_mean(a * b, k) - mu_a * mu_b
+    num = (2 * mu_a * mu_b + c1) * (2 * cov + c2)
+    den = (mu_a**2 + mu_b**2 + c1) * (var_a + var_b + c2)
+    return float((num / den).mean())
+
+
+def _gray_pooled(rgb: "np.ndarray") -> "np.ndarray":
+    """2x mean-pooled luma; float only at a quarter of the pixels (SSIM needs it)."""
+    h, w = (rgb.shape[0] // 2) * 2, (rgb.shape[1] // 2) * 2
+    g = np.zeros((h, w), dtype=np.float32)
+    for c, weight in enumerate((0.299, 0.587, 0.114)):
+        g += rgb[:h, :w, c] * np.float32(weight)
+    return g.reshape(h // 2, 2, w // 2, 2).mean(axis=(1, 3), dtype=np.float64)
+
+
+def _canvas(img: "Image.Image", h: int, w: int) -> "np.ndarray":
+    """uint8 RGB on an (h, w) canvas; a writable copy, padded with black."""
+    rgb = np.asarray(img.convert("RGB"))
+    out = np.zeros((h, w, 3), dtype=np.uint8)
+    out[: rgb.shape[0], : rgb.shape[1]] = rgb
+    return out
+
+
+def pixel_diff(
+    current: "Image.Image", baseline: "Image.Image", masks: List[List[int]], heatmap_path: Optional[Path]
+) -> Dict[str, Any]:
+    # Full-page captures change height with content; compare on a common canvas.
+    # Pixels stay uint8 (deltas int16, one channel at a time): tall captures
+    # would take 24 bytes/pixel per image as float64.
+    w, h = max(current.width, baseline.width), max(current.height, baseline.height)
+    a = _canvas(current, h, w)
+    b = _canvas(baseline, h, w)
+
+    keep = np.ones((h, w), dtype=bool)
+    for x, y, mw, mh in masks:
+        keep[y : y + mh, x : x + mw] = False
+    a[~keep] = 0
+    b[~keep] = 0
+
+    delta = np.zeros((h, w), dtype=np.int16)
+    for c in range(3):
+        np.maximum(delta, np.abs(a[..., c].astype(np.int16) - b[..., c]), out=delta)
+    changed = (delta > PIXEL_TOLERANCE) & keep
+    changed_ratio = float(changed.sum() / max(1, keep.sum()))
+    score = ssim(_gray_pooled(a), _gray_pooled(b))
+
+    if heatmap_path is not None and changed.any():
+        base = (_gray_pooled(b) * 0.4).astype(np.uint8).repeat(2, 0).repeat(2, 1)
+        heat = np.zeros((h, w, 3), dtype=np.uint8)
+        for c in range(3):
+            heat[: base.shape[0], : base.shape[1], c] = base
+        np.maximum(heat[..., 0], np.clip(delta * 2, 0, 255).astype(np.uint8), out=heat[..., 0])
+        Image.fromarray(heat).save(heatmap_path)
+
+    return {
+        "changed_ratio": round(changed_ratio, 6),
+        "ssim": round(score, 5),
+        "size_changed": current.size != baseline.size,
+        "heatmap": str(heatmap_path) if heatmap_path is not None and changed.any() else None,
+        "changed": changed_ratio > MAX_CHANGED_RATIO or score < MIN_SSIM,
+    }
+
+
+def diff_dir(check_dir: Path, check: str) -> Dict[str, Any]:
+    if not available():
+        return {"skipped": "numpy/Pillow not installed"}
+    index = _load_json(INDEX_FILE).get(check, {})
+    masks_cfg = _load_json(MASKS_FILE)
+    shots: Dict[str, Any] = {}
+
+    for shot in sorted(check_dir.glob("*.png")):
+        if shot.name.endswith(".diff.png"):
+            continue
+        shot.with_name(shot.stem + ".diff.png").unlink(missing_ok=True)
+        base = index.get(shot.name)
+        if base is None:
+            shots[shot.name] = {"status": "no_baseline"}
+            continue
+        data = shot.read_bytes()
+        if hashlib.sha256(data).hexdigest() == base["sha256"]:
+            shots[shot.name] = {"status": "identical"}
+            continue
+        img = Image.open(shot)
+        if list(img.size) == base["size"] and dhash(img) == base["dhash"]:
+            shots[shot.name] = {"status": "perceptual_match"}
+            continue
+        masks = masks_cfg.get("*", []) + masks_cfg.get(f"{check}/{shot.name}", [])
+        result = pixel_diff(
+            img, Image.open(BASELINE_DIR / check / shot.name), masks, shot.with_name(shot.stem + ".diff.png")
+        )
+        result["status"] = "changed" if result.pop("changed") else "within_tolerance"
+        shots[shot.name] = result
+
+    out = {
+        "changed": sorted(n for n, r in shots.items() if r["status"] == "changed"),
+        "screenshots": shots,
+    }
+    save_json(check_dir / "visual_diff.json", out)
+    return out
+
+
+def screenshots(check_dir: Path, check: str) -> Iterator[Tuple[str, str, bytes]]:
+    """(name, sha256 of the captured bytes, PNG bytes) per screenshot of a check.
+
+    Raw PNGs when they are still in the evidence dir, otherwise restored from the
+    evidence store (`run_all.py` ingests them, see evidence_store.py).
+    """
+    raw = [p for p in sorted(check_dir.glob("*.png")) if not p.name.endswith(".diff.png")]
+    if raw:
+        for shot in raw:
+            data = shot.read_bytes()
+            yield shot.name, hashlib.sha256(data).hexdigest(), data
+        return
+    from evidence_store import manifest_files, read_blob
+
+    for rel, info in manifest_files(check_dir.parent.name, check).items():
+        if rel.endswith(".png") and "/" not in rel and not rel.endswith(".diff.png"):
+            yield rel, info["sha256"], read_blob(info)
+
+
+def approve(check_dir: Path, check: str) -> int:
+    """Promote a check's current screenshots to baselines."""
+    if not available():
+        raise RuntimeError("numpy/Pillow not installed")
+    dest = BASELINE_DIR / check
+    index = _load_json(INDEX_FILE)
+    entries = index.setdefault(check, {})
+    n = 0
+    for name, digest, data in screenshots(check_dir, check):
+        dest.mkdir(parents=True, exist_ok=True)
+        (dest / name).write_bytes(data)
+        img = Image.open(io.BytesIO(data))
+        # sha256 of the captured bytes: the exact-match fast path sees raw captures.
+        entries[name] = {"sha256": digest, "dhash": dhash(img), "size": list(img.size)}
+        n += 1
+    if n == 0:
+        raise FileNotFoundError(f"no screenshots for {check} in {check_dir} or the evidence store")
+    save_json(INDEX_FILE, index)
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Visual regression against baseline screenshots.")
+    ap.add_argument("cmd", choices=["diff", "approve"])
+    ap.add_argument("check_dir", type=Path)
+    ap.add_argument("check")
+    args = ap.parse_args(argv)
+    if args.cmd == "approve":
+        try:
+            print(json.dumps({"approved": approve(args.check_dir, args.check)}))
+        except FileNotFoundError as e:
+            print(f"[visual_diff] {e}", file=sys.stderr)
+            return 1
+        return 0
+    out = diff_dir(args.check_dir, args.check)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 2 if out.get("changed") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
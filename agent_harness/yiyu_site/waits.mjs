@@ -0,0 +1,140 @@
+/**
+ * Readiness-signal waits for the Node checks (mirror of waits.py).
+ *
+ * App.tsx sets `window.__YIYU_READY__` + `<html data-yiyu-page>` and fires
+ * `yiyu_ready` after every route commit; checks wait on that (or on their own
+ * predicates) with fast polling instead of `networkidle` / `waitForTimeout`.
+ * Each wait is timed into a WaitLog whose summary goes into console_summary.json.
+ *
+ * `resolveBase()` mirrors `harness.resolve_base()`: YIYU_BASE, else
+ * YIYU_TARGET=local (served by `python serve_dist.py`), else GitHub Pages.
+ *
+ * `ConsoleLog` is the bounded counterpart of `harness.ConsoleLog`: exact
+ * counts plus distinct messages (capped), which run_all.py folds into the
+ * run-wide events.json.
+ */
+
+export const POLL_MS = 25;
+
+const SITE_PATH = '/yiyu-think-tank-website/';
+const PAGES_BASE = `https://guyuan9300.github.io${SITE_PATH}`;
+
+/** Base URL without the trailing slash. */
+export function resolveBase(env = process.env) {
+  let base = PAGES_BASE;
+  if (env.YIYU_BASE) base = env.YIYU_BASE;
+  else if (env.YIYU_TARGET === 'local') base = `http://127.0.0.1:${env.YIYU_LOCAL_PORT || '4173'}${SITE_PATH}`;
+  return base.replace(/\/+$/, '');
+}
+
+function readyPredicate(route) {
+  const root = document.getElementById('root');
+  const marked = window.__YIYU_READY__ === true;
+  if (!marked && !(root && root.childElementCount > 0)) return false;
+  if (!route) return true;
+  const page = document.documentElement.dataset.yiyuPage
+    || new URLSearchParams(window.location.search).get('page')
+    || 'home';
+  return page === route;
+}
+
+export class WaitLog {
+  constructor() {
+    this.entries = [];
+  }
+
+  async timed(name, fn) {
+    const started = performance.now();
+    let ok = false;
+    try {
+      const out = await fn();
+      ok = true;
+      return out;
+    } finally {
+      this.entries.push({ name, ms: Math.round((performance.now() - started) * 10) / 10, ok });
+    }
+  }
+
+  /** Poll a Node-side predicate; resolves false on timeout instead of throwing. */
+  until(predicate, name, { timeout = 10_000, interval = POLL_MS } = {}) {
+    return this.timed(name, async () => {
+      const deadline = Date.now() + timeout;
+      // eslint-disable-next-line no-await-in-loop
+      while (!(await predicate())) {
+        if (Date.now() > deadline) return false;
+        // eslint-disable-next-line no-await-in-loop
+        await new Promise((r) => setTimeout(r, interval));
+      }
+      return true;
+    });
+  }
+
+  summary() {
+    const slowest = [...this.entries].sort((a, b) => b.ms - a.ms);
+    return {
+      count: this.entries.length,
+      total_ms: Math.round(this.entries.reduce((s, e) => s + e.ms, 0) * 10) / 10,
+      slowest: slowest.slice(0, 5),
+      entries: this.entries,
+    };
+  }
+}
+
+export class ConsoleLog {
+  static SAMPLE = 10;
+  static MAX_DISTINCT = 50; // per kind
+
+  constructor() {
+    this.errorCount = 0;
+    this.warningCount = 0;
+    this.dropped = 0;
+    this.messages = new Map(); // kind + where + text -> { kind, text, where, count }
+    this.distinct = {}; // kind -> distinct messages kept
+  }
+
+  attach(page) {
+    page.on('console', (msg) => {
+      const type = msg.type();
+      if (type !== 'error' && type !== 'warning') return;
+      if (type === 'error') this.errorCount += 1;
+      else this.warningCount += 1;
+      this.add(`console.${type}`, msg.text(), msg.location().url || null);
+    });
+    return page;
+  }
+
+  add(kind, text, where) {
+    const key = `${kind}\n${where}\n${text}`;
+    const seen = this.messages.get(key);
+    if (seen) seen.count += 1;
+    else if ((this.distinct[kind] || 0) < ConsoleLog.MAX_DISTINCT) {
+      this.distinct[kind] = (this.distinct[kind] || 0) + 1;
+      this.messages.set(key, { kind, text, where, count: 1 });
+    } else this.dropped += 1;
+  }
+
+  sample(kind) {
+    return [...this.messages.values()].filter((m) => m.kind === kind).slice(0, ConsoleLog.SAMPLE).map((m) => m.text);
+  }
+
+  summary() {
+    return {
+      error_count: this.errorCount,
+      warning_count: this.warningCount,
+      errors_sample: this.sample('console.error'),
+      warnings_sample: this.sample('console.warning'),
+      messages: [...this.messages.values()],
+      dropped: this.dropped,
+    };
+  }
+}
+
+export function waitAppReady(page, waits, route = null, { timeout = 20_000 } = {}) {
+  return waits.timed(`app_ready:${route || '*'}`, () => page.waitForFunction(readyPredicate, route, { polling: POLL_MS, timeout }));
+}
+
+export async function gotoReady(page, url, waits, route = null, { timeout = 60_000 } = {}) {
+  const resp = await waits.timed(`goto:${url}`, () => page.goto(url, { waitUntil: 'domcontentloaded', timeout }));
+  await waitAppReady(page, waits, route);
+  return resp;
+}
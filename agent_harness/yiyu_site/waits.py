@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Readiness-signal waits for the closed-loop checks.
+
+Replaces blanket `wait_until="networkidle"` and fixed sleeps with waits on
+app-ready conditions, polled fast:
+
+- `yiyu_ready`: App.tsx sets `window.__YIYU_READY__` and
+  `<html data-yiyu-page="...">` after every route commit.
+- route changes: `data-yiyu-page` (or `?page=`) equals the expected page.
+- Python-side predicates (e.g. "a dialog was seen") via `WaitLog.until()`.
+
+Every wait is timed into a `WaitLog` (and a `wait.*` tracing span); checks put
+`waits.summary()` into their `console_summary.json` so the costliest waits are
+visible.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from tracing import span
+
+POLL_MS = 25
+
+# Falls back to "React mounted something + ?page= matches" for builds that predate the marker.
+READY_JS = """
+(route) => {
+  const root = document.getElementById('root');
+  const marked = window.__YIYU_READY__ === true;
+  if (!marked && !(root && root.childElementCount > 0)) return false;
+  if (!route) return true;
+  const page = document.documentElement.dataset.yiyuPage
+    || new URLSearchParams(window.location.search).get('page')
+    || 'home';
+  return page === route;
+}
+"""
+
+
+class WaitLog:
+    """Records how long each wait actually took."""
+
+    def __init__(self) -> None:
+        self.entries: List[Dict[str, Any]] = []
+
+    @asynccontextmanager
+    async def timed(self, name: str):
+        kind, _, target = name.partition(":")
+        started = time.perf_counter()
+        ok = False
+        try:
+            with span(f"wait.{kind}", target=target or None):
+                yield
+            ok = True
+        finally:
+            self.entries.append(
+                {"name": name, "ms": round((time.perf_counter() - started) * 1000, 1), "ok": ok}
+            )
+
+    async def until(
+        self, predicate: Callable[[], bool], name: str, timeout: float = 10.0, interval: float = POLL_MS / 1000
+    ) -> bool:
+        """Poll a Python-side predicate; returns False on timeout instead of raising."""
+        async with self.timed(name):
+            deadline = time.monotonic() + timeout
+            while not predicate():
+                if time.monotonic() > deadline:
+                    return False
+                await asyncio.sleep(interval)
+            return True
+
+    def summary(self) -> Dict[str, Any]:
+        slowest = sorted(self.entries, key=lambda e: -e["ms"])
+        return {
+            "count": len(self.entries),
+            "total_ms": round(sum(e["ms"] for e in self.entries), 1),
+            "slowest": slowest[:5],
+            "entries": self.entries,
+        }
+
+
+async def wait_app_ready(page: Page, waits: WaitLog, route: Optional[str] = None, timeout: int = 20000) -> None:
+    async with waits.timed(f"app_ready:{route or '*'}"):
+        await page.wait_for_function(READY_JS, arg=route, polling=POLL_MS, timeout=timeout)
+
+
+async def goto_ready(
+    page: Page, url: str, waits: WaitLog, route: Optional[str] = None, timeout: int = 60000
+):
+    """`page.goto` to DOMContentLoaded, then wait for the app (not the network) to settle."""
+    async with waits.timed(f"goto:{url}"):
+        resp = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    await wait_app_ready(page, waits, route)
+    return resp
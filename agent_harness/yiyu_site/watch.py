@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Watch mode: re-run the affected checks whenever `dist/` is rebuilt.
+
+A long-running inner loop instead of `npm run build` + `run_one_cycle.sh` +
+reading `progress.log`:
+
+- `src/`, `public/` and the check files (`run_p0_ix_*`, `scenarios.json`) are
+  watched; changed paths accumulate until the next rebuild;
+- a burst of writes to `dist/` (a finished `npm run build`, or `--build`
+  running it after a `src/` change) is debounced into one batch, mapped
+  through the change-impact index (impact.py) to the checks whose routes it
+  touches, and only those run;
+- the browser and the local `dist/` server stay up between batches, so a
+  batch costs the checks themselves: pass/fail and duration of each check is
+  printed as it finishes.
+
+With `--on-src` batches trigger on `src/` changes directly (for a
+`YIYU_BASE` pointing at the Vite dev server, where there is no rebuild).
+
+File events come from inotify on Linux (through ctypes, no extra package);
+elsewhere (macOS) the trees are polled by mtime/size every `--poll-s`.
+
+Usage:
+  python watch.py                      # local dist/ preview, rebuild with npm yourself
+  python watch.py --build              # also run `npm run build` after src/ changes
+  YIYU_BASE=http://127.0.0.1:5173/ python watch.py --on-src
+"""
+
+from __future__ import annotations
+
+import os
+
+# Inner loop against the local preview; spans would only pile up in a process
+# that never exits.
+os.environ.setdefault("YIYU_TARGET", "local")
+os.environ.setdefault("YIYU_TRACE", "0")
+
+import argparse
+import asyncio
+import ctypes
+import importlib
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from playwright.async_api import async_playwright
+
+from harness import BASE, DIST_DIR, EVIDENCE_DIR, HERE, ensure_target, launch_browser, ts_dir
+
+REPO = HERE.parents[1]
+DIST = DIST_DIR.resolve()
+SOURCE_ROOTS = [REPO / "src", REPO / "public"]
+CHECK_GLOBS = ["run_p0_ix_*.py", "run_p0_ix_*.mjs", "scenarios.json"]
+DEBOUNCE_S = 0.3
+POLL_S = 0.5
+BUILD_CMD = ["npm", "run", "build"]
+# Never descended into: our own output (evidence, caches) would retrigger batches.
+SKIP_DIRS = {"evidence", ".cache", ".venv", "__pycache__", "node_modules", "visual_baselines", ".git"}
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def walk(top: Path):
+    for dirpath, dirnames, names in os.walk(top):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        yield dirpath, names
+
+
+def skipped(path: Path) -> bool:
+    parts = path.relative_to(REPO).parts if path.is_relative_to(REPO) else path.parts
+    return any(part in SKIP_DIRS for part in parts)
+
+
+class PollWatcher:
+    """Portable fallback: diff (mtime_ns, size) snapshots of every file under the roots."""
+
+    kind = "poll"
+
+    def __init__(self, roots: List[Path], interval: float = POLL_S) -> None:
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        out: Dict[Path, Tuple[int, int]] = {}
+        for root in self.roots:
+            if not root.is_dir():
+                continue
+            for dirpath, names in walk(root):
+                for n in names:
+                    p = Path(dirpath, n)
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    out[p] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def changes(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self.interval))
+        now = self._scan()
+        changed = {p for p in now.keys() | self.snapshot.keys() if now.get(p) != self.snapshot.get(p)}
+        self.snapshot = now
+        return changed
+
+
+class InotifyWatcher:
+    """Recursive inotify watches on the roots; roots that vanish (or do not exist yet) are re-added."""
+
+    kind = "inotify"
+
+    def __init__(self, roots: List[Path]) -> None:
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.roots = roots
+        self.dirs: Dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add_tree(self, top: Path) -> Set[Path]:
+        """Watch `top` and every directory below it; returns the files already there."""
+        files: Set[Path] = set()
+        if skipped(top):
+            return files
+        for dirpath, names in walk(top):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = Path(dirpath)
+            files.update(Path(dirpath, n) for n in names)
+        return files
+
+    def changes(self, timeout: float) -> Set[Path]:
+        changed: Set[Path] = set()
+        watched = set(self.dirs.values())
+        for root in self.roots:
+            if root not in watched and root.is_dir():
+                changed |= self._add_tree(root)
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+        try:
+            buf = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, pos)
+            name = buf[pos + EVENT_HEADER.size : pos + EVENT_HEADER.size + length].rstrip(b"\0")
+            pos += EVENT_HEADER.size + length
+            base = self.dirs.get(wd)
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if base is None or mask & IN_DELETE_SELF:
+                continue
+            path = base / os.fsdecode(name) if name else base
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed |= self._add_tree(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(roots: List[Path], force_poll: bool = False):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(roots)
+
+
+def next_batch(watcher, debounce: float) -> Set[Path]:
+    """Block until something changes, then keep collecting until `debounce` seconds pass quietly."""
+    changed: Set[Path] = set()
+    while not changed:
+        changed = watcher.changes(1.0)
+    while True:
+        more = watcher.changes(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+def is_check_file(path: Path) -> bool:
+    return path.parent == HERE and any(path.match(g) for g in CHECK_GLOBS)
+
+
+def rel(path: Path) -> str:
+    return path.relative_to(REPO).as_posix() if path.is_relative_to(REPO) else str(path)
+
+
+class Watch:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.pending: Set[str] = set()
+        self.index = None
+        self.batches = 0
+
+    def plan(self, files: Set[str]) -> List[str]:
+        import impact
+
+        if self.index is None or any(f.startswith("src/") or is_check_file(REPO / f) for f in files):
+            # New imports / routes / specs change the index; it is cheap to rebuild.
+            impact.module_closure.cache_clear()
+            impact.checks_mentioning.cache_clear()
+            self.index = impact.build_index()
+        names = impact.select(files, self.index) if files else list(impact.ALWAYS_ON)
+        return [n for n in names if n in set(self.args.only or names)]
+
+    def reload_checks(self, files: Set[str]) -> None:
+        for f in files:
+            name = Path(f).stem
+            if f.endswith(".py") and name in sys.modules:
+                importlib.reload(sys.modules[name])
+
+    async def run_batch(self, browser, files: Set[str]) -> None:
+        from run_all import run_group
+
+        self.batches += 1
+        names = self.plan(files)
+        self.reload_checks({f for f in files if is_check_file(REPO / f)})
+        shown = ", ".join(sorted(files)[:5]) + (f" (+{len(files) - 5})" if len(files) > 5 else "")
+        print(f"\n[watch] batch {self.batches}: {len(names)} check(s) for {shown or 'dist/ rebuild'}", flush=True)
+        run_root = EVIDENCE_DIR / ts_dir()
+        run_root.mkdir(parents=True, exist_ok=True)
+        sem = asyncio.Semaphore(max(1, self.args.concurrency))
+        started = time.perf_counter()
+        results = await run_group(browser, names, run_root, sem, self.args.timeout)
+        failed = [r for r in results if r["exit_code"] != 0]
+        for r in failed:
+            detail = ", ".join(r.get("failed_assertions") or []) or ((r["error"] or "").strip().splitlines() or [""])[-1]
+            print(f"[watch]   FAIL {r['name']}: {detail}", flush=True)
+        print(
+            f"[watch] batch {self.batches}: {len(results) - len(failed)}/{len(results)} ok"
+            f" in {time.perf_counter() - started:.1f}s ({run_root.name})",
+            flush=True,
+        )
+
+    def build(self) -> bool:
+        print(f"[watch] {' '.join(BUILD_CMD)}", flush=True)
+        started = time.perf_counter()
+        proc = subprocess.run(BUILD_CMD, cwd=REPO, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[watch] build failed ({proc.returncode}):\n{(proc.stderr or proc.stdout)[-2000:]}", flush=True)
+            return False
+        print(f"[watch] build ok in {time.perf_counter() - started:.1f}s", flush=True)
+        return True
+
+    async def loop(self) -> None:
+        args = self.args
+        roots = SOURCE_ROOTS + [HERE] + ([] if args.on_src else [DIST])
+        watcher = make_watcher(roots, args.poll)
+        if isinstance(watcher, PollWatcher):
+            watcher.interval = args.poll_s
+        print(f"[watch] {watcher.kind} watching {', '.join(rel(r) for r in roots)}; target {BASE}", flush=True)
+        async with async_playwright() as p:
+            browser = await launch_browser(p)
+            try:
+                while True:
+                    changed = await asyncio.to_thread(next_batch, watcher, args.debounce)
+                    shared = sorted(c.name for c in changed if c.parent == HERE and c.suffix in (".py", ".mjs") and not is_check_file(c))
+                    if shared:
+                        print(f"[watch] {', '.join(shared)} changed: restart watch to load shared harness code", flush=True)
+                    sources = {rel(c) for c in changed if not c.is_relative_to(DIST) and (c.parent != HERE or is_check_file(c))}
+                    self.pending |= sources
+                    rebuilt = any(c.is_relative_to(DIST) for c in changed)
+                    if args.build and not rebuilt and any(not f.startswith(rel(HERE)) for f in sources):
+                        # Our own build's dist/ writes arrive as the next batch.
+                        self.build()
+                        continue
+                    if not (rebuilt or args.on_src or any(is_check_file(REPO / f) for f in sources)):
+                        continue
+                    files, self.pending = self.pending, set()
+                    await self.run_batch(browser, files)
+            finally:
+                await browser.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("only", nargs="*", help="restrict to these checks")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("--timeout", type=float, default=120, help="per-check timeout in seconds")
+    ap.add_argument("--debounce", type=float, default=DEBOUNCE_S, help="quiet period closing a burst of changes")
+    ap.add_argument("--build", action="store_true", help=f"run `{' '.join(BUILD_CMD)}` after src/public changes")
+    ap.add_argument("--on-src", action="store_true", help="run on src/ changes directly (dev server target)")
+    ap.add_argument("--poll", action="store_true", help="poll even where inotify is available")
+    ap.add_argument("--poll-s", type=float, default=POLL_S)
+    args = ap.parse_args(argv)
+
+    ensure_target()
+    try:
+        asyncio.run(Watch(args).loop())
+    except KeyboardInterrupt:
+        print("\n[watch] stopped", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
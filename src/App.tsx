@@ -172,6 +172,15 @@ export default function App() {
     }
   }, [currentPage, selectedDetailId, selectedCaseId, unknownPage]);
 
+  // Readiness signal for the closed-loop harness (agent_harness/yiyu_site/waits.py):
+  // mark the rendered route on <html data-yiyu-page> and fire `yiyu_ready` after each commit,
+  // so checks can wait on the app instead of `networkidle` or fixed sleeps.
+  useEffect(() => {
+    document.documentElement.dataset.yiyuPage = currentPage;
+    (window as Window & { __YIYU_READY__?: boolean }).__YIYU_READY__ = true;
+    window.dispatchEvent(new CustomEvent('yiyu_ready', { detail: { page: currentPage } }));
+  }, [currentPage]);
+
   const handleNavigate = (page: 'home' | 'insights' | 'learning' | 'strategy' | 'about' | 'book-reader' | 'login' | 'register' | 'forgot-password' | 'reset-password' | 'case' | 'admin' | 'user-center' | 'test' | 'strategy-companion' | 'report-library' | 'article-center' | 'consult-apply', bookId?: string, caseId?: string) => {
     // Reset scroll on page-level navigation so detail pages always open from the top.
     // (Otherwise the browser may keep the previous scroll position and look like it jumped to the bottom.)
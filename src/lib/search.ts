@@ -0,0 +1,173 @@
+// Client for the prebuilt full-text index (agent_harness/yiyu_site/search_index.py).
+//
+// `npm run build` writes `dist/search/manifest.json` plus content-hashed shard
+// files. Nothing is fetched until the first search; each query then loads only
+// the shards its terms hash to (`codePoint(term[0]) % shards`), and shards stay
+// cached for the session. Tokenisation, shard decoding and ranking mirror the
+// Python `Index`.
+//
+// Library-only for now: no page imports `searchDocs` yet.
+
+export type SearchHit = {
+  kind: 'transcript' | 'document' | 'insight';
+  title: string;
+  url: string;
+  passage: number;
+  line: number;
+  score: number;
+};
+
+type Manifest = {
+  format: number;
+  shards: number;
+  docs: { kind: SearchHit['kind']; title: string; url: string }[];
+  passages: { doc: number[]; line: number[]; len: number[] };
+  files: Record<string, string>;
+};
+
+// First char -> [term tails, base64 LEB128 varints]; see `pack_group` in search_index.py.
+type Shard = Record<string, [string, string]>;
+type Group = Map<string, number[]>;
+
+const FORMAT = 2;
+
+const INDEX_URL = `${import.meta.env.BASE_URL}search/`;
+const TOKEN_RE = /[\u3400-\u9fff\uf900-\ufaff]+|[a-z0-9]+/g;
+const TF_BITS = 3;
+const TF_MAX = (1 << TF_BITS) - 1;
+const BM25_K1 = 1.2;
+const BM25_B = 0.75;
+
+const isCjk = (ch: string) => (ch >= '\u3400' && ch <= '\u9fff') || (ch >= '\uf900' && ch <= '\ufaff');
+
+export function tokenizeQuery(text: string): string[] {
+  const out = new Set<string>();
+  for (const run of text.toLowerCase().match(TOKEN_RE) ?? []) {
+    if (isCjk(run[0])) {
+      if (run.length === 1) out.add(run);
+      for (let i = 0; i < run.length - 1; i++) out.add(run.slice(i, i + 2));
+    } else if (run.length >= 2) {
+      out.add(run);
+    }
+  }
+  return [...out];
+}
+
+type Loaded = { manifest: Manifest; docOf: number[]; avgLen: number };
+
+let manifestPromise: Promise<Loaded> | null = null;
+const shardPromises = new Map<number, Promise<Shard>>();
+const groups = new Map<string, Group>();
+
+async function fetchJson<T>(name: string): Promise<T> {
+  const res = await fetch(INDEX_URL + name);
+  if (!res.ok) throw new Error(`search index: ${name} -> HTTP ${res.status}`);
+  return res.json() as Promise<T>;
+}
+
+function loadManifest(): Promise<Loaded> {
+  if (!manifestPromise) {
+    manifestPromise = fetchJson<Manifest>('manifest.json').then((manifest) => {
+      if (manifest.format !== FORMAT) throw new Error(`search index: format ${manifest.format}, expected ${FORMAT}`);
+      const docOf: number[] = [];
+      let acc = 0;
+      for (const d of manifest.passages.doc) docOf.push((acc += d));
+      const lens = manifest.passages.len;
+      const avgLen = lens.length ? lens.reduce((a, b) => a + b, 0) / lens.length : 1;
+      return { manifest, docOf, avgLen };
+    });
+    // A failed load (e.g. a deploy without the index) can be retried later.
+    manifestPromise.catch(() => { manifestPromise = null; });
+  }
+  return manifestPromise;
+}
+
+function loadShard(manifest: Manifest, i: number): Promise<Shard> {
+  let p = shardPromises.get(i);
+  if (!p) {
+    const name = manifest.files[String(i)];
+    p = name ? fetchJson<Shard>(name) : Promise.resolve({});
+    p.catch(() => shardPromises.delete(i));
+    shardPromises.set(i, p);
+  }
+  return p;
+}
+
+function unpackGroup([text, b64]: [string, string]): Group {
+  const lists: number[][] = [[]];
+  const bytes = atob(b64);
+  let v = 0;
+  let shift = 0;
+  for (let i = 0; i < bytes.length; i++) {
+    const b = bytes.charCodeAt(i);
+    v += (b & 0x7f) * 2 ** shift;
+    if (b & 0x80) {
+      shift += 7;
+      continue;
+    }
+    // Low bit marks the last posting of a list.
+    lists[lists.length - 1].push(Math.floor(v / 2));
+    if (v % 2) lists.push([]);
+    v = shift = 0;
+  }
+  lists.pop();
+  const chars = [...text];
+  const tails = lists.length < chars.length ? text.split(' ') : [...Array(lists.length - chars.length).fill(''), ...chars];
+  return new Map(tails.map((t, i) => [t, lists[i]]));
+}
+
+function group(shard: Shard, ch: string): Group {
+  let g = groups.get(ch);
+  if (!g) {
+    g = shard[ch] ? unpackGroup(shard[ch]) : new Map();
+    groups.set(ch, g);
+  }
+  return g;
+}
+
+function postings(shard: Shard, term: string): Map<number, number> {
+  const g = group(shard, term[0]);
+  const tail = g.get(term.slice(1));
+  const lists = term.length === 1 && isCjk(term) ? [...g.values()] : tail ? [tail] : [];
+  const out = new Map<number, number>();
+  for (const packed of lists) {
+    let pid = 0;
+    for (const v of packed) {
+      pid += v >> TF_BITS;
+      out.set(pid, (out.get(pid) ?? 0) + (v & TF_MAX));
+    }
+  }
+  return out;
+}
+
+/** AND-match every query term, ranked by BM25. Loads only the shards the terms need. */
+export async function searchDocs(query: string, limit = 10): Promise<SearchHit[]> {
+  const terms = tokenizeQuery(query);
+  if (!terms.length) return [];
+  const { manifest, docOf, avgLen } = await loadManifest();
+  const shards = await Promise.all(terms.map((t) => loadShard(manifest, t.codePointAt(0)! % manifest.shards)));
+  const perTerm = terms.map((t, i) => postings(shards[i], t));
+
+  let hits = [...perTerm[0].keys()];
+  for (const plist of perTerm.slice(1)) hits = hits.filter((pid) => plist.has(pid));
+
+  const n = manifest.passages.len.length;
+  const scores = new Map<number, number>();
+  for (const plist of perTerm) {
+    const idf = Math.log(1 + (n - plist.size + 0.5) / (plist.size + 0.5));
+    for (const pid of hits) {
+      const tf = plist.get(pid)!;
+      const norm = tf + BM25_K1 * (1 - BM25_B + (BM25_B * manifest.passages.len[pid]) / avgLen);
+      scores.set(pid, (scores.get(pid) ?? 0) + (idf * tf * (BM25_K1 + 1)) / norm);
+    }
+  }
+  return [...scores.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, limit)
+    .map(([pid, score]) => ({
+      ...manifest.docs[docOf[pid]],
+      passage: pid,
+      line: manifest.passages.line[pid],
+      score: Math.round(score * 1000) / 1000,
+    }));
+}
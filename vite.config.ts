@@ -5,6 +5,10 @@ export default defineConfig(({ mode }) => ({
   plugins: [react()],
   // GitHub Pages project site needs a base path like "/<repo>/"
   base: mode === 'production' ? '/yiyu-think-tank-website/' : '/',
+  // Hidden maps for the harness coverage report (agent_harness/yiyu_site/bundle_coverage.py).
+  build: {
+    sourcemap: process.env.YIYU_SOURCEMAP ? 'hidden' : false,
+  },
   server: {
     port: 5173,
     host: true,